@@ -4,14 +4,31 @@ from .const import (
     AutoLockMode,
     ConnectionInfo,
     DoorStatus,
+    FieldChange,
     LockInfo,
     LockState,
     LockStatus,
+    StateField,
+    StatusField,
     YaleXSBLEDiscovery,
 )
+from .decoder import DEFAULT_FRAME_DECODERS, FrameDecoderRegistry
+from .events import OverflowPolicy, StateEvent, StateEventStream
+from .freshness import DEFAULT_FIELD_TTLS
+from .homekit import HomeKitCharacteristic
+from .idle import IdleDisconnectDecision, IdleDisconnectPolicy
 from .lock import Lock
+from .manager import LockManager
 from .push import PushLock
+from .scheduler import ConnectionPriority, ConnectionScheduler
 from .session import AuthError, DisconnectedError, YaleXSBLEError
+from .snapshot import (
+    PushLockSnapshot,
+    async_restore_snapshots,
+    async_save_snapshots,
+)
+from .store import JSONLockInfoStore, LockInfoStore
+from .timer import TimerWheel
 from .util import (
     ValidatedLockConfig,
     local_name_is_unique,
@@ -24,19 +41,40 @@ from .util import (
 __version__ = "3.1.3"
 
 __all__ = [
+    "DEFAULT_FIELD_TTLS",
+    "DEFAULT_FRAME_DECODERS",
     "AuthError",
     "AutoLockMode",
     "ConnectionInfo",
+    "ConnectionPriority",
+    "ConnectionScheduler",
     "DisconnectedError",
     "DoorStatus",
+    "FieldChange",
+    "FrameDecoderRegistry",
+    "HomeKitCharacteristic",
+    "IdleDisconnectDecision",
+    "IdleDisconnectPolicy",
+    "JSONLockInfoStore",
     "Lock",
     "LockInfo",
+    "LockInfoStore",
+    "LockManager",
     "LockState",
     "LockStatus",
+    "OverflowPolicy",
     "PushLock",
+    "PushLockSnapshot",
+    "StateEvent",
+    "StateEventStream",
+    "StateField",
+    "StatusField",
+    "TimerWheel",
     "ValidatedLockConfig",
     "YaleXSBLEDiscovery",
     "YaleXSBLEError",
+    "async_restore_snapshots",
+    "async_save_snapshots",
     "close_stale_connections_by_address",
     "local_name_is_unique",
     "local_name_to_serial",
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any
+
+from .codec import FRAME_LENGTH, OPERATION_FLAG, RESPONSE_FLAG
+from .const import (
+    VALUE_TO_AUTO_LOCK_MODE,
+    VALUE_TO_DOOR_STATUS,
+    VALUE_TO_LOCK_STATUS,
+    AutoLockMode,
+    Commands,
+    DoorStatus,
+    LockActivityType,
+    LockStatus,
+    SettingType,
+    StatusType,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+# Columns hold this where a frame does not carry the field
+NOT_PRESENT = -1
+
+
+class BulkFrameKind(IntEnum):
+    """What a frame decoded in bulk is."""
+
+    UNKNOWN = 0x00
+    LOCK_STATUS = 0x01
+    DOOR_STATUS = 0x02
+    LOCK_AND_DOOR = 0x03
+    BATTERY = 0x04
+    AUTO_LOCK = 0x05
+    LOCK_ACTIVITY = 0x06
+    LOCKED = 0x07
+    UNLOCKED = 0x08
+
+
+@dataclass
+class BulkDecodeResult:
+    """Columnar results of decoding many frames, one row per frame."""
+
+    kind: Any
+    lock: Any
+    door: Any
+    battery_mv: Any
+    auto_lock_mode: Any
+    auto_lock_duration: Any
+    activity_type: Any
+    timestamp: Any
+    slot: Any
+
+    def __len__(self) -> int:
+        """Return the number of frames."""
+        return len(self.kind)
+
+
+def _lookup_table(values: dict[int, Any], default: int) -> Any:
+    table = np.full(256, default, dtype=np.int16)
+    for value, member in values.items():
+        table[value] = member.value
+    return table
+
+
+def _uint16(frames: Any, offset: int) -> Any:
+    return frames[:, offset].astype(np.int32) | (
+        frames[:, offset + 1].astype(np.int32) << 8
+    )
+
+
+def _uint32(frames: Any, offset: int) -> Any:
+    return np.ascontiguousarray(frames[:, offset : offset + 4]).view("<u4")[:, 0]
+
+
+def _as_frames(frames: Any) -> Any:
+    """Return the frames as an N x 18 uint8 matrix."""
+    if isinstance(frames, np.ndarray):
+        matrix = np.asarray(frames, dtype=np.uint8)
+    else:
+        matrix = np.frombuffer(frames, dtype=np.uint8)
+    if matrix.ndim == 1:
+        if matrix.size % FRAME_LENGTH:
+            raise ValueError(
+                f"Buffer length {matrix.size} is not a multiple of {FRAME_LENGTH}"
+            )
+        matrix = matrix.reshape(-1, FRAME_LENGTH)
+    if matrix.ndim != 2 or matrix.shape[1] != FRAME_LENGTH:
+        raise ValueError(f"Expected frames of shape (N, {FRAME_LENGTH})")
+    return matrix
+
+
+def decode_frames(frames: Any) -> BulkDecodeResult:
+    """
+    Decode many decrypted notification frames at once.
+
+    frames is a contiguous buffer of 18 byte frames or a uint8
+    array of shape (N, 18). Fields are read from the same offsets
+    as the per-frame parsers in the codec module.
+    """
+    if np is None:  # pragma: no cover
+        raise RuntimeError("numpy is required for bulk decoding")
+    frames = _as_frames(frames)
+    count = len(frames)
+    flag = frames[:, 0x00]
+    opcode = frames[:, 0x01]
+    subtype = frames[:, 0x04]
+    response = flag == RESPONSE_FLAG
+    getstatus = response & (opcode == Commands.GETSTATUS)
+    setting = (
+        response
+        & ((opcode == Commands.READSETTING) | (opcode == Commands.WRITESETTING))
+        & (subtype == SettingType.AUTOLOCK)
+    )
+    operation = flag == OPERATION_FLAG
+
+    kinds = (
+        (getstatus & (subtype == StatusType.LOCK_ONLY), BulkFrameKind.LOCK_STATUS),
+        (getstatus & (subtype == StatusType.DOOR_ONLY), BulkFrameKind.DOOR_STATUS),
+        (
+            getstatus & (subtype == StatusType.DOOR_AND_LOCK),
+            BulkFrameKind.LOCK_AND_DOOR,
+        ),
+        (getstatus & (subtype == StatusType.BATTERY), BulkFrameKind.BATTERY),
+        (setting, BulkFrameKind.AUTO_LOCK),
+        (response & (opcode == Commands.LOCK_ACTIVITY), BulkFrameKind.LOCK_ACTIVITY),
+        (operation & (opcode == Commands.LOCK), BulkFrameKind.LOCKED),
+        (operation & (opcode == Commands.UNLOCK), BulkFrameKind.UNLOCKED),
+    )
+    kind = np.zeros(count, dtype=np.uint8)
+    for mask, frame_kind in kinds:
+        kind[mask] = frame_kind
+
+    lock_table = _lookup_table(VALUE_TO_LOCK_STATUS, LockStatus.UNKNOWN.value)
+    door_table = _lookup_table(VALUE_TO_DOOR_STATUS, DoorStatus.UNKNOWN.value)
+
+    activity = kind == BulkFrameKind.LOCK_ACTIVITY
+    activity_type = np.where(activity, subtype.astype(np.int16), NOT_PRESENT)
+    lock_activity = activity & (subtype == LockActivityType.LOCK.value)
+    door_activity = activity & (subtype == LockActivityType.DOOR.value)
+    pin_activity = activity & (subtype == LockActivityType.PIN.value)
+
+    lock_raw = np.select(
+        (lock_activity, pin_activity),
+        (frames[:, 0x06], frames[:, 0x0C] & 0x0F),
+        frames[:, 0x08],
+    )
+    lock = np.select(
+        (
+            (kind == BulkFrameKind.LOCK_STATUS)
+            | (kind == BulkFrameKind.LOCK_AND_DOOR)
+            | lock_activity
+            | pin_activity,
+            kind == BulkFrameKind.LOCKED,
+            kind == BulkFrameKind.UNLOCKED,
+        ),
+        (lock_table[lock_raw], LockStatus.LOCKED.value, LockStatus.UNLOCKED.value),
+        NOT_PRESENT,
+    ).astype(np.int16)
+
+    door_raw = np.where(
+        kind == BulkFrameKind.DOOR_STATUS, frames[:, 0x08], frames[:, 0x09]
+    )
+    door = np.where(
+        (kind == BulkFrameKind.DOOR_STATUS)
+        | (kind == BulkFrameKind.LOCK_AND_DOOR)
+        | door_activity,
+        door_table[door_raw],
+        NOT_PRESENT,
+    ).astype(np.int16)
+
+    uint16_at_8 = _uint16(frames, 0x08)
+    battery_mv = np.where(kind == BulkFrameKind.BATTERY, uint16_at_8, NOT_PRESENT)
+
+    auto_lock = kind == BulkFrameKind.AUTO_LOCK
+    mode_table = _lookup_table(VALUE_TO_AUTO_LOCK_MODE, AutoLockMode.OFF.value)
+    mode = mode_table[frames[:, 0x0A]]
+    # If both values are 0, auto lock is disabled
+    mode = np.where(
+        (mode == AutoLockMode.INSTANT) & (uint16_at_8 == 0), AutoLockMode.OFF, mode
+    )
+    auto_lock_mode = np.where(auto_lock, mode, NOT_PRESENT).astype(np.int16)
+    auto_lock_duration = np.where(auto_lock, uint16_at_8, NOT_PRESENT)
+
+    timestamp = np.select(
+        (door_activity | pin_activity, lock_activity),
+        (
+            _uint32(frames, 0x05).astype(np.int64),
+            _uint32(frames, 0x08).astype(np.int64),
+        ),
+        NOT_PRESENT,
+    )
+    slot = np.where(pin_activity, frames[:, 0x0A].astype(np.int16), NOT_PRESENT)
+
+    return BulkDecodeResult(
+        kind,
+        lock,
+        door,
+        battery_mv,
+        auto_lock_mode,
+        auto_lock_duration,
+        activity_type,
+        timestamp,
+        slot,
+    )
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import bisect
+import struct
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
+
+from cryptography.hazmat.primitives.ciphers import CipherContext
+
+from .const import (
+    VALUE_TO_AUTO_LOCK_MODE,
+    VALUE_TO_DOOR_STATUS,
+    VALUE_TO_LOCK_STATUS,
+    AutoLockMode,
+    AutoLockState,
+    BatteryState,
+    Commands,
+    DoorActivity,
+    DoorStatus,
+    LockActivity,
+    LockActivityType,
+    LockStateValue,
+    LockStatus,
+    SettingType,
+    StatusType,
+)
+
+FRAME_LENGTH = 0x12
+BLOCK_LENGTH = 0x10
+
+COMMAND_FLAG = 0xEE
+RESPONSE_FLAG = 0xBB
+OPERATION_FLAG = 0xAA
+
+SECURE_KEY_EXCHANGE = 0x01
+SECURE_KEY_EXCHANGE_RESPONSE = 0x02
+SECURE_INITIALIZATION = 0x03
+SECURE_INITIALIZATION_RESPONSE = 0x04
+SECURE_DISCONNECT = 0x05
+SECURE_DISCONNECT_RESPONSE = 0x8B
+
+SECUREMODE_CMD_BYTE = 0x04
+
+# flag, opcode, checksum, subtype
+_HEADER = struct.Struct("<BBxBB")
+_UINT16 = struct.Struct("<H")
+_UINT32 = struct.Struct("<I")
+# duration, mode
+_AUTO_LOCK = struct.Struct("<HB")
+# The security checksum sums three little-endian words but is truncated
+# to 32 bits, so only the low word of the trailing 10 bytes matters.
+_SECURITY_WORDS = struct.Struct("<III")
+# timestamp, door status
+_DOOR_ACTIVITY = struct.Struct("<IB")
+# timestamp, unknown, slot, unknown, lock status
+_PIN_ACTIVITY = struct.Struct("<IBBBB")
+
+AA_BATTERY_VOLTAGE_TO_PERCENTAGE = (
+    (1.55, 100),
+    (1.549, 97),
+    (1.548, 95),
+    (1.547, 94),  # confirmed
+    (1.49075, 93),  # confirmed
+    (1.49, 90),
+    (1.471, 85),  # confirmed
+    (1.46, 80),
+    (1.45, 75),
+    (1.40, 70),
+    (1.39, 65),
+    (1.38, 60),
+    (1.37, 55),
+    (1.36, 50),
+    (1.35, 45),
+    (1.34, 40),
+    (1.33, 35),
+    (1.32, 30),
+    (1.31, 35),
+    (1.30, 30),
+    (1.29, 25),
+    (1.28, 20),
+    (1.27, 15),
+    (1.26, 10),
+    (1.25, 5),
+    (1.24, 0),
+)
+AA_BATTERY_VOLTAGE_LIST = [
+    voltage for voltage, _ in sorted(AA_BATTERY_VOLTAGE_TO_PERCENTAGE)
+]
+AA_BATTERY_VOLTAGE_MAP = dict(AA_BATTERY_VOLTAGE_TO_PERCENTAGE)
+
+Buffer = bytes | bytearray | memoryview
+
+
+# Locks report the same few auto lock settings over and over
+_auto_lock_state = lru_cache(maxsize=64)(AutoLockState)
+
+
+class FrameHeader(NamedTuple):
+    """The fixed fields at the start of a frame."""
+
+    flag: int
+    opcode: int
+    checksum: int
+    subtype: int
+
+
+def convert_voltage_to_percentage(voltage: float) -> int:
+    """Convert voltage to percentage."""
+    pos = bisect.bisect_left(AA_BATTERY_VOLTAGE_LIST, voltage)
+    if pos != 0:
+        pos -= 1
+    return AA_BATTERY_VOLTAGE_MAP[AA_BATTERY_VOLTAGE_LIST[pos]]
+
+
+def simple_checksum(frame: Buffer) -> int:
+    """Return the checksum used by the command session."""
+    return (-sum(frame[0x00:FRAME_LENGTH])) & 0xFF
+
+
+def security_checksum(frame: Buffer) -> int:
+    """Return the checksum used by the secure session."""
+    val1, val2, val3 = _SECURITY_WORDS.unpack_from(frame)
+    return (0 - (val1 + val2 + val3)) & 0xFFFFFFFF
+
+
+def apply_simple_checksum(frame: bytearray) -> None:
+    """Write the simple checksum into a frame."""
+    frame[0x03] = simple_checksum(frame)
+
+
+def apply_security_checksum(frame: bytearray) -> None:
+    """Write the security checksum into a frame."""
+    _UINT32.pack_into(frame, 0x0C, security_checksum(frame))
+
+
+def is_valid_simple_checksum(frame: Buffer) -> bool:
+    """Return if a command session frame checksums correctly."""
+    return simple_checksum(frame) == 0
+
+
+def is_valid_security_checksum(frame: Buffer) -> bool:
+    """Return if a secure session frame checksums correctly."""
+    return _UINT32.unpack_from(frame, 0x0C)[0] == security_checksum(frame)
+
+
+def crypt_block_into(
+    context: CipherContext, frame: bytearray, buffer: bytearray, view: memoryview
+) -> None:
+    """
+    Encrypt or decrypt the first block of a frame in place.
+
+    The buffer must have room for an extra block as required by
+    update_into and view must be the first block of the buffer.
+    """
+    context.update_into(memoryview(frame)[0x00:BLOCK_LENGTH], buffer)
+    frame[0x00:BLOCK_LENGTH] = view
+
+
+def encode_command(opcode: int, cmd_byte: int = 0x00) -> bytearray:
+    """Encode a command session frame without its checksum."""
+    frame = bytearray(FRAME_LENGTH)
+    frame[0x00] = COMMAND_FLAG
+    frame[0x01] = opcode
+    frame[0x04] = cmd_byte
+    frame[0x10] = 0x02
+    return frame
+
+
+def encode_secure_command(opcode: int, key_index: int) -> bytearray:
+    """Encode a secure session frame without its checksum."""
+    frame = bytearray(FRAME_LENGTH)
+    frame[0x00] = opcode
+    frame[0x10] = 0x0F
+    frame[0x11] = key_index
+    return frame
+
+
+def encode_status_query(status_type: StatusType) -> bytearray:
+    """Encode a status query."""
+    return encode_command(Commands.GETSTATUS, status_type)
+
+
+def encode_read_setting(setting_type: SettingType) -> bytearray:
+    """Encode a setting read."""
+    return encode_command(Commands.READSETTING, setting_type)
+
+
+def encode_set_auto_lock(mode: AutoLockMode, duration: int) -> bytearray:
+    """Encode a write of the auto lock setting."""
+    if mode == AutoLockMode.OFF:
+        mode = AutoLockMode.INSTANT
+        duration = 0
+    frame = encode_command(Commands.WRITESETTING, SettingType.AUTOLOCK)
+    _AUTO_LOCK.pack_into(frame, 0x08, duration, mode)
+    return frame
+
+
+def encode_lock() -> bytearray:
+    """Encode a lock operation."""
+    return encode_command(Commands.LOCK)
+
+
+def encode_unlock() -> bytearray:
+    """Encode an unlock operation."""
+    return encode_command(Commands.UNLOCK)
+
+
+def encode_securemode() -> bytearray:
+    """Encode a securemode operation."""
+    return encode_command(Commands.LOCK, SECUREMODE_CMD_BYTE)
+
+
+def encode_lock_activity() -> bytearray:
+    """Encode a lock activity query."""
+    return encode_command(Commands.LOCK_ACTIVITY)
+
+
+def encode_key_exchange(key_index: int, handshake_key: Buffer) -> bytearray:
+    """Encode SEC_LOCK_TO_MOBILE_KEY_EXCHANGE with the first 8 handshake bytes."""
+    frame = encode_secure_command(SECURE_KEY_EXCHANGE, key_index)
+    frame[0x04:0x0C] = handshake_key[0x00:0x08]
+    return frame
+
+
+def encode_initialization(key_index: int, handshake_key: Buffer) -> bytearray:
+    """Encode SEC_INITIALIZATION_COMMAND with the last 8 handshake bytes."""
+    frame = encode_secure_command(SECURE_INITIALIZATION, key_index)
+    frame[0x04:0x0C] = handshake_key[0x08:0x10]
+    return frame
+
+
+def encode_disconnect() -> bytearray:
+    """Encode the secure session disconnect."""
+    return encode_secure_command(SECURE_DISCONNECT, 0x00)
+
+
+def derive_session_key(handshake_key: Buffer, key_exchange_response: Buffer) -> bytes:
+    """Derive the session key from the handshake and the lock's response."""
+    return bytes(handshake_key[0x00:0x08]) + bytes(key_exchange_response[0x04:0x0C])
+
+
+def decode_header(frame: Buffer) -> FrameHeader:
+    """Decode the header of a frame."""
+    return FrameHeader._make(_HEADER.unpack_from(frame))
+
+
+def decode_lock_status(value: int) -> LockStatus:
+    """Decode a lock status byte."""
+    return VALUE_TO_LOCK_STATUS.get(value, LockStatus.UNKNOWN)
+
+
+def decode_door_status(value: int) -> DoorStatus:
+    """Decode a door status byte."""
+    return VALUE_TO_DOOR_STATUS.get(value, DoorStatus.UNKNOWN)
+
+
+def decode_lock_and_door(frame: Buffer) -> tuple[LockStatus, DoorStatus]:
+    """Decode a DOOR_AND_LOCK status response."""
+    return decode_lock_status(frame[0x08]), decode_door_status(frame[0x09])
+
+
+def decode_battery(frame: Buffer) -> BatteryState:
+    """Decode a BATTERY status response."""
+    voltage = _UINT16.unpack_from(frame, 0x08)[0] / 1000
+    # The voltage is divided by 4 in the lock
+    # since it uses 4 AA batteries. For the Li-ion
+    # battery, this is likely wrong, but since we don't
+    # currently have a way to detect the battery type,
+    # this is the best we can do for now.
+    return BatteryState(voltage, convert_voltage_to_percentage(voltage / 4))
+
+
+def decode_auto_lock(frame: Buffer) -> AutoLockState:
+    """Decode an AUTOLOCK setting response."""
+    duration, mode_value = _AUTO_LOCK.unpack_from(frame, 0x08)
+    mode = VALUE_TO_AUTO_LOCK_MODE.get(mode_value, AutoLockMode.OFF)
+    if mode == 0 and duration == 0:
+        # If both values are 0, auto lock is disabled
+        mode = AutoLockMode.OFF
+    return _auto_lock_state(mode, duration)
+
+
+def decode_unix_timestamp(frame: Buffer, offset: int) -> datetime:
+    """Decode a little-endian unix timestamp."""
+    return datetime.fromtimestamp(_UINT32.unpack_from(frame, offset)[0])
+
+
+def decode_lock_activity(frame: Buffer) -> DoorActivity | LockActivity | None:
+    """Decode a lock activity response, None if there is no known activity."""
+    # We only know a subset of lock activities currently
+    # frame[0x04] seems to be the activity type
+    # the rest of the frame is data for the activity,
+    # format seems to be specific to each individual activity type
+    activity_type = frame[0x04]
+    if activity_type == LockActivityType.DOOR.value:
+        # Timestamp is at 0x05-0x08, door status is at 0x09
+        timestamp, door_status = _DOOR_ACTIVITY.unpack_from(frame, 0x05)
+        return DoorActivity(
+            datetime.fromtimestamp(timestamp), decode_door_status(door_status)
+        )
+    if activity_type == LockActivityType.LOCK.value:
+        # Timestamp is at 0x08-0x0B, lock status is at 0x06
+        return LockActivity(
+            decode_unix_timestamp(frame, 0x08), decode_lock_status(frame[0x06])
+        )
+    if activity_type == LockActivityType.PIN.value:
+        # Timestamp is at 0x05-0x08, slot is at 0x0A
+        # Lock status seems to be at lower half of 0x0C
+        timestamp, _, slot, _, lock_status = _PIN_ACTIVITY.unpack_from(frame, 0x05)
+        return LockActivity(
+            datetime.fromtimestamp(timestamp),
+            decode_lock_status(lock_status & 0x0F),
+            slot,
+        )
+    return None
+
+
+def decode_state(frame: Buffer) -> list[LockStateValue] | None:
+    """Decode a decrypted notification into state, None if not a state frame."""
+    flag, opcode, _, subtype = _HEADER.unpack_from(frame)
+    if flag == RESPONSE_FLAG:
+        if opcode == Commands.GETSTATUS:
+            if subtype == StatusType.LOCK_ONLY:
+                return [decode_lock_status(frame[0x08])]
+            if subtype == StatusType.DOOR_ONLY:
+                return [decode_door_status(frame[0x08])]
+            if subtype == StatusType.DOOR_AND_LOCK:
+                return list(decode_lock_and_door(frame))
+            if subtype == StatusType.BATTERY:
+                return [decode_battery(frame)]
+        elif (
+            opcode in (Commands.WRITESETTING, Commands.READSETTING)
+            and subtype == SettingType.AUTOLOCK
+        ):
+            return [decode_auto_lock(frame)]
+    elif flag == OPERATION_FLAG:
+        if opcode == Commands.UNLOCK:
+            return [LockStatus.UNLOCKED]
+        if opcode == Commands.LOCK:
+            return [LockStatus.LOCKED]
+    return None
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum, IntEnum
-from typing import TypedDict
+from typing import Any, TypedDict
 
 COMMAND_SERVICE_UUID = "0000fe24-0000-1000-8000-00805f9b34fb"
 WRITE_CHARACTERISTIC = "bd4ac611-0b45-11e3-8ffd-0800200c9a66"
@@ -90,19 +91,19 @@ class LockActivityType(Enum):
     NONE = 0x80
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BatteryState:
     voltage: float
     percentage: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AutoLockState:
     mode: AutoLockMode
     duration: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LockState:
     lock: LockStatus
     door: DoorStatus
@@ -112,11 +113,80 @@ class LockState:
     # Hold the previous auto lock state so that it can be restored if auto lock
     # is enabled
     auto_lock_prev: AutoLockState | None
+    # Set in passive mode when an advertisement shows a change
+    # that has not been read from the lock yet
+    unverified: bool = False
+
+    def evolve(self, changes: Mapping[str, Any]) -> LockState:
+        """Return a copy with changes applied without dataclasses.replace."""
+        get = changes.get
+        return LockState(
+            get("lock", self.lock),
+            get("door", self.door),
+            get("battery", self.battery),
+            get("auth", self.auth),
+            get("auto_lock", self.auto_lock),
+            get("auto_lock_prev", self.auto_lock_prev),
+            get("unverified", self.unverified),
+        )
 
 
 LockStateValue = LockStatus | DoorStatus | BatteryState | AutoLockState
 
 
+class StatusField(Enum):
+    """A piece of lock state that can be queried."""
+
+    BATTERY = "battery"
+    DOOR = "door"
+    AUTO_LOCK = "auto_lock"
+    LOCK = "lock"
+
+
+class StateField(Enum):
+    """A field of the lock state that can be subscribed to."""
+
+    LOCK = "lock"
+    DOOR = "door"
+    BATTERY = "battery"
+    AUTO_LOCK = "auto_lock"
+    AUTH = "auth"
+    UNVERIFIED = "unverified"
+
+
+STATE_FIELD_BY_NAME = {field.value: field for field in StateField}
+
+
+@dataclass(frozen=True, slots=True)
+class FieldChange:
+    """The previous and current value of a changed state field."""
+
+    previous: Any
+    current: Any
+
+
+# Asking for battery first seems to be reduce the chance of the lock
+# getting into a bad state.
+STATUS_FIELD_ORDER = (
+    StatusField.BATTERY,
+    StatusField.DOOR,
+    StatusField.AUTO_LOCK,
+    StatusField.LOCK,
+)
+
+
+@dataclass
+class StatusQueryResult:
+    """The combined result of a batched status query."""
+
+    lock: LockStatus | None = None
+    door: DoorStatus | None = None
+    battery: BatteryState | None = None
+    auto_lock: AutoLockState | None = None
+    # Fields that were not queried because the query was stopped early
+    remaining: tuple[StatusField, ...] = ()
+
+
 @dataclass
 class LockActivity:
     timestamp: datetime
@@ -130,12 +200,16 @@ class DoorActivity:
     status: DoorStatus
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AuthState:
     successful: bool
 
 
-@dataclass
+AUTH_SUCCESSFUL = AuthState(successful=True)
+AUTH_FAILED = AuthState(successful=False)
+
+
+@dataclass(frozen=True, slots=True)
 class LockInfo:
     manufacturer: str
     model: str
@@ -153,7 +227,7 @@ class LockInfo:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ConnectionInfo:
     rssi: int
 
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+from lru import LRU  # pylint: disable=no-name-in-module
+
+from .const import LockInfo
+
+COOLDOWN_TIME = 0.25
+
+# Never send commands closer together than this since a lock that
+# crashes needs a battery pull to recover. Only the backoff after
+# timeouts is learned, nothing shows a shorter cooldown is safe.
+COOLDOWN_FLOOR = COOLDOWN_TIME
+
+COOLDOWN_CEILING = 2.0
+
+# Number of healthy responses in a row before the cooldown is shrunk
+HEALTHY_RESPONSES_TO_SHRINK = 4
+
+SHRINK_FACTOR = 0.9
+
+BACKOFF_FACTOR = 2.0
+
+# Only a command sent close to the current cooldown proves
+# that the lock can handle it.
+CLOSE_GAP_FACTOR = 1.5
+
+
+class AdaptiveCooldown:
+    """Learn how long a lock needs to settle between commands."""
+
+    def __init__(
+        self,
+        cooldown: float = COOLDOWN_TIME,
+        floor: float = COOLDOWN_FLOOR,
+        ceiling: float = COOLDOWN_CEILING,
+    ) -> None:
+        """Init the cooldown."""
+        self.floor = floor
+        self.ceiling = ceiling
+        self.cooldown = min(max(cooldown, floor), ceiling)
+        self.responses = 0
+        self.timeouts = 0
+        self._healthy = 0
+
+    def response_ok(self, gap: float) -> None:
+        """Record a response to a command sent gap seconds after the last one."""
+        self.responses += 1
+        if gap > self.cooldown * CLOSE_GAP_FACTOR:
+            return
+        self._healthy += 1
+        if self._healthy >= HEALTHY_RESPONSES_TO_SHRINK:
+            self._healthy = 0
+            self.cooldown = max(self.floor, self.cooldown * SHRINK_FACTOR)
+
+    def response_timeout(self) -> None:
+        """Record a command the lock did not answer."""
+        self.timeouts += 1
+        self._healthy = 0
+        self.cooldown = min(
+            self.ceiling, max(COOLDOWN_TIME, self.cooldown) * BACKOFF_FACTOR
+        )
+
+
+def cooldown_key(lock_info: LockInfo) -> str:
+    """Return the key the cooldown is learned under."""
+    return f"{lock_info.model}/{lock_info.firmware}"
+
+
+class CooldownHistory:
+    """Track the learned cooldown per lock model and firmware."""
+
+    def __init__(self) -> None:
+        """Init the history."""
+        self._cooldowns: LRU[str, AdaptiveCooldown] = LRU(256)
+
+    def get(self, lock_info: LockInfo) -> AdaptiveCooldown:
+        """Get the cooldown for a lock, creating it if needed."""
+        key = cooldown_key(lock_info)
+        if (cooldown := self._cooldowns.get(key)) is None:
+            cooldown = self._cooldowns[key] = AdaptiveCooldown()
+        return cooldown
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the learned cooldowns so they can be persisted."""
+        return {key: cooldown.cooldown for key, cooldown in self._cooldowns.items()}
+
+    def restore(self, data: Mapping[str, float]) -> None:
+        """Restore cooldowns previously returned by as_dict."""
+        for key, value in data.items():
+            self._cooldowns[key] = AdaptiveCooldown(value)
+
+
+COOLDOWN_HISTORY = CooldownHistory()
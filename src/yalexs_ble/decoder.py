@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+from .codec import (
+    OPERATION_FLAG,
+    RESPONSE_FLAG,
+    decode_door_status,
+    decode_lock_status,
+)
+from .const import (
+    Commands,
+    LockStateValue,
+    LockStatus,
+    SettingType,
+    StatusType,
+)
+
+if TYPE_CHECKING:
+    from .lock import Lock
+
+FrameDecoder = Callable[["Lock", bytes], Iterable[LockStateValue] | None]
+
+# (flag byte, opcode, subtype); a subtype of None matches any subtype
+FrameKey = tuple[int, int, int | None]
+
+
+def ignore_frame(lock: Lock, state: bytes) -> None:
+    """Drop a frame that is known but carries nothing we track."""
+    return
+
+
+class FrameDecoderRegistry:
+    """Dispatch notification frames to decoders by flag, opcode and subtype."""
+
+    def __init__(self, decoders: dict[FrameKey, FrameDecoder] | None = None) -> None:
+        """Init the registry."""
+        self._decoders: dict[FrameKey, FrameDecoder] = dict(decoders or {})
+
+    def copy(self) -> FrameDecoderRegistry:
+        """Return a copy of the registry."""
+        return FrameDecoderRegistry(self._decoders)
+
+    def register(
+        self, flag: int, opcode: int, subtype: int | None, decoder: FrameDecoder
+    ) -> Callable[[], None]:
+        """Register a decoder and return a function to unregister it."""
+        key: FrameKey = (flag, opcode, subtype)
+        previous = self._decoders.get(key)
+        self._decoders[key] = decoder
+
+        def unregister() -> None:
+            if previous is None:
+                del self._decoders[key]
+            else:
+                self._decoders[key] = previous
+
+        return unregister
+
+    def ignore(
+        self, flag: int, opcode: int, subtype: int | None = None
+    ) -> Callable[[], None]:
+        """Mark a frame type as known so it is dropped silently."""
+        return self.register(flag, opcode, subtype, ignore_frame)
+
+    def get(self, state: bytes) -> FrameDecoder | None:
+        """Return the decoder for a frame or None if the frame is unknown."""
+        decoders = self._decoders
+        return decoders.get((state[0], state[1], state[4])) or decoders.get(
+            (state[0], state[1], None)
+        )
+
+
+def _decode_lock_only(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [decode_lock_status(state[0x08])]
+
+
+def _decode_door_only(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [decode_door_status(state[0x08])]
+
+
+def _decode_door_and_lock(lock: Lock, state: bytes) -> Iterable[LockStateValue]:
+    return lock._parse_lock_and_door_state(state)
+
+
+def _decode_battery(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [lock._parse_battery_state(state)]
+
+
+def _decode_auto_lock(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [lock._parse_auto_lock_state(state)]
+
+
+def _decode_unlocked(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [LockStatus.UNLOCKED]
+
+
+def _decode_locked(lock: Lock, state: bytes) -> list[LockStateValue]:
+    return [LockStatus.LOCKED]
+
+
+DEFAULT_FRAME_DECODERS = FrameDecoderRegistry(
+    {
+        # Ignore lock activity as these are historical events
+        (RESPONSE_FLAG, Commands.LOCK_ACTIVITY, None): ignore_frame,
+        (RESPONSE_FLAG, Commands.GETSTATUS, StatusType.LOCK_ONLY): _decode_lock_only,
+        (RESPONSE_FLAG, Commands.GETSTATUS, StatusType.DOOR_ONLY): _decode_door_only,
+        (
+            RESPONSE_FLAG,
+            Commands.GETSTATUS,
+            StatusType.DOOR_AND_LOCK,
+        ): _decode_door_and_lock,
+        (RESPONSE_FLAG, Commands.GETSTATUS, StatusType.BATTERY): _decode_battery,
+        (RESPONSE_FLAG, Commands.WRITESETTING, SettingType.AUTOLOCK): _decode_auto_lock,
+        (RESPONSE_FLAG, Commands.READSETTING, SettingType.AUTOLOCK): _decode_auto_lock,
+        (OPERATION_FLAG, Commands.UNLOCK, None): _decode_unlocked,
+        (OPERATION_FLAG, Commands.LOCK, None): _decode_locked,
+    }
+)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+from types import TracebackType
+
+from .const import FieldChange, LockState, StateField
+
+DEFAULT_EVENT_QUEUE_SIZE = 16
+
+
+class OverflowPolicy(Enum):
+    """What to do when a consumer falls behind and the queue is full."""
+
+    # Discard the oldest queued event
+    DROP_OLDEST = "drop_oldest"
+    # Merge into the newest queued event keeping the latest value per field
+    COALESCE = "coalesce"
+
+
+@dataclass(frozen=True, slots=True)
+class StateEvent:
+    """A change of the lock state."""
+
+    lock_state: LockState
+    changes: dict[StateField, FieldChange]
+
+
+class StateEventStream:
+    """A bounded stream of state events for a single consumer."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: OverflowPolicy,
+        on_close: Callable[[StateEventStream], None],
+    ) -> None:
+        """Init the stream."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._maxsize = maxsize
+        self._policy = policy
+        self._on_close = on_close
+        self._queue: deque[StateEvent] = deque()
+        self._waiter: asyncio.Future[None] | None = None
+        self._closed = False
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        """Return the number of queued events."""
+        return len(self._queue)
+
+    def put(self, event: StateEvent) -> None:
+        """Queue an event without blocking."""
+        if self._closed:
+            return
+        queue = self._queue
+        if len(queue) >= self._maxsize:
+            if self._policy is OverflowPolicy.COALESCE:
+                newest = queue[-1]
+                changes = dict(newest.changes)
+                for field, change in event.changes.items():
+                    if (queued := changes.get(field)) is None:
+                        changes[field] = change
+                    elif queued.previous == change.current:
+                        # The field is back where it started
+                        del changes[field]
+                    else:
+                        changes[field] = FieldChange(queued.previous, change.current)
+                self.coalesced += 1
+                if changes:
+                    queue[-1] = StateEvent(event.lock_state, changes)
+                else:
+                    queue.pop()
+                return
+            queue.popleft()
+            self.dropped += 1
+        queue.append(event)
+        self._wake()
+
+    def close(self) -> None:
+        """Stop the stream, iteration ends once queued events are consumed."""
+        if self._closed:
+            return
+        self._closed = True
+        self._on_close(self)
+        self._wake()
+
+    def _wake(self) -> None:
+        if (waiter := self._waiter) is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __aiter__(self) -> StateEventStream:
+        """Return the iterator."""
+        return self
+
+    async def __anext__(self) -> StateEvent:
+        """Wait for the next event."""
+        while not self._queue:
+            if self._closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._queue.popleft()
+
+    def __enter__(self) -> StateEventStream:
+        """Enter the stream context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the stream."""
+        self.close()
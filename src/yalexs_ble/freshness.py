@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+from .const import (
+    AutoLockState,
+    BatteryState,
+    DoorStatus,
+    LockStatus,
+    StatusField,
+)
+
+# Refresh only when the field has not been seen on the current connection
+PER_CONNECTION = 0.0
+
+# How long a field stays fresh across connections in seconds, None
+# means it only changes when we change it or the lock tells us.
+DEFAULT_FIELD_TTLS: Mapping[StatusField, float | None] = {
+    # Lock and door can change while we are not connected
+    StatusField.LOCK: PER_CONNECTION,
+    StatusField.DOOR: PER_CONNECTION,
+    StatusField.BATTERY: 6 * 60 * 60,
+    StatusField.AUTO_LOCK: None,
+}
+
+STATUS_FIELD_BY_STATE_TYPE: Mapping[type, StatusField] = {
+    LockStatus: StatusField.LOCK,
+    DoorStatus: StatusField.DOOR,
+    BatteryState: StatusField.BATTERY,
+    AutoLockState: StatusField.AUTO_LOCK,
+}
+
+
+class FreshnessPlanner:
+    """
+    Decide which status fields need to be queried.
+
+    A field is fresh if it was refreshed on the current connection
+    or it was refreshed less than its TTL ago.
+    """
+
+    def __init__(self, ttls: Mapping[StatusField, float | None] | None = None) -> None:
+        """Init the planner."""
+        self._ttls = {**DEFAULT_FIELD_TTLS, **(ttls or {})}
+        self._connection = 0
+        self._refreshed: dict[StatusField, tuple[float, int]] = {}
+
+    def new_connection(self) -> None:
+        """Start a new connection, per connection fields become stale."""
+        self._connection += 1
+
+    def refreshed(self, field: StatusField, now: float) -> None:
+        """Record that a field was read or pushed by the lock."""
+        self._refreshed[field] = (now, self._connection)
+
+    def refreshed_state(self, state_type: type, now: float) -> None:
+        """Record that a state value of the given type was received."""
+        if (field := STATUS_FIELD_BY_STATE_TYPE.get(state_type)) is not None:
+            self._refreshed[field] = (now, self._connection)
+
+    def invalidate(self, field: StatusField) -> None:
+        """Forget a field so it is queried on the next update."""
+        self._refreshed.pop(field, None)
+
+    def is_fresh(self, field: StatusField, now: float) -> bool:
+        """Return True if the field does not need to be queried."""
+        if (refreshed := self._refreshed.get(field)) is None:
+            return False
+        refreshed_at, connection = refreshed
+        if connection == self._connection:
+            return True
+        ttl = self._ttls[field]
+        return ttl is None or now - refreshed_at < ttl
+
+    def stale(self, fields: Iterable[StatusField], now: float) -> list[StatusField]:
+        """Return the fields that need to be queried."""
+        return [field for field in fields if not self.is_fresh(field, now)]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hmac
+import struct
+from collections.abc import Mapping
+from dataclasses import dataclass
+from enum import Enum
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+from cryptography.hazmat.primitives.poly1305 import Poly1305
+
+from .const import HAP_ENCRYPTED_FIRST_BYTE, DoorStatus, LockStatus
+
+BROADCAST_KEY_LENGTH = 32
+
+# Type, subtype and length, advertising identifier, 12 bytes of
+# encrypted GSN, IID and value followed by a truncated auth tag.
+_ADVERTISING_ID = slice(2, 8)
+_ENCRYPTED = slice(8, 20)
+_TAG = slice(20, 24)
+BROADCAST_LENGTH = 24
+BROADCAST_TAG_LENGTH = 4
+
+# The GSN wraps back to 1 after this value
+GSN_MAX = 0xFFFF
+
+# How many GSNs past the last known one to try
+DEFAULT_GSN_WINDOW = 32
+
+_PAYLOAD = struct.Struct("<HHQ")
+_LENGTHS = struct.Struct("<QQ")
+
+
+class HomeKitCharacteristic(Enum):
+    """A HomeKit characteristic a lock may broadcast."""
+
+    LOCK_CURRENT_STATE = "lock_current_state"
+    CONTACT_SENSOR_STATE = "contact_sensor_state"
+
+
+# Jammed and unknown both mean we do not know the position
+LOCK_CURRENT_STATE_TO_LOCK_STATUS = {
+    0: LockStatus.UNLOCKED,
+    1: LockStatus.LOCKED,
+    2: LockStatus.UNKNOWN,
+    3: LockStatus.UNKNOWN,
+}
+
+CONTACT_SENSOR_STATE_TO_DOOR_STATUS = {
+    0: DoorStatus.CLOSED,
+    1: DoorStatus.OPENED,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class HomeKitBroadcast:
+    """A decrypted HomeKit broadcast notification."""
+
+    gsn: int
+    iid: int
+    value: int
+
+
+def _next_gsn(gsn: int) -> int:
+    return 1 if gsn >= GSN_MAX else gsn + 1
+
+
+def _pad16(length: int) -> bytes:
+    return b"\x00" * (-length % 16)
+
+
+def broadcast_nonce(gsn: int) -> bytes:
+    """Return the ChaCha20-Poly1305 nonce for a GSN."""
+    return b"\x00\x00\x00\x00" + gsn.to_bytes(8, "little")
+
+
+def broadcast_tag(key: bytes, nonce: bytes, aad: bytes, ciphertext: bytes) -> bytes:
+    """Return the full ChaCha20-Poly1305 tag, broadcasts only carry the first bytes."""
+    keystream = Cipher(
+        algorithms.ChaCha20(key, b"\x00\x00\x00\x00" + nonce), mode=None
+    ).encryptor()
+    poly = Poly1305(keystream.update(b"\x00" * 32))
+    poly.update(aad + _pad16(len(aad)))
+    poly.update(ciphertext + _pad16(len(ciphertext)))
+    poly.update(_LENGTHS.pack(len(aad), len(ciphertext)))
+    return poly.finalize()
+
+
+def _chacha20(key: bytes, nonce: bytes, data: bytes) -> bytes:
+    # Block 0 is used for the Poly1305 key so data starts at block 1
+    return (
+        Cipher(algorithms.ChaCha20(key, b"\x01\x00\x00\x00" + nonce), mode=None)
+        .encryptor()
+        .update(data)
+    )
+
+
+class HomeKitBroadcastDecryptor:
+    """Decrypt the encrypted broadcast notifications of a HomeKit accessory."""
+
+    def __init__(
+        self,
+        key: bytes | str,
+        characteristics: Mapping[int, HomeKitCharacteristic],
+        gsn_window: int = DEFAULT_GSN_WINDOW,
+    ) -> None:
+        """
+        Init the decryptor.
+
+        key is the broadcast encryption key as bytes or hex and
+        characteristics maps instance ids to the characteristic
+        they broadcast.
+        """
+        key = bytes.fromhex(key) if isinstance(key, str) else bytes(key)
+        if len(key) != BROADCAST_KEY_LENGTH:
+            raise ValueError(f"Broadcast key must be {BROADCAST_KEY_LENGTH} bytes")
+        self._key = key
+        self._characteristics = dict(characteristics)
+        self._gsn_window = gsn_window
+
+    def decrypt(self, data: bytes, last_gsn: int) -> HomeKitBroadcast | None:
+        """
+        Decrypt an encrypted broadcast from the Apple manufacturer data.
+
+        The GSN is part of the encrypted payload so the GSNs following
+        the last known one are tried until the auth tag matches.
+        """
+        if (
+            len(data) < BROADCAST_LENGTH
+            or data[0] != HAP_ENCRYPTED_FIRST_BYTE
+            or last_gsn < 0
+        ):
+            return None
+        aad = bytes(data[_ADVERTISING_ID])
+        ciphertext = bytes(data[_ENCRYPTED])
+        tag = bytes(data[_TAG])
+        gsn = last_gsn
+        for _ in range(self._gsn_window + 1):
+            nonce = broadcast_nonce(gsn)
+            if hmac.compare_digest(
+                broadcast_tag(self._key, nonce, aad, ciphertext)[:BROADCAST_TAG_LENGTH],
+                tag,
+            ):
+                plain_gsn, iid, value = _PAYLOAD.unpack(
+                    _chacha20(self._key, nonce, ciphertext)
+                )
+                return HomeKitBroadcast(plain_gsn, iid, value)
+            gsn = _next_gsn(gsn)
+        return None
+
+    def state(self, broadcast: HomeKitBroadcast) -> LockStatus | DoorStatus | None:
+        """Map a decrypted broadcast to a lock or door status."""
+        characteristic = self._characteristics.get(broadcast.iid)
+        # Values are little endian so the first byte holds small enums
+        value = broadcast.value & 0xFF
+        if characteristic is HomeKitCharacteristic.LOCK_CURRENT_STATE:
+            return LOCK_CURRENT_STATE_TO_LOCK_STATUS.get(value)
+        if characteristic is HomeKitCharacteristic.CONTACT_SENSOR_STATE:
+            return CONTACT_SENSOR_STATE_TO_DOOR_STATUS.get(value)
+        return None
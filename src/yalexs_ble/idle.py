@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+_LOGGER = logging.getLogger(__name__)
+
+# The lock drops idle connections after 30 seconds on its own
+MAX_IDLE_DISCONNECT_DELAY = 25.0
+
+# Assumed reconnect and handshake time until one has been measured
+DEFAULT_RECONNECT_SECONDS = 3.0
+
+# Seconds of reconnect latency one second of holding a slot is worth
+SLOT_SECOND_COST = 0.1
+
+# Keep the link a little past an expected request so it is not raced
+IDLE_MARGIN_SECONDS = 0.5
+
+# Number of activity gaps and decisions to remember
+IDLE_HISTORY = 32
+
+# Do not learn from fewer gaps than this
+MIN_IDLE_SAMPLES = 4
+
+# Weight of the newest connect time in the moving average
+RECONNECT_SMOOTHING = 0.3
+
+
+@dataclass(frozen=True, slots=True)
+class IdleDisconnectDecision:
+    """An idle disconnect delay that was chosen and why."""
+
+    delay: float
+    samples: int
+    reconnect_seconds: float
+    contended: bool
+
+
+class IdleDisconnectPolicy:
+    """
+    Learn how long to keep an idle connection from the lock's activity.
+
+    The delay is chosen to minimize the expected reconnect latency plus
+    the cost of holding the connection slot over the recent gaps between
+    requests and notifications.
+    """
+
+    def __init__(
+        self,
+        base_delay: float,
+        max_delay: float = MAX_IDLE_DISCONNECT_DELAY,
+        slot_cost: float = SLOT_SECOND_COST,
+    ) -> None:
+        """Init the policy."""
+        self.base_delay = base_delay
+        self.max_delay = max(base_delay, max_delay)
+        self.slot_cost = slot_cost
+        self.reconnect_seconds = DEFAULT_RECONNECT_SECONDS
+        self.gaps: deque[float] = deque(maxlen=IDLE_HISTORY)
+        self.decisions: deque[IdleDisconnectDecision] = deque(maxlen=IDLE_HISTORY)
+        # Activity while still connected after the base delay would have expired
+        self.hits = 0
+        # Activity shortly after an idle disconnect that a longer delay would catch
+        self.misses = 0
+        self._last_activity: float | None = None
+        self._disconnected_at: float | None = None
+        self._learned: float | None = None
+
+    def record_activity(self, now: float, connected: bool) -> None:
+        """Record a request or notification."""
+        if (last := self._last_activity) is not None:
+            gap = now - last
+            self.gaps.append(gap)
+            self._learned = None
+            if connected and gap > self.base_delay:
+                self.hits += 1
+        if (
+            not connected
+            and (disconnected_at := self._disconnected_at) is not None
+            and now - disconnected_at <= self.max_delay
+        ):
+            self.misses += 1
+        self._disconnected_at = None
+        self._last_activity = now
+
+    def record_connect(self, seconds: float) -> None:
+        """Record how long connecting and the handshake took."""
+        self.reconnect_seconds += RECONNECT_SMOOTHING * (
+            seconds - self.reconnect_seconds
+        )
+        self._learned = None
+
+    def record_idle_disconnect(self, now: float) -> None:
+        """Record that the connection was dropped for being idle."""
+        self._disconnected_at = now
+
+    def delay(self, contended: bool = False) -> float:
+        """
+        Return the idle disconnect delay for a new connection.
+
+        When other connections are waiting for a slot on the same
+        adapter the base delay is used so the slot is freed quickly.
+        """
+        if contended:
+            delay = self.base_delay
+        else:
+            if self._learned is None:
+                self._learned = self._learn()
+            delay = self._learned
+        self.decisions.append(
+            IdleDisconnectDecision(
+                delay, len(self.gaps), self.reconnect_seconds, contended
+            )
+        )
+        return delay
+
+    def _learn(self) -> float:
+        """Pick the delay with the lowest cost over the recent gaps."""
+        gaps = self.gaps
+        if len(gaps) < MIN_IDLE_SAMPLES:
+            return self.base_delay
+        reconnect = self.reconnect_seconds
+        slot_cost = self.slot_cost
+        best_delay = self.base_delay
+        best_cost: float | None = None
+        # The cost only changes just past an observed gap
+        candidates = {self.base_delay}
+        for gap in gaps:
+            if self.base_delay < (candidate := gap + IDLE_MARGIN_SECONDS):
+                candidates.add(min(candidate, self.max_delay))
+        for candidate in sorted(candidates):
+            cost = sum(
+                reconnect + candidate * slot_cost
+                if gap > candidate
+                else gap * slot_cost
+                for gap in gaps
+            )
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best_delay = candidate
+        _LOGGER.debug(
+            "Learned idle disconnect delay of %s seconds from %s gaps",
+            best_delay,
+            len(gaps),
+        )
+        return best_delay
+
+    def as_dict(self) -> dict[str, float | int]:
+        """Return the state of the policy for diagnostics."""
+        return {
+            "delay": self.decisions[-1].delay if self.decisions else self.base_delay,
+            "samples": len(self.gaps),
+            "reconnect_seconds": self.reconnect_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-import bisect
 import logging
 import os
-from collections.abc import Callable, Iterable
-from datetime import datetime
-from typing import Any, TypeVar, cast
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, NoReturn, TypeVar, cast
 
 from bleak import BleakError
+from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak_retry_connector import (
     MAX_CONNECT_ATTEMPTS,
     BleakClientWithServiceCache,
@@ -16,15 +16,20 @@ from bleak_retry_connector import (
     establish_connection,
 )
 
-from . import util
+from . import codec, util
+from .codec import (  # noqa: F401
+    AA_BATTERY_VOLTAGE_LIST,
+    AA_BATTERY_VOLTAGE_MAP,
+    AA_BATTERY_VOLTAGE_TO_PERCENTAGE,
+    convert_voltage_to_percentage,
+)
 from .const import (
     FIRMWARE_REVISION_CHARACTERISTIC,
     MANUFACTURER_NAME_CHARACTERISTIC,
     MODEL_NUMBER_CHARACTERISTIC,
     SERIAL_NUMBER_CHARACTERISTIC,
+    STATUS_FIELD_ORDER,
     VALUE_TO_AUTO_LOCK_MODE,
-    VALUE_TO_DOOR_STATUS,
-    VALUE_TO_LOCK_STATUS,
     AutoLockMode,
     AutoLockState,
     BatteryState,
@@ -37,45 +42,35 @@ from .const import (
     LockStateValue,
     LockStatus,
     SettingType,
+    StatusField,
+    StatusQueryResult,
     StatusType,
 )
+from .cooldown import COOLDOWN_HISTORY, AdaptiveCooldown, CooldownHistory
+from .decoder import DEFAULT_FRAME_DECODERS, FrameDecoderRegistry
+from .metrics import CommandMetrics
 from .secure_session import SecureSession
 from .session import AuthError, DisconnectedError, Session, YaleXSBLEError
+from .trace import FrameTrace
 
 _LOGGER = logging.getLogger(__name__)
 
-AA_BATTERY_VOLTAGE_TO_PERCENTAGE = (
-    (1.55, 100),
-    (1.549, 97),
-    (1.548, 95),
-    (1.547, 94),  # confirmed
-    (1.49075, 93),  # confirmed
-    (1.49, 90),
-    (1.471, 85),  # confirmed
-    (1.46, 80),
-    (1.45, 75),
-    (1.40, 70),
-    (1.39, 65),
-    (1.38, 60),
-    (1.37, 55),
-    (1.36, 50),
-    (1.35, 45),
-    (1.34, 40),
-    (1.33, 35),
-    (1.32, 30),
-    (1.31, 35),
-    (1.30, 30),
-    (1.29, 25),
-    (1.28, 20),
-    (1.27, 15),
-    (1.26, 10),
-    (1.25, 5),
-    (1.24, 0),
+STATUS_FIELD_COMMANDS: dict[StatusField, tuple[int, int, str]] = {
+    StatusField.BATTERY: (Commands.GETSTATUS, StatusType.BATTERY, "battery"),
+    StatusField.DOOR: (Commands.GETSTATUS, StatusType.DOOR_ONLY, "door_status"),
+    StatusField.AUTO_LOCK: (
+        Commands.READSETTING,
+        SettingType.AUTOLOCK,
+        "auto_lock_status",
+    ),
+    StatusField.LOCK: (Commands.GETSTATUS, StatusType.LOCK_ONLY, "lock_status"),
+}
+LOCK_INFO_CHARACTERISTICS = (
+    MANUFACTURER_NAME_CHARACTERISTIC,
+    MODEL_NUMBER_CHARACTERISTIC,
+    SERIAL_NUMBER_CHARACTERISTIC,
+    FIRMWARE_REVISION_CHARACTERISTIC,
 )
-AA_BATTERY_VOLTAGE_LIST = [
-    voltage for voltage, _ in sorted(AA_BATTERY_VOLTAGE_TO_PERCENTAGE)
-]
-AA_BATTERY_VOLTAGE_MAP = dict(AA_BATTERY_VOLTAGE_TO_PERCENTAGE)
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
 
@@ -93,14 +88,6 @@ def raise_if_not_connected(func: WrapFuncType) -> WrapFuncType:
     return cast(WrapFuncType, _async_wrap_connected_operation)
 
 
-def convert_voltage_to_percentage(voltage: float) -> int:
-    """Convert voltage to percentage."""
-    pos = bisect.bisect_left(AA_BATTERY_VOLTAGE_LIST, voltage)
-    if pos != 0:
-        pos -= 1
-    return AA_BATTERY_VOLTAGE_MAP[AA_BATTERY_VOLTAGE_LIST[pos]]
-
-
 class Lock:
     def __init__(
         self,
@@ -111,6 +98,12 @@ class Lock:
         state_callback: Callable[[Iterable[LockStateValue]], None],
         info: LockInfo | None = None,
         disconnect_callback: Callable[[], None] | None = None,
+        *,
+        max_in_flight: int = 1,
+        cooldown_history: CooldownHistory = COOLDOWN_HISTORY,
+        frame_trace: FrameTrace | None = None,
+        metrics: CommandMetrics | None = None,
+        frame_decoders: FrameDecoderRegistry = DEFAULT_FRAME_DECODERS,
     ) -> None:
         self.ble_device_callback = ble_device_callback
         self.key = bytes.fromhex(keyString)
@@ -126,6 +119,26 @@ class Lock:
         self._disconnected = False
         self._disconnect_callback = disconnect_callback
         self._disconnected_futures: set[asyncio.Future[None]] = set()
+        # Number of independent queries that may wait for a response at once
+        self._max_in_flight = max_in_flight
+        self._cooldown_history = cooldown_history
+        # Used until the model is known so one model can not slow down others
+        self._cooldown = AdaptiveCooldown()
+        self._frame_trace = frame_trace or FrameTrace()
+        self._metrics = metrics or CommandMetrics()
+        self._frame_decoders = frame_decoders
+        # Cleared if the backend fails to read several characteristics at once
+        self._concurrent_gatt_reads = True
+
+    @property
+    def frame_trace(self) -> FrameTrace:
+        """Return the trace of the most recent frames."""
+        return self._frame_trace
+
+    @property
+    def command_metrics(self) -> CommandMetrics:
+        """Return the latency histograms per command."""
+        return self._metrics
 
     def set_name(self, name: str) -> None:
         self.name = name
@@ -140,6 +153,12 @@ class Lock:
         if self._disconnect_callback:
             self._disconnect_callback()
 
+    def _session_cooldown(self) -> AdaptiveCooldown:
+        """Return the cooldown to learn into for this connection."""
+        if self._lock_info is None:
+            return self._cooldown
+        return self._cooldown_history.get(self._lock_info)
+
     async def connect(self, max_attempts: int = MAX_CONNECT_ATTEMPTS) -> None:
         """Connect to the lock."""
         _LOGGER.debug(
@@ -161,12 +180,17 @@ class Lock:
             raise
         _LOGGER.debug("%s: Connected", self.name)
 
+        cooldown = self._session_cooldown()
         self.session = Session(
             self.client,
             self.name,
             self._lock,
             self._disconnected_futures,
             self._internal_state_callback,
+            max_in_flight=self._max_in_flight,
+            cooldown=cooldown,
+            frame_trace=self._frame_trace,
+            metrics=self._metrics,
         )
         self.secure_session = SecureSession(
             self.client,
@@ -174,6 +198,9 @@ class Lock:
             self._lock,
             self._disconnected_futures,
             self.key_index,
+            cooldown=cooldown,
+            frame_trace=self._frame_trace,
+            metrics=self._metrics,
         )
         session = self.session
         secure_session = self.secure_session
@@ -199,7 +226,7 @@ class Lock:
             raise
         await self.session.start_notify()
 
-    async def _handle_missing_characteristic(self, char_uuid: str) -> None:
+    async def _handle_missing_characteristic(self, char_uuid: str) -> NoReturn:
         """Handle missing characteristic."""
         self.secure_session = None
         self.session = None
@@ -211,40 +238,17 @@ class Lock:
         raise BleakError(f"Missing characteristic {char_uuid}")
 
     def _parse_state(self, state: bytes) -> Iterable[LockStateValue] | None:
-        if state[0] == 0xBB:
-            if state[1] == Commands.LOCK_ACTIVITY.value:
-                return None  # Ignore lock activity as these are historical events
-            if state[1] == Commands.GETSTATUS.value:
-                if state[4] == StatusType.LOCK_ONLY.value:
-                    lock_status = state[0x08]
-                    return [VALUE_TO_LOCK_STATUS.get(lock_status, LockStatus.UNKNOWN)]
-                if state[4] == StatusType.DOOR_ONLY.value:
-                    door_status = state[0x08]
-                    return [VALUE_TO_DOOR_STATUS.get(door_status, DoorStatus.UNKNOWN)]
-                if state[4] == StatusType.DOOR_AND_LOCK.value:
-                    return self._parse_lock_and_door_state(state)
-                if state[4] == StatusType.BATTERY.value:
-                    return [self._parse_battery_state(state)]
-            elif (
-                state[1] == Commands.WRITESETTING.value
-                or state[1] == Commands.READSETTING.value
-            ):
-                if state[4] == SettingType.AUTOLOCK.value:
-                    return [self._parse_auto_lock_state(state)]
-        elif state[0] == 0xAA:
-            if state[1] == Commands.UNLOCK.value:
-                return [LockStatus.UNLOCKED]
-            if state[1] == Commands.LOCK.value:
-                return [LockStatus.LOCKED]
-        return None
+        if (decoder := self._frame_decoders.get(state)) is None:
+            return None
+        return decoder(self, state)
 
     def _internal_state_callback(self, state: bytes) -> None:
         """Handle state change."""
-        _LOGGER.debug("%s: State changed: %s", self.name, state.hex())
-        if (parsed_state := self._parse_state(state)) is not None:
-            self._state_callback(parsed_state)
-        else:
+        _LOGGER.debug("%s: State changed", self.name)
+        if (decoder := self._frame_decoders.get(state)) is None:
             _LOGGER.info("%s: Unknown state: %s", self.name, state.hex())
+        elif (parsed_state := decoder(self, state)) is not None:
+            self._state_callback(parsed_state)
 
     async def _setup_session(self) -> None:
         """Setup the session."""
@@ -255,12 +259,11 @@ class Lock:
         handshake_keys = os.urandom(16)
 
         # Send SEC_LOCK_TO_MOBILE_KEY_EXCHANGE
-        cmd = self.secure_session.build_command(0x01)
-        util._copy(cmd, handshake_keys[0x00:0x08], destLocation=0x04)
+        cmd = codec.encode_key_exchange(self.secure_session.key_index, handshake_keys)
         response = await self.secure_session.execute(
             cmd, "SEC_LOCK_TO_MOBILE_KEY_EXCHANGE"
         )
-        if response[0x00] != 0x02:
+        if response[0x00] != codec.SECURE_KEY_EXCHANGE_RESPONSE:
             raise AuthError(
                 "Authentication error: key or slot (key index) is incorrect: "
                 "unexpected response to SEC_LOCK_TO_MOBILE_KEY_EXCHANGE: "
@@ -269,16 +272,13 @@ class Lock:
 
         self.is_secure = True
 
-        session_key = bytearray(16)
-        util._copy(session_key, handshake_keys[0x00:0x08])
-        util._copy(session_key, response[0x04:0x0C], destLocation=0x08)
+        session_key = codec.derive_session_key(handshake_keys, response)
         self.secure_session.set_key(session_key)
 
         # Send SEC_INITIALIZATION_COMMAND
-        cmd = self.secure_session.build_command(0x03)
-        util._copy(cmd, handshake_keys[0x08:0x10], destLocation=0x04)
+        cmd = codec.encode_initialization(self.secure_session.key_index, handshake_keys)
         response = await self.secure_session.execute(cmd, "SEC_INITIALIZATION_COMMAND")
-        if response[0] != 0x04:
+        if response[0] != codec.SECURE_INITIALIZATION_RESPONSE:
             raise AuthError(
                 "Authentication error: key or slot (key index) is incorrect: "
                 "unexpected response to SEC_INITIALIZATION_COMMAND: " + response.hex()
@@ -288,25 +288,66 @@ class Lock:
         self.session.enable_cooldown()
 
     @raise_if_not_connected
-    async def lock_info(self) -> LockInfo:
-        """Probe the lock for information."""
+    async def lock_info(self, cached: LockInfo | None = None) -> LockInfo:
+        """
+        Probe the lock for information.
+
+        If cached info is passed only the firmware revision is read
+        and the cached info is reused when the firmware is unchanged.
+        """
         _LOGGER.debug("%s: Probing the lock", self.name)
+        if cached is not None:
+            (firmware,) = await self._read_info_characteristics(
+                (FIRMWARE_REVISION_CHARACTERISTIC,)
+            )
+            if firmware == cached.firmware:
+                self._lock_info = cached
+                return cached
+            _LOGGER.debug(
+                "%s: Firmware changed from %s to %s",
+                self.name,
+                cached.firmware,
+                firmware,
+            )
+        self._lock_info = LockInfo(
+            *await self._read_info_characteristics(LOCK_INFO_CHARACTERISTICS)
+        )
+        return self._lock_info
+
+    async def _read_info_characteristics(self, char_uuids: Sequence[str]) -> list[str]:
+        """Read device information characteristics, concurrently if possible."""
         assert self.client is not None  # nosec
-        lock_info = []
-        for char_uuid in (
-            MANUFACTURER_NAME_CHARACTERISTIC,
-            MODEL_NUMBER_CHARACTERISTIC,
-            SERIAL_NUMBER_CHARACTERISTIC,
-            FIRMWARE_REVISION_CHARACTERISTIC,
-        ):
-            char = self.client.services.get_characteristic(char_uuid)
+        client = self.client
+        chars: list[BleakGATTCharacteristic] = []
+        for char_uuid in char_uuids:
+            char = client.services.get_characteristic(char_uuid)
             if not char:
                 await self._handle_missing_characteristic(char_uuid)
-            lock_info.append(
-                (await self.client.read_gatt_char(char)).decode().split("\0")[0]
+            chars.append(char)
+        if self._concurrent_gatt_reads and len(chars) > 1:
+            results = await asyncio.gather(
+                *(client.read_gatt_char(char) for char in chars),
+                return_exceptions=True,
             )
-        self._lock_info = LockInfo(*lock_info)
-        return self._lock_info
+            values: list[bytes | bytearray] = []
+            for result in results:
+                if isinstance(result, BaseException):
+                    if not isinstance(result, BleakError) or not self.is_connected:
+                        raise result
+                    _LOGGER.debug(
+                        "%s: Concurrent reads failed, falling back to sequential: %s",
+                        self.name,
+                        result,
+                    )
+                    self._concurrent_gatt_reads = False
+                    break
+                values.append(result)
+            else:
+                return [bytes(value).decode().split("\0")[0] for value in values]
+        return [
+            bytes(await client.read_gatt_char(char)).decode().split("\0")[0]
+            for char in chars
+        ]
 
     @raise_if_not_connected
     async def force_securemode(self) -> None:
@@ -314,7 +355,7 @@ class Lock:
         _LOGGER.debug("%s: Securing", self.name)
         assert self.session is not None  # nosec
         await self.session.execute(
-            self.session.build_operation_command(Commands.LOCK, 0x04),
+            self.session.build_cached_command(Commands.LOCK, 0x04),
             "force_securemode",
         )
         _LOGGER.debug("%s: Finished securemode", self.name)
@@ -325,7 +366,7 @@ class Lock:
         _LOGGER.debug("%s: Locking", self.name)
         assert self.session is not None  # nosec
         await self.session.execute(
-            self.session.build_command(Commands.LOCK), "force_lock"
+            self.session.build_cached_command(Commands.LOCK), "force_lock"
         )
         _LOGGER.debug("%s: Finished locking", self.name)
 
@@ -335,7 +376,7 @@ class Lock:
         _LOGGER.debug("%s: Unlocking", self.name)
         assert self.session is not None  # nosec
         await self.session.execute(
-            self.session.build_command(Commands.UNLOCK), "force_unlock"
+            self.session.build_cached_command(Commands.UNLOCK), "force_unlock"
         )
         _LOGGER.debug("%s: Finished unlocking", self.name)
 
@@ -346,16 +387,9 @@ class Lock:
             "%s: Setting auto lock to mode=%d, dur=%d", self.name, mode, duration
         )
         assert self.session is not None  # nosec
-        if mode == AutoLockMode.OFF:
-            mode = AutoLockMode.INSTANT
-            duration = 0
-
-        cmd = self.session.build_operation_command(
-            Commands.WRITESETTING, SettingType.AUTOLOCK
+        await self.session.execute(
+            codec.encode_set_auto_lock(mode, duration), "set_auto_lock"
         )
-        util._copy(cmd, util._int_to_bytes(duration, 2), destLocation=0x08)
-        cmd[0x0A] = mode
-        await self.session.execute(cmd, "set_auto_lock")
         _LOGGER.debug("%s: Finished setting auto lock", self.name)
 
     async def securemode(self) -> None:
@@ -374,25 +408,21 @@ class Lock:
         self, opcode: int, cmd_byte: int, command_name: str
     ) -> bytes:
         assert self.session is not None  # nosec
-        command = self.session.build_operation_command(opcode, cmd_byte)
-        _LOGGER.debug("%s: send: [%s] [%s]", self.name, command.hex(), hex(cmd_byte))
+        command = self.session.build_cached_command(opcode, cmd_byte)
+        _LOGGER.debug("%s: send: [%s] [0x%02X]", self.name, command_name, cmd_byte)
         response = await self.session.execute(command, command_name)
-        _LOGGER.debug(
-            "%s: response: [%s] [%s]", self.name, response.hex(), hex(cmd_byte)
-        )
+        _LOGGER.debug("%s: response: [%s] [0x%02X]", self.name, command_name, cmd_byte)
         return response
 
     def _parse_lock_and_door_state(
         self, response: bytes
     ) -> tuple[LockStatus, DoorStatus]:
         """Parse the lock and door state from the response."""
-        return self._parse_lock_status(response[0x08]), self._parse_door_status(
-            response[0x09]
-        )
+        return codec.decode_lock_and_door(response)
 
     def _parse_lock_status(self, lock_status: int) -> LockStatus:
         """Parse the lock state from the response."""
-        lock_status_enum = VALUE_TO_LOCK_STATUS.get(lock_status, LockStatus.UNKNOWN)
+        lock_status_enum = codec.decode_lock_status(lock_status)
         if lock_status_enum == LockStatus.UNKNOWN:
             _LOGGER.info(
                 "%s: Unrecognized lock_status_str code: %s", self.name, hex(lock_status)
@@ -401,7 +431,7 @@ class Lock:
 
     def _parse_door_status(self, door_status: int) -> DoorStatus:
         """Parse the door state from the response."""
-        door_status_enum = VALUE_TO_DOOR_STATUS.get(door_status, DoorStatus.UNKNOWN)
+        door_status_enum = codec.decode_door_status(door_status)
         if door_status_enum == DoorStatus.UNKNOWN:
             _LOGGER.info(
                 "%s: Unrecognized door_status_str code: %s", self.name, hex(door_status)
@@ -410,16 +440,13 @@ class Lock:
 
     def _parse_auto_lock_state(self, response: bytes) -> AutoLockState:
         """Parse the auto lock state from the response."""
-        duration = util._bytes_to_int(response[0x08:0x0A])
-        mode = VALUE_TO_AUTO_LOCK_MODE.get(response[0x0A], AutoLockMode.OFF)
-        if mode == AutoLockMode.OFF:
+        if response[0x0A] not in VALUE_TO_AUTO_LOCK_MODE:
             _LOGGER.info(
-                "%s: Unrecognized auto lock mode code: %s", self.name, hex(mode)
+                "%s: Unrecognized auto lock mode code: %s",
+                self.name,
+                hex(response[0x0A]),
             )
-        if mode == 0 and duration == 0:
-            # If both values are 0, auto lock is disabled
-            mode = AutoLockMode.OFF
-        return AutoLockState(mode, duration)
+        return codec.decode_auto_lock(response)
 
     @raise_if_not_connected
     async def lock_status(self) -> LockStatus:
@@ -443,14 +470,7 @@ class Lock:
 
     def _parse_battery_state(self, response: bytes) -> BatteryState:
         """Parse the battery state from the response."""
-        voltage = util._bytes_to_int(response[0x08:0x0A]) / 1000
-        # The voltage is divided by 4 in the lock
-        # since it uses 4 AA batteries. For the Li-ion
-        # battery, this is likely wrong, but since we don't
-        # currently have a way to detect the battery type,
-        # this is the best we can do for now.
-        percentage = convert_voltage_to_percentage(voltage / 4)
-        return BatteryState(voltage, percentage)
+        return codec.decode_battery(response)
 
     @raise_if_not_connected
     async def battery(self) -> BatteryState:
@@ -470,60 +490,69 @@ class Lock:
         _LOGGER.debug("%s: Finished executing auto_lock_status", self.name)
         return self._parse_auto_lock_state(response)
 
-    def _parse_unix_timestamp(self, timestamp_bytes: bytes) -> datetime:
-        """Parse the unix timestamp to datetime from the bytes."""
+    @raise_if_not_connected
+    async def query_status(
+        self,
+        fields: Iterable[StatusField] = STATUS_FIELD_ORDER,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> StatusQueryResult:
+        """
+        Query several status fields under a single acquisition of the lock.
+
+        If should_stop returns True between queries the fields that were
+        not queried are returned in remaining.
+        """
+        assert self.session is not None  # nosec
+        wanted = set(fields)
+        ordered = [field for field in STATUS_FIELD_ORDER if field in wanted]
+        _LOGGER.debug("%s: Executing query_status: %s", self.name, ordered)
+        commands: list[tuple[bytearray, str]] = []
+        for field in ordered:
+            opcode, cmd_byte, command_name = STATUS_FIELD_COMMANDS[field]
+            commands.append(
+                (self.session.build_cached_command(opcode, cmd_byte), command_name)
+            )
+        start = time.monotonic()
+        responses = await self.session.execute_many(commands, should_stop)
+        result = StatusQueryResult(remaining=tuple(ordered[len(responses) :]))
+        for field, response in zip(ordered, responses, strict=False):
+            if field is StatusField.BATTERY:
+                result.battery = self._parse_battery_state(response)
+            elif field is StatusField.DOOR:
+                result.door = self._parse_door_status(response[0x08])
+            elif field is StatusField.AUTO_LOCK:
+                result.auto_lock = self._parse_auto_lock_state(response)
+            else:
+                result.lock = self._parse_lock_status(response[0x08])
         _LOGGER.debug(
-            "%s: Parsing unix timestamp: %s", self.name, timestamp_bytes.hex()
+            "%s: Finished executing query_status in %.3fs",
+            self.name,
+            time.monotonic() - start,
         )
-        unix_timestamp = int.from_bytes(timestamp_bytes, byteorder="little")
-        _LOGGER.debug("%s: Parsed unix timestamp: %d", self.name, unix_timestamp)
-        return datetime.fromtimestamp(unix_timestamp)
+        return result
 
     def _parse_lock_activity(
         self, response: bytes
     ) -> DoorActivity | LockActivity | None:
         """Parse the lock activity from the response."""
-        # We only know a subset of lock activities currently
-        # response[0x04] seems to be the activity type
-        # the rest of the response is data for the activity,
-        # format seems to be specific to each individual activity type
         activity_type = response[0x04]
         _LOGGER.debug("%s: Activity type: 0x%02X", self.name, activity_type)
         if activity_type == LockActivityType.NONE.value:
             _LOGGER.debug("%s: No activity", self.name)
             return None
-
-        if activity_type == LockActivityType.DOOR.value:
-            # Timestamp is at 0x05-0x08
-            # Door status is at 0x09
-            timestamp = self._parse_unix_timestamp(response[0x05:0x09])
-            door_status = self._parse_door_status(response[0x09])
-            return DoorActivity(timestamp, door_status)
-        if activity_type == LockActivityType.LOCK.value:
-            # Timestamp is at 0x08-0x0B
-            # Lock status is at 0x06
-            timestamp = self._parse_unix_timestamp(response[0x08:0x0C])
-            lock_status = self._parse_lock_status(response[0x06])
-
-            return LockActivity(timestamp, lock_status)
-        if activity_type == LockActivityType.PIN.value:
-            # Timestamp is at 0x05-0x08
-            # Slot is at 0x0A
-            # Lock status seems to be at lower half of 0x0C
-            timestamp = self._parse_unix_timestamp(response[0x05:0x09])
-            pin_slot = response[0x0A]
-            lock_status = self._parse_lock_status(response[0x0C] & 0x0F)
-
-            return LockActivity(timestamp, lock_status, pin_slot)
-        _LOGGER.warning("%s: Unknown activity type: 0x%02X", self.name, activity_type)
-        return None
+        if (activity := codec.decode_lock_activity(response)) is None:
+            _LOGGER.warning(
+                "%s: Unknown activity type: 0x%02X", self.name, activity_type
+            )
+        return activity
 
     @raise_if_not_connected
     async def lock_activity(self) -> DoorActivity | LockActivity | None:
         _LOGGER.debug("%s: Executing lock_activity", self.name)
         assert self.session is not None  # nosec
         response = await self.session.execute(
-            self.session.build_command(Commands.LOCK_ACTIVITY.value), "lock_activity"
+            self.session.build_cached_command(Commands.LOCK_ACTIVITY.value),
+            "lock_activity",
         )
         _LOGGER.debug("%s: Finished executing lock_activity", self.name)
         return self._parse_lock_activity(response)
@@ -555,8 +584,7 @@ class Lock:
             await self.session.stop_notify()
         if not self.is_secure or not self.secure_session or self._disconnected:
             return
-        cmd = self.secure_session.build_command(0x05)
-        cmd[0x11] = 0x00
+        cmd = self.secure_session.build_disconnect_command()
         response = None
         try:
             response = await self.secure_session.execute(cmd, "shutdown")
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from .const import APPLE_MFR_ID, YALE_MFR_ID
+from .push import PushLock
+from .util import local_name_is_unique
+
+
+class LockManager:
+    """Route advertisements to the PushLock that owns them."""
+
+    def __init__(self) -> None:
+        """Init the manager."""
+        self._by_local_name: dict[str, PushLock] = {}
+        self._by_address: dict[str, PushLock] = {}
+        # Locks registered by name before their address was known
+        self._unaddressed: dict[PushLock, None] = {}
+
+    def register(self, push_lock: PushLock) -> Callable[[], None]:
+        """Register a lock and return a function to unregister it."""
+        local_name = push_lock.local_name
+        address = push_lock._address
+        keys: list[tuple[dict[str, PushLock], str]] = []
+        if local_name and local_name_is_unique(local_name):
+            keys.append((self._by_local_name, local_name))
+        if address:
+            keys.append((self._by_address, address))
+        for index, key in keys:
+            if key in index:
+                raise ValueError(f"A lock is already registered for {key}")
+        for index, key in keys:
+            index[key] = push_lock
+        if not address:
+            self._unaddressed[push_lock] = None
+
+        def unregister() -> None:
+            self._unaddressed.pop(push_lock, None)
+            for index in (self._by_local_name, self._by_address):
+                for key in [key for key, owner in index.items() if owner is push_lock]:
+                    del index[key]
+
+        return unregister
+
+    def get(self, local_name: str | None, address: str) -> PushLock | None:
+        """Get the lock that owns an advertisement."""
+        if local_name and (push_lock := self._by_local_name.get(local_name)):
+            return push_lock
+        if (push_lock := self._by_address.get(address)) is None and self._unaddressed:
+            push_lock = self._index_learned_address(address)
+        return push_lock
+
+    def _index_learned_address(self, address: str) -> PushLock | None:
+        """Index a lock registered by name once it has learned its address."""
+        for push_lock in self._unaddressed:
+            if push_lock._address == address:
+                del self._unaddressed[push_lock]
+                self._by_address[address] = push_lock
+                return push_lock
+        return None
+
+    def update_advertisement(
+        self, ble_device: BLEDevice, ad: AdvertisementData
+    ) -> None:
+        """Deliver an advertisement to the lock that owns it."""
+        mfr_data = ad.manufacturer_data
+        if APPLE_MFR_ID not in mfr_data and YALE_MFR_ID not in mfr_data:
+            return
+        if push_lock := self.get(ad.local_name, ble_device.address):
+            push_lock._process_advertisement(ble_device, ad)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+
+# Upper bounds of the latency buckets in seconds, the last
+# bucket collects everything slower than the final bound.
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    """A point in time copy of a latency histogram."""
+
+    buckets: tuple[float, ...]
+    counts: tuple[int, ...]
+    count: int
+    total: float
+    maximum: float
+
+    @property
+    def mean(self) -> float:
+        """Return the mean latency."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, quantile: float) -> float:
+        """Return the upper bound of the bucket holding the quantile."""
+        if not self.count:
+            return 0.0
+        target = quantile * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return self.buckets[idx] if idx < len(self.buckets) else self.maximum
+        return self.maximum
+
+
+class LatencyHistogram:
+    """A fixed-bucket latency histogram."""
+
+    __slots__ = ("count", "counts", "maximum", "total")
+
+    def __init__(self) -> None:
+        """Init the histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Add a sample."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Return a snapshot of the histogram."""
+        return HistogramSnapshot(
+            LATENCY_BUCKETS, tuple(self.counts), self.count, self.total, self.maximum
+        )
+
+
+@dataclass(frozen=True)
+class CommandStatsSnapshot:
+    """A point in time copy of the stats for a command."""
+
+    cooldown: HistogramSnapshot
+    lock_wait: HistogramSnapshot
+    write: HistogramSnapshot
+    notify: HistogramSnapshot
+    retries: int
+
+
+class CommandStats:
+    """Where the time goes for a single command."""
+
+    __slots__ = ("cooldown", "lock_wait", "notify", "retries", "write")
+
+    def __init__(self) -> None:
+        """Init the stats."""
+        self.cooldown = LatencyHistogram()
+        self.lock_wait = LatencyHistogram()
+        self.write = LatencyHistogram()
+        self.notify = LatencyHistogram()
+        self.retries = 0
+
+    def snapshot(self) -> CommandStatsSnapshot:
+        """Return a snapshot of the stats."""
+        return CommandStatsSnapshot(
+            self.cooldown.snapshot(),
+            self.lock_wait.snapshot(),
+            self.write.snapshot(),
+            self.notify.snapshot(),
+            self.retries,
+        )
+
+
+class CommandMetrics:
+    """Latency histograms per command name."""
+
+    def __init__(self) -> None:
+        """Init the metrics."""
+        self._commands: dict[str, CommandStats] = {}
+
+    def command(self, command_name: str) -> CommandStats:
+        """Get the stats for a command, creating them if needed."""
+        if (stats := self._commands.get(command_name)) is None:
+            stats = self._commands[command_name] = CommandStats()
+        return stats
+
+    def snapshot(self) -> dict[str, CommandStatsSnapshot]:
+        """Return a snapshot of the stats for every command."""
+        return {name: stats.snapshot() for name, stats in self._commands.items()}
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class PassiveMonitor:
+    """
+    Rate limit connections of a lock monitored from advertisements only.
+
+    When verify_interval is None advertised changes never cause a
+    connection, otherwise at most one update is made per interval.
+    """
+
+    verify_interval: float | None = None
+    last_verify: float | None = None
+    # Number of advertised changes seen
+    changes: int = 0
+
+    def should_verify(self, now: float) -> bool:
+        """Return True if an advertised change may be verified by connecting."""
+        if self.verify_interval is None or (
+            self.last_verify is not None
+            and now - self.last_verify < self.verify_interval
+        ):
+            return False
+        self.last_verify = now
+        return True
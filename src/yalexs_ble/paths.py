@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from bleak.backends.device import BLEDevice
+
+from .util import ble_device_source
+
+# Paths that have not been heard from in this long are not used
+PATH_STALE_SECONDS = 60.0
+
+# How many dB of RSSI one active connection on an adapter is worth
+ACTIVE_CONNECTION_RSSI_PENALTY = 10
+
+# A path that failed to connect is tried last for this long
+FAILED_PATH_BACKOFF_SECONDS = 30.0
+
+NEVER_TIME = -86400.0
+
+
+@dataclass(slots=True)
+class ConnectionPath:
+    """A recent way to reach a lock through an adapter or proxy."""
+
+    source: str
+    ble_device: BLEDevice
+    rssi: int
+    last_seen: float
+    last_failure: float = NEVER_TIME
+
+
+class PathTable:
+    """Track the adapters and proxies that can currently hear a lock."""
+
+    def __init__(self) -> None:
+        """Init the table."""
+        self._paths: dict[str, ConnectionPath] = {}
+
+    def __len__(self) -> int:
+        """Return the number of known paths."""
+        return len(self._paths)
+
+    def update(self, ble_device: BLEDevice, rssi: int) -> None:
+        """Record that a device was heard with an RSSI."""
+        source = ble_device_source(ble_device)
+        if (path := self._paths.get(source)) is None:
+            self._paths[source] = ConnectionPath(
+                source, ble_device, rssi, time.monotonic()
+            )
+            return
+        path.ble_device = ble_device
+        path.rssi = rssi
+        path.last_seen = time.monotonic()
+
+    def failed(self, ble_device: BLEDevice) -> None:
+        """Record that connecting through a device failed."""
+        if path := self._paths.get(ble_device_source(ble_device)):
+            path.last_failure = time.monotonic()
+
+    def ordered(self, active: Callable[[str], int]) -> list[BLEDevice]:
+        """Return the devices to try, best first.
+
+        active returns the number of connections in use on an adapter.
+        """
+        now = time.monotonic()
+        stale = [
+            source
+            for source, path in self._paths.items()
+            if now - path.last_seen > PATH_STALE_SECONDS
+        ]
+        for source in stale:
+            del self._paths[source]
+        paths = sorted(
+            self._paths.values(),
+            key=lambda path: (
+                now - path.last_failure < FAILED_PATH_BACKOFF_SECONDS,
+                ACTIVE_CONNECTION_RSSI_PENALTY * active(path.source) - path.rssi,
+            ),
+        )
+        return [path.ble_device for path in paths]
@@ -5,14 +5,14 @@ import contextlib
 import logging
 import struct
 import time
-from collections.abc import Callable, Coroutine, Iterable
-from dataclasses import replace
+from collections.abc import Callable, Coroutine, Iterable, Iterator, Mapping
 from typing import Any, TypeVar, cast
 
 from bleak.backends.scanner import AdvertisementData
 from bleak.exc import BleakDBusError, BleakError
 from bleak_retry_connector import (
     BLEAK_RETRY_EXCEPTIONS,
+    BLEAK_TIMEOUT,
     MAX_CONNECT_ATTEMPTS,
     BleakNotFoundError,
     BLEDevice,
@@ -22,8 +22,11 @@ from lru import LRU  # pylint: disable=no-name-in-module
 
 from .const import (
     APPLE_MFR_ID,
+    AUTH_FAILED,
+    AUTH_SUCCESSFUL,
     HAP_ENCRYPTED_FIRST_BYTE,
     HAP_FIRST_BYTE,
+    STATE_FIELD_BY_NAME,
     YALE_MFR_ID,
     AuthState,
     AutoLockMode,
@@ -31,12 +34,33 @@ from .const import (
     BatteryState,
     ConnectionInfo,
     DoorStatus,
+    FieldChange,
     LockInfo,
     LockState,
     LockStateValue,
     LockStatus,
+    StateField,
+    StatusField,
 )
+from .events import (
+    DEFAULT_EVENT_QUEUE_SIZE,
+    OverflowPolicy,
+    StateEvent,
+    StateEventStream,
+)
+from .freshness import FreshnessPlanner
+from .homekit import HomeKitBroadcastDecryptor, HomeKitCharacteristic
+from .idle import IdleDisconnectPolicy
 from .lock import Lock
+from .metrics import CommandMetrics
+from .passive import PassiveMonitor
+from .paths import PathTable
+from .scheduler import (
+    CONNECTION_SCHEDULER,
+    ConnectionPriority,
+    ConnectionScheduler,
+    ConnectionSlot,
+)
 from .session import (
     AuthError,
     BluetoothError,
@@ -45,13 +69,28 @@ from .session import (
     ResponseError,
     YaleXSBLEError,
 )
-from .util import asyncio_timeout, is_disconnected_error, local_name_is_unique
+from .snapshot import PushLockSnapshot
+from .store import LOCK_INFO_STORE, LockInfoStore
+from .timer import TIMER_WHEEL, TimerWheel, WheelTimer
+from .trace import FrameTrace
+from .util import (
+    asyncio_timeout,
+    ble_device_source,
+    is_disconnected_error,
+    local_name_is_unique,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 # Advertisement debugger (this one is quite noisy so it has its only logger)
 _ADV_LOGGER = logging.getLogger("yalexs_ble_adv")
 
+# Never equal to manufacturer data so the first advertisement is always decoded
+_NO_DATA = object()
+
+# Global state number in the HomeKit advertisement
+_HOMEKIT_GSN = struct.Struct("<H")
+
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
 NEVER_TIME = -86400.0
@@ -88,6 +127,10 @@ HK_UPDATE_COALESCE_SECONDS = 0.025
 # How long to wait before processing a manual update request
 MANUAL_UPDATE_COALESCE_SECONDS = 0.05
 
+# How long to wait before finishing an update preempted by a lock operation,
+# the stale state debounce pushes it past the operation.
+PREEMPTED_UPDATE_DELAY = 0.05
+
 # How long to wait to query the lock after an operation to make sure its not jammed
 POST_OPERATION_SYNC_TIME = 10.00
 
@@ -112,6 +155,11 @@ NO_BATTERY_SUPPORT_MODELS = {
 
 AUTO_LOCK_DEFAULT_DURATION = 90
 
+# What the state properties report before anything is known
+_UNKNOWN_LOCK_STATE = LockState(
+    LockStatus.UNKNOWN, DoorStatus.UNKNOWN, None, None, None, None
+)
+
 
 def operation_lock(func: WrapFuncType) -> WrapFuncType:
     """Define a wrapper to only allow a single operation at a time."""
@@ -168,13 +216,14 @@ def retry_bluetooth_connection_error(func: WrapFuncType) -> WrapFuncType:
             try:
                 return await func(self, *args, **kwargs)
             except AuthError:
+                self._debug_frame_trace("auth error")
                 _AUTH_FAILURE_HISTORY.auth_failed(self.address)
                 if _AUTH_FAILURE_HISTORY.should_raise(self.address):
                     # If the bluetooth connection drops in the middle of authentication
                     # we may see it as a failed authentication. If we see 5 failed
                     # authentications in a row we can reasonably assume that the key has
                     # changed and we should re-authenticate.
-                    self._update_any_state([AuthState(successful=False)])
+                    self._update_any_state([AUTH_FAILED])
                     raise
                 _LOGGER.debug(
                     "%s: Auth error calling %s, retrying (%s/%s)...",
@@ -190,6 +239,7 @@ def retry_bluetooth_connection_error(func: WrapFuncType) -> WrapFuncType:
                 # point in retrying.
                 raise
             except RETRY_BACKOFF_EXCEPTIONS as err:
+                self._debug_frame_trace(type(err).__name__)
                 await self._async_handle_disconnected(err)
                 if attempt >= max_attempts:
                     _LOGGER.debug(
@@ -247,7 +297,7 @@ def retry_bluetooth_connection_error(func: WrapFuncType) -> WrapFuncType:
 class PushLock:
     """A lock with push updates."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0915
         self,
         local_name: str | None = None,
         address: str | None = None,
@@ -258,10 +308,26 @@ class PushLock:
         idle_disconnect_delay: float = DISCONNECT_DELAY,
         always_connected: bool = False,
         idle_disconnect_delay_pending_update: float = DISCONNECT_DELAY_PENDING_UPDATE,
+        *,
+        lock_info_store: LockInfoStore = LOCK_INFO_STORE,
+        connection_scheduler: ConnectionScheduler = CONNECTION_SCHEDULER,
+        timer_wheel: TimerWheel = TIMER_WHEEL,
+        field_ttls: Mapping[StatusField, float | None] | None = None,
+        passive: bool = False,
+        passive_verify_interval: float | None = None,
+        max_in_flight: int = 1,
     ) -> None:
-        """Init the lock watcher."""
+        """
+        Init the lock watcher.
+
+        In passive mode advertised changes only mark the state as
+        unverified and the lock is connected to for operations, explicit
+        updates and at most once per passive_verify_interval if set.
+        """
         if local_name is None and address is None:
             raise ValueError("Must specify either local_name or address")
+        if passive and always_connected:
+            raise ValueError("A passive lock can not be always connected")
         if not address and not local_name_is_unique(local_name):
             raise ValueError("local_name must be unique when address is not provided")
 
@@ -270,38 +336,65 @@ class PushLock:
         self._address = address
         self._name: str | None = None
         self._lock_info: LockInfo | None = None
+        self._lock_info_store = lock_info_store
+        # Set when a snapshot is restored that can be served without connecting
+        self._restored = False
         self._lock_state: LockState | None = None
         self._last_adv_value = -1
         self._last_hk_state = -1
+        self._hk_decryptor: HomeKitBroadcastDecryptor | None = None
+        # Manufacturer data of the last processed advertisement
+        # so unchanged advertisements can skip decoding
+        self._last_apple_data: bytes | object | None = _NO_DATA
+        self._last_yale_data: bytes | object | None = _NO_DATA
         self._lock_key = key
         self._lock_key_index = key_index
         self._advertisement_data = advertisement_data
+        self._connection_info: ConnectionInfo | None = None
         self._ble_device = ble_device
         self._operation_lock = asyncio.Lock()
         self._running = False
         self._callbacks: list[
             Callable[[LockState, LockInfo, ConnectionInfo], None]
         ] = []
+        self._field_callbacks: list[
+            tuple[
+                frozenset[StateField],
+                Callable[[dict[StateField, FieldChange]], None],
+            ]
+        ] = []
+        self._event_streams: list[StateEventStream] = []
         self._update_task: asyncio.Task[None] | None = None
         self.loop = asyncio._get_running_loop()
-        self._cancel_deferred_update: asyncio.TimerHandle | None = None
+        self._timer_wheel = timer_wheel
+        self._cancel_deferred_update: WheelTimer | None = None
         self._client: Lock | None = None
         self._connect_lock = asyncio.Lock()
-        self._seen_this_session: set[
-            type[LockStatus | DoorStatus | BatteryState | AuthState | AutoLockState]
-        ] = set()
-        self._disconnect_timer: asyncio.TimerHandle | None = None
-        self._keep_alive_timer: asyncio.TimerHandle | None = None
+        self._connection_scheduler = connection_scheduler
+        self._connection_slot: ConnectionSlot | None = None
+        self._paths = PathTable()
+        self._next_update_priority = ConnectionPriority.UPDATE
+        self._freshness = FreshnessPlanner(field_ttls)
+        self._disconnect_timer: WheelTimer | None = None
+        self._keep_alive_timer: WheelTimer | None = None
         self._idle_disconnect_delay_pending_update = (
             idle_disconnect_delay_pending_update
         )
-        self._idle_disconnect_delay = idle_disconnect_delay
+        self._idle_policy = IdleDisconnectPolicy(idle_disconnect_delay)
         self._next_disconnect_delay = idle_disconnect_delay
         self._first_update_future: asyncio.Future[None] | None = None
+        # Connect only once while a caller waits for the first update
+        self._awaiting_first_update = False
         self._background_tasks: set[asyncio.Task[None]] = set()
         self._last_lock_operation_complete_time = NEVER_TIME
         self._last_operation_complete_time = NEVER_TIME
+        self._pending_user_operations = 0
+        self._preempted_update = False
         self._always_connected = always_connected
+        self._max_in_flight = max_in_flight
+        self._passive = PassiveMonitor(passive_verify_interval) if passive else None
+        self._frame_trace = FrameTrace()
+        self._metrics = CommandMetrics()
 
     @property
     def local_name(self) -> str | None:
@@ -317,6 +410,13 @@ class PushLock:
             return self._local_name
         return self.address
 
+    @property
+    def unique_id(self) -> str:
+        """Return the local name if it is unique, otherwise the address."""
+        if self._local_name_is_unique and self._local_name:
+            return self._local_name
+        return self.address
+
     @property
     def address(self) -> str:
         """Get the address of the lock."""
@@ -368,15 +468,50 @@ class PushLock:
     @property
     def connection_info(self) -> ConnectionInfo | None:
         """Return the current connection info."""
-        if self._advertisement_data:
-            return ConnectionInfo(self._advertisement_data.rssi)
-        return None
+        if not self._advertisement_data:
+            return None
+        rssi = self._advertisement_data.rssi
+        if (connection_info := self._connection_info) is None or (
+            connection_info.rssi != rssi
+        ):
+            connection_info = self._connection_info = ConnectionInfo(rssi)
+        return connection_info
+
+    @property
+    def idle_disconnect_policy(self) -> IdleDisconnectPolicy:
+        """Return the policy that picks the idle disconnect delay."""
+        return self._idle_policy
+
+    @property
+    def passive(self) -> bool:
+        """Return True if the lock is monitored from advertisements only."""
+        return self._passive is not None
 
     @property
     def ble_device(self) -> BLEDevice | None:
         """Return the current BLEDevice."""
         return self._ble_device
 
+    @property
+    def frame_trace(self) -> FrameTrace:
+        """Return the trace of the most recent frames."""
+        return self._frame_trace
+
+    @property
+    def command_metrics(self) -> CommandMetrics:
+        """Return the latency histograms per command."""
+        return self._metrics
+
+    def _debug_frame_trace(self, reason: str) -> None:
+        """Log the frame trace if debug logging is enabled."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "%s: Frame trace after %s:\n%s",
+                self.name,
+                reason,
+                self._frame_trace.format(),
+            )
+
     @property
     def is_connected(self) -> bool:
         """Return if the lock is connected."""
@@ -386,10 +521,33 @@ class PushLock:
         """Set the name of the lock."""
         self._name = name
 
+    def snapshot(self) -> PushLockSnapshot:
+        """Return a snapshot of the state that can be persisted."""
+        return PushLockSnapshot(
+            self._lock_state,
+            self._lock_info,
+            self._last_hk_state,
+            self._last_adv_value,
+        )
+
+    def restore(self, snapshot: PushLockSnapshot) -> None:
+        """Restore a snapshot before the lock is started."""
+        if self._running:
+            raise RuntimeError("Cannot restore a running lock")
+        self._lock_state = snapshot.lock_state
+        self._lock_info = snapshot.lock_info
+        self._last_hk_state = snapshot.last_hk_state
+        self._last_adv_value = snapshot.last_adv_value
+        self._last_apple_data = _NO_DATA
+        self._last_yale_data = _NO_DATA
+        self._restored = bool(snapshot.lock_state and snapshot.lock_info)
+
     def reset_advertisement_state(self) -> None:
         """Reset the advertisement state."""
         self._last_adv_value = -1
         self._last_hk_state = -1
+        self._last_apple_data = _NO_DATA
+        self._last_yale_data = _NO_DATA
 
     def register_callback(
         self, callback: Callable[[LockState, LockInfo, ConnectionInfo], None]
@@ -402,11 +560,48 @@ class PushLock:
         self._callbacks.append(callback)
         return unregister_callback
 
+    def register_field_callback(
+        self,
+        fields: Iterable[StateField],
+        callback: Callable[[dict[StateField, FieldChange]], None],
+    ) -> Callable[[], None]:
+        """Register a callback for changes to specific fields of the lock state."""
+        subscription = (frozenset(fields), callback)
+
+        def unregister_callback() -> None:
+            self._field_callbacks.remove(subscription)
+
+        self._field_callbacks.append(subscription)
+        return unregister_callback
+
+    def events(
+        self,
+        maxsize: int = DEFAULT_EVENT_QUEUE_SIZE,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> StateEventStream:
+        """
+        Return a bounded stream of state changes.
+
+        Events are queued from the notification path and consumed with
+        async for; close the stream or use it as a context manager to stop.
+        """
+        stream = StateEventStream(maxsize, policy, self._event_streams.remove)
+        self._event_streams.append(stream)
+        return stream
+
     def set_lock_key(self, key: str, slot: int) -> None:
         """Set the lock key."""
         self._lock_key = key
         self._lock_key_index = slot
 
+    def set_homekit_broadcast_key(
+        self,
+        key: bytes | str,
+        characteristics: Mapping[int, HomeKitCharacteristic],
+    ) -> None:
+        """Set the HomeKit broadcast key so encrypted broadcasts can be read."""
+        self._hk_decryptor = HomeKitBroadcastDecryptor(key, characteristics)
+
     def set_ble_device(self, ble_device: BLEDevice) -> None:
         """Set the ble device."""
         self._ble_device = ble_device
@@ -416,19 +611,23 @@ class PushLock:
         """Set the advertisement data."""
         self._advertisement_data = advertisement_data
 
-    def _get_lock_instance(self) -> Lock:
-        """Get the lock instance."""
-        assert self._ble_device is not None  # nosec
+    def _get_lock_instance(self, ble_device: BLEDevice) -> Lock:
+        """Get a lock instance that connects through ble_device."""
         assert self._lock_key is not None  # nosec
         assert self._lock_key_index is not None  # nosec
+        # Retries must stay on the adapter the connection slot is held for
+        # even when a newer advertisement arrives through another one.
         return Lock(
-            lambda: self._ble_device,
+            lambda: ble_device,
             self._lock_key,
             self._lock_key_index,
             self.name,
             self._state_callback,
             self._lock_info,
             self._disconnected_callback,
+            max_in_flight=self._max_in_flight,
+            frame_trace=self._frame_trace,
+            metrics=self._metrics,
         )
 
     def _disconnected_callback(self) -> None:
@@ -447,6 +646,7 @@ class PushLock:
         if not self._always_connected:
             return
         _LOGGER.debug("%s: Executing keep alive", self.name)
+        self._next_update_priority = ConnectionPriority.KEEP_ALIVE
         self._schedule_future_update(0)
         self._schedule_next_keep_alive(KEEP_ALIVE_TIME)
 
@@ -463,15 +663,19 @@ class PushLock:
 
     def _schedule_next_keep_alive(self, delay: float) -> None:
         """Schedule the next keep alive."""
-        self._cancel_keepalive_timer()
         if not self._always_connected or not self._running:
+            self._cancel_keepalive_timer()
             return
         _LOGGER.debug(
             "%s: Scheduling next keep alive in %s seconds",
             self.name,
             delay,
         )
-        self._keep_alive_timer = self.loop.call_later(
+        if (timer := self._keep_alive_timer) and not timer.cancelled():
+            # Every completed operation pushes the keep alive back
+            self._timer_wheel.reschedule(timer, delay)
+            return
+        self._keep_alive_timer = self._timer_wheel.call_later(
             delay,
             self._keep_alive,
         )
@@ -486,7 +690,7 @@ class PushLock:
         _LOGGER.debug(
             "%s: Resetting disconnect timer to %s seconds", self.name, timeout
         )
-        self._disconnect_timer = self.loop.call_later(
+        self._disconnect_timer = self._timer_wheel.call_later(
             timeout, self._disconnect_with_timer, timeout
         )
 
@@ -541,6 +745,7 @@ class PushLock:
             self.name,
             timeout,
         )
+        self._idle_policy.record_idle_disconnect(time.monotonic())
         await self._execute_disconnect()
 
     async def _async_handle_disconnected(self, exc: Exception) -> None:
@@ -564,13 +769,33 @@ class PushLock:
                 return
             client = self._client
             self._client = None
-            if client:
-                _LOGGER.debug("%s: Disconnecting", self.name)
-                await client.disconnect()
-                _LOGGER.debug("%s: Disconnect completed", self.name)
-
-    async def _ensure_connected(self) -> Lock:
+            try:
+                if client:
+                    _LOGGER.debug("%s: Disconnecting", self.name)
+                    await client.disconnect()
+                    _LOGGER.debug("%s: Disconnect completed", self.name)
+            finally:
+                self._release_connection_slot()
+
+    def _release_connection_slot(self) -> None:
+        """Give the connection slot back to the scheduler."""
+        if slot := self._connection_slot:
+            self._connection_slot = None
+            slot.release()
+
+    def _preempt_connection(self) -> bool:
+        """Drop an idle connection so a waiting user operation can connect."""
+        if self._operation_lock.locked() or self._connect_lock.locked():
+            return False
+        _LOGGER.debug("%s: Releasing idle connection for another lock", self.name)
+        self.background_task(self._execute_forced_disconnect("preempted"))
+        return True
+
+    async def _ensure_connected(
+        self, priority: ConnectionPriority = ConnectionPriority.UPDATE
+    ) -> Lock:
         """Ensure connection to device is established."""
+        self._idle_policy.record_activity(time.monotonic(), self.is_connected)
         if self._connect_lock.locked():
             self._reset_disconnect_timer()
             _LOGGER.debug(
@@ -587,49 +812,139 @@ class PushLock:
                 assert self._client is not None  # type: ignore[unreachable] # nosec
                 self._reset_disconnect_timer()
                 return self._client
-            self._client = self._get_lock_instance()
-            max_attempts = 1 if self._first_update_future else MAX_CONNECT_ATTEMPTS
-            try:
-                await self._client.connect(max_attempts)
-            except BaseException as ex:  # Might be cancelled
-                _LOGGER.debug(
-                    "%s: Failed to connect due to %s, forcing disconnect", self.name, ex
-                )
+            max_attempts = 1 if self._awaiting_first_update else MAX_CONNECT_ATTEMPTS
+            paths = self._connection_paths()
+            last_path = len(paths) - 1
+            for idx, ble_device in enumerate(paths):
                 try:
-                    await self._client.disconnect()
-                except Exception:
-                    _LOGGER.exception(
-                        "%s: Failed to disconnect after failed connect", self.name
+                    # Only the last path gets the full number of attempts
+                    await self._connect_via(
+                        ble_device, priority, max_attempts if idx == last_path else 1
                     )
-                raise
-            self._next_disconnect_delay = self._idle_disconnect_delay
+                except (TimeoutError, BleakError) as ex:
+                    if idx == last_path:
+                        raise
+                    self._paths.failed(ble_device)
+                    _LOGGER.debug(
+                        "%s: Failed to connect via %s: %s, trying next path",
+                        self.name,
+                        ble_device_source(ble_device),
+                        ex,
+                    )
+                else:
+                    break
+            assert self._client is not None  # nosec
+            self._next_disconnect_delay = self._idle_policy.delay(
+                self._slot_contended()
+            )
             self._reset_disconnect_timer()
-            self._seen_this_session.clear()
+            self._freshness.new_connection()
             return self._client
 
+    def _slot_contended(self) -> bool:
+        """Return True if other connections are waiting on our adapter."""
+        if (slot := self._connection_slot) is None:
+            return False
+        return self._connection_scheduler.waiting(slot.source) > 0
+
+    def _connection_paths(self) -> list[BLEDevice]:
+        """Return the devices to connect through, best first."""
+        if paths := self._paths.ordered(self._connection_scheduler.active):
+            return paths
+        assert self._ble_device is not None  # nosec
+        return [self._ble_device]
+
+    async def _connect_via(
+        self, ble_device: BLEDevice, priority: ConnectionPriority, max_attempts: int
+    ) -> None:
+        """Connect to the lock through a specific adapter."""
+        source = ble_device_source(ble_device)
+        if (slot := self._connection_slot) is not None and slot.source != source:
+            self._release_connection_slot()
+        if self._connection_slot is None:
+            # Do not hold up the operation lock longer than a connect would
+            async with asyncio_timeout(BLEAK_TIMEOUT):
+                self._connection_slot = await self._connection_scheduler.acquire(
+                    source,
+                    priority,
+                    self._preempt_connection,
+                    self._always_connected,
+                )
+        self.set_ble_device(ble_device)
+        self._client = self._get_lock_instance(ble_device)
+        start = time.monotonic()
+        try:
+            await self._client.connect(max_attempts)
+        except BaseException as ex:  # Might be cancelled
+            _LOGGER.debug(
+                "%s: Failed to connect due to %s, forcing disconnect", self.name, ex
+            )
+            try:
+                await self._client.disconnect()
+            except Exception:
+                _LOGGER.exception(
+                    "%s: Failed to disconnect after failed connect", self.name
+                )
+            finally:
+                self._release_connection_slot()
+            raise
+        self._idle_policy.record_connect(time.monotonic() - start)
+
+    @contextlib.contextmanager
+    def _user_operation(self) -> Iterator[None]:
+        """Mark a user operation as waiting so updates yield to it."""
+        self._pending_user_operations += 1
+        try:
+            yield
+        finally:
+            self._pending_user_operations -= 1
+            if not self._pending_user_operations and self._preempted_update:
+                self._preempted_update = False
+                self._schedule_future_update_with_debounce(PREEMPTED_UPDATE_DELAY)
+
+    def _has_pending_user_operation(self) -> bool:
+        """Return True if a user operation is waiting for the lock."""
+        return self._pending_user_operations > 0
+
+    def _requeue_preempted_update(self, remaining: Iterable[StatusField]) -> None:
+        """Schedule the queries an update gave up for a user operation."""
+        _LOGGER.debug(
+            "%s: Update preempted by a lock operation, requeueing %s",
+            self.name,
+            remaining,
+        )
+        if self._has_pending_user_operation():
+            # The operation cancels pending updates, so wait until it is done
+            self._preempted_update = True
+            return
+        self._schedule_future_update_with_debounce(PREEMPTED_UPDATE_DELAY)
+
     async def securemode(self) -> None:
         """Set the lock into securemode."""
         self._update_any_state([LockStatus.LOCKING])
         self._cancel_future_update()
-        await self._execute_lock_operation(
-            "force_securemode", LockStatus.LOCKING, LockStatus.SECUREMODE
-        )
+        with self._user_operation():
+            await self._execute_lock_operation(
+                "force_securemode", LockStatus.LOCKING, LockStatus.SECUREMODE
+            )
 
     async def lock(self) -> None:
         """Lock the lock."""
         self._update_any_state([LockStatus.LOCKING])
         self._cancel_future_update()
-        await self._execute_lock_operation(
-            "force_lock", LockStatus.LOCKING, LockStatus.LOCKED
-        )
+        with self._user_operation():
+            await self._execute_lock_operation(
+                "force_lock", LockStatus.LOCKING, LockStatus.LOCKED
+            )
 
     async def unlock(self) -> None:
         """Unlock the lock."""
         self._update_any_state([LockStatus.UNLOCKING])
         self._cancel_future_update()
-        await self._execute_lock_operation(
-            "force_unlock", LockStatus.UNLOCKING, LockStatus.UNLOCKED
-        )
+        with self._user_operation():
+            await self._execute_lock_operation(
+                "force_unlock", LockStatus.UNLOCKING, LockStatus.UNLOCKED
+            )
 
     @operation_lock
     @retry_bluetooth_connection_error
@@ -645,7 +960,7 @@ class PushLock:
         self._update_any_state([pending_state])
         self._cancel_future_update()
         try:
-            lock = await self._ensure_connected()
+            lock = await self._ensure_connected(ConnectionPriority.USER)
             self._cancel_future_update()
             await getattr(lock, op_attr)()
         except Exception as ex:
@@ -714,8 +1029,10 @@ class PushLock:
         # Duration validation
         if duration not in self.auto_lock_durations:
             raise ValueError(f"Invalid auto lock duration: {duration}")
+        # Read the setting back on the next update unless the lock reports it
+        self._freshness.invalidate(StatusField.AUTO_LOCK)
         try:
-            lock = await self._ensure_connected()
+            lock = await self._ensure_connected(ConnectionPriority.USER)
             self._cancel_future_update()
             await lock.set_auto_lock(mode, duration)
         except Exception as ex:
@@ -736,6 +1053,7 @@ class PushLock:
 
     def _state_callback(self, states: Iterable[LockStateValue]) -> None:
         """Handle state change."""
+        self._idle_policy.record_activity(time.monotonic(), True)
         self._reset_disconnect_timer()
         self._update_any_state(states)
 
@@ -750,14 +1068,24 @@ class PushLock:
             self.auto_lock_prev,
         )
 
-    def _update_any_state(self, states: Iterable[LockStateValue | AuthState]) -> None:
+    def _update_any_state(
+        self, states: Iterable[LockStateValue | AuthState], resync: bool = True
+    ) -> None:
         _LOGGER.debug("%s: State changed: %s", self.name, states)
         lock_state = self._get_current_state()
         original_lock_status = lock_state.lock
         changes: dict[str, Any] = {}
+        now = time.monotonic()
         for state in states:
-            state_type = type(state)
-            self._seen_this_session.add(state_type)
+            if isinstance(state, BatteryState) and state.voltage <= 3.0:
+                # Leave the battery stale so the next update reads it again
+                _LOGGER.debug(
+                    "%s: Battery voltage is impossible: %s",
+                    self.name,
+                    state.voltage,
+                )
+                continue
+            self._freshness.refreshed_state(type(state), now)
             if isinstance(state, AuthState):
                 if lock_state.auth != state:
                     changes["auth"] = state
@@ -768,13 +1096,6 @@ class PushLock:
                 if lock_state.door != state:
                     changes["door"] = state
             elif isinstance(state, BatteryState):
-                if state.voltage <= 3.0:
-                    _LOGGER.debug(
-                        "%s: Battery voltage is impossible: %s",
-                        self.name,
-                        state.voltage,
-                    )
-                    continue
                 if lock_state.battery != state:
                     changes["battery"] = state
             elif isinstance(state, AutoLockState):
@@ -787,15 +1108,16 @@ class PushLock:
         if not changes:
             return
 
-        lock_state = replace(lock_state, **changes)
+        lock_state = lock_state.evolve(changes)
         if (
-            original_lock_status != lock_state.lock
+            resync
+            and original_lock_status != lock_state.lock
             and (not lock_state.auth or lock_state.auth.successful)
             and original_lock_status != LockStatus.UNKNOWN
         ):
             self._schedule_future_update(RESYNC_DELAY)
 
-        self._callback_state(lock_state)
+        self._callback_state(lock_state, changes)
 
     async def update(self) -> None:
         """Request that status be updated."""
@@ -810,6 +1132,26 @@ class PushLock:
         await self._update()
         _LOGGER.debug("%s: Finished validate", self.name)
 
+    def _stale_status_fields(
+        self, needs_battery_workaround: bool, now: float
+    ) -> list[StatusField]:
+        """Return the status fields that are stale and need to be queried."""
+        candidates = [StatusField.AUTO_LOCK, StatusField.LOCK]
+        if not needs_battery_workaround:
+            candidates.append(StatusField.BATTERY)
+        if self._lock_info and self._lock_info.door_sense:
+            candidates.append(StatusField.DOOR)
+        # Only ask for the lock status if we haven't seen
+        # it this session since notify callbacks will happen
+        # if it changes and the extra polling can cause the lock
+        # to get into a bad state.
+        fields = self._freshness.stale(candidates, now)
+        # However, we always want to poll lock
+        # state to keep the connection alive if we are always connected.
+        if not fields and self._always_connected:
+            fields.append(StatusField.LOCK)
+        return fields
+
     @operation_lock
     @retry_bluetooth_connection_error
     async def _update(self) -> LockState:
@@ -819,14 +1161,12 @@ class PushLock:
         _LOGGER.debug(
             "%s: Starting update (has_lock_info: %s)", self.name, has_lock_info
         )
-        lock = await self._ensure_connected()
+        lock = await self._ensure_connected(self._next_update_priority)
+        self._next_update_priority = ConnectionPriority.UPDATE
         if not self._lock_info:
-            self._lock_info = await lock.lock_info()
+            self._lock_info = await self._async_get_lock_info(lock)
             _LOGGER.debug("Obtained lock info: %s", self._lock_info)
-        # Asking for battery first seems to be reduce the chance of the lock
-        # getting into a bad state.
         state = self._get_current_state()
-        made_request = False
 
         needs_battery_workaround = self._lock_info.model in NO_BATTERY_SUPPORT_MODELS
         _LOGGER.debug(
@@ -834,61 +1174,44 @@ class PushLock:
             self._lock_info.model,
             needs_battery_workaround,
         )
-        if not needs_battery_workaround and BatteryState not in self._seen_this_session:
-            made_request = True
-            battery_state = await lock.battery()
-            _AUTH_FAILURE_HISTORY.auth_success(self.address)
-            state = replace(
-                state, battery=battery_state, auth=AuthState(successful=True)
-            )
-
-        if (
-            DoorStatus not in self._seen_this_session
-            and self._lock_info
-            and self._lock_info.door_sense
-        ):
-            made_request = True
-            door_status = await lock.door_status()
-            _AUTH_FAILURE_HISTORY.auth_success(self.address)
-            state = replace(state, door=door_status, auth=AuthState(successful=True))
-
-        if AutoLockState not in self._seen_this_session:
-            made_request = True
-            auto_lock_state = await lock.auto_lock_status()
-            _AUTH_FAILURE_HISTORY.auth_success(self.address)
-            state = replace(
-                state,
-                auto_lock=auto_lock_state,
-                auto_lock_prev=state.auto_lock,
-                auth=AuthState(successful=True),
-            )
+        now = time.monotonic()
+        fields = self._stale_status_fields(needs_battery_workaround, now)
 
-        # Only ask for the lock status if we haven't seen
-        # it this session since notify callbacks will happen
-        # if it changes and the extra polling can cause the lock
-        # to get into a bad state.
-        #
-        # However, we always want to poll lock
-        # state to keep the connection alive if we are always connected.
-        if LockStatus not in self._seen_this_session or (
-            not made_request and self._always_connected
-        ):
-            made_request = True
-            lock_status = await lock.lock_status()
+        made_request = bool(fields)
+        changes: dict[str, Any] = {}
+        if made_request:
+            result = await lock.query_status(fields, self._has_pending_user_operation)
+            if result.remaining:
+                self._requeue_preempted_update(result.remaining)
             _AUTH_FAILURE_HISTORY.auth_success(self.address)
-            state = replace(state, lock=lock_status, auth=AuthState(successful=True))
+            changes["auth"] = AUTH_SUCCESSFUL
+            if result.battery is not None:
+                changes["battery"] = result.battery
+            if result.door is not None:
+                changes["door"] = result.door
+            if result.auto_lock is not None:
+                changes["auto_lock"] = result.auto_lock
+                changes["auto_lock_prev"] = state.auto_lock
+            if result.lock is not None:
+                changes["lock"] = result.lock
+            for field in fields:
+                if field.value in changes:
+                    self._freshness.refreshed(field, now)
+        if state.unverified:
+            changes["unverified"] = False
+        if changes:
+            state = state.evolve(changes)
 
         _LOGGER.debug("%s: Finished update", self.name)
-        self._callback_state(state)
+        self._callback_state(state, changes)
 
         if state.battery and state.battery.voltage <= 3.0:
-            _LOGGER.debug(
-                "%s: Battery voltage is impossible: %s",
-                self.name,
-                state.battery.voltage,
+            # If the battery voltage is impossible, reconnect and read it
+            # again instead of trusting it until it goes stale.
+            self._freshness.invalidate(StatusField.BATTERY)
+            await self._execute_forced_disconnect(
+                f"impossible battery voltage: {state.battery.voltage}"
             )
-            # If the battery voltage is impossible, reconnect.
-            await self._execute_forced_disconnect("impossible battery voltage")
 
         if state.lock in (LockStatus.UNKNOWN_01, LockStatus.UNKNOWN_06):
             _LOGGER.debug("%s: Lock is in an unknown state: %s", self.name, state.lock)
@@ -912,8 +1235,20 @@ class PushLock:
             self._reschedule_next_keep_alive()
         return state
 
-    def _callback_state(self, lock_state: LockState) -> None:
+    async def _async_get_lock_info(self, lock: Lock) -> LockInfo:
+        """Get the lock info, reusing the stored info if the firmware is unchanged."""
+        key = self.unique_id
+        cached = await self._lock_info_store.async_get(key)
+        lock_info = await lock.lock_info(cached)
+        if lock_info is not cached:
+            await self._lock_info_store.async_set(key, lock_info)
+        return lock_info
+
+    def _callback_state(
+        self, lock_state: LockState, changes: Mapping[str, Any]
+    ) -> None:
         """Call the callbacks."""
+        previous = self._lock_state or _UNKNOWN_LOCK_STATE
         self._lock_state = lock_state
         _LOGGER.debug(
             "%s: New state: %s %s %s",
@@ -922,9 +1257,11 @@ class PushLock:
             self._lock_info,
             self.connection_info,
         )
-        if not self._callbacks:
+        if self._field_callbacks or self._event_streams:
+            self._call_field_callbacks(previous, lock_state, changes)
+        # Passive locks can see changes before lock info was read
+        if not self._callbacks or self._lock_info is None:
             return
-        assert self._lock_info is not None  # nosec
         connection_info = self.connection_info
         assert connection_info is not None  # nosec
         for callback in self._callbacks:
@@ -933,6 +1270,35 @@ class PushLock:
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("%s: Error calling callback", self.name)
 
+    def _call_field_callbacks(
+        self,
+        previous: LockState,
+        lock_state: LockState,
+        changes: Mapping[str, Any],
+    ) -> None:
+        """Call the field callbacks with only the fields that changed."""
+        deltas: dict[StateField, FieldChange] = {}
+        for name in changes:
+            if (field := STATE_FIELD_BY_NAME.get(name)) is None:
+                continue
+            old = getattr(previous, name)
+            if (new := getattr(lock_state, name)) != old:
+                deltas[field] = FieldChange(old, new)
+        if not deltas:
+            return
+        if self._event_streams:
+            event = StateEvent(lock_state, deltas)
+            for stream in self._event_streams:
+                stream.put(event)
+        for fields, callback in self._field_callbacks:
+            if selected := {
+                field: change for field, change in deltas.items() if field in fields
+            }:
+                try:
+                    callback(selected)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("%s: Error calling field callback", self.name)
+
     def update_advertisement(
         self, ble_device: BLEDevice, ad: AdvertisementData
     ) -> None:
@@ -956,10 +1322,31 @@ class PushLock:
                 )
         else:
             return
+        self._process_advertisement(ble_device, ad)
+
+    def _process_advertisement(
+        self, ble_device: BLEDevice, ad: AdvertisementData
+    ) -> None:
+        """Process an advertisement that is known to be from this lock."""
+        mfr_data = ad.manufacturer_data
+        apple_data = mfr_data.get(APPLE_MFR_ID)
+        yale_data = mfr_data.get(YALE_MFR_ID)
+        if apple_data == self._last_apple_data and yale_data == self._last_yale_data:
+            # Nothing we decode has changed, only keep the device
+            # and RSSI current for the next connection.
+            self._ble_device = ble_device
+            self._advertisement_data = ad
+            self._paths.update(ble_device, ad.rssi)
+            return
+        self._last_apple_data = apple_data
+        self._last_yale_data = yale_data
+        adv_debug_enabled = _ADV_LOGGER.isEnabledFor(logging.DEBUG)
         self.set_ble_device(ble_device)
         self.set_advertisement_data(ad)
+        self._paths.update(ble_device, ad.rssi)
         next_update = 0.0
-        mfr_data = ad.manufacturer_data
+        # False when only the first values were seen
+        changed = False
         if APPLE_MFR_ID in mfr_data:
             first_byte = mfr_data[APPLE_MFR_ID][0]
             if first_byte == HAP_FIRST_BYTE:
@@ -974,11 +1361,16 @@ class PushLock:
                     next_update = FIRST_UPDATE_COALESCE_SECONDS
                 elif hk_state != self._last_hk_state:
                     next_update = HK_UPDATE_COALESCE_SECONDS
+                    changed = True
                 self._last_hk_state = hk_state
-            elif first_byte == HAP_ENCRYPTED_FIRST_BYTE:
-                # Encrypted data, we don't know how to decrypt it
-                # but we know its a state change so we schedule an update
+            elif (
+                first_byte == HAP_ENCRYPTED_FIRST_BYTE
+                and not self._process_homekit_broadcast(mfr_data[APPLE_MFR_ID])
+            ):
+                # Encrypted data we can't decrypt but we know
+                # its a state change so we schedule an update
                 next_update = HK_UPDATE_COALESCE_SECONDS
+                changed = True
         # Only track the single 0/1 value from the advertisement
         # as we can get an storm of metadata we don't know how to
         # decode that starts with b'\x00\x00' and will cause us to
@@ -998,6 +1390,7 @@ class PushLock:
                     and current_value != self._last_adv_value
                 ):
                     next_update = ADV_UPDATE_COALESCE_SECONDS
+                    changed = True
             self._last_adv_value = current_value
         if adv_debug_enabled:
             scheduled_update = None
@@ -1017,6 +1410,8 @@ class PushLock:
             )
         if not next_update:
             return
+        if self._passive is not None and not self._passive_should_update(changed):
+            return
         if (
             self.is_connected
             and self._next_disconnect_delay != FIRST_CONNECTION_DISCONNECT_TIME
@@ -1036,6 +1431,38 @@ class PushLock:
             return
         self._schedule_future_update_with_debounce(next_update)
 
+    def _process_homekit_broadcast(self, data: bytes) -> bool:
+        """Apply an encrypted HomeKit broadcast, returns False if it can't be read."""
+        if (decryptor := self._hk_decryptor) is None or (
+            broadcast := decryptor.decrypt(data, self._last_hk_state)
+        ) is None:
+            return False
+        self._last_hk_state = broadcast.gsn
+        if (state := decryptor.state(broadcast)) is None:
+            return False
+        _LOGGER.debug("%s: HomeKit broadcast %s is %s", self.name, broadcast.gsn, state)
+        # The state came from the lock so there is nothing to resync
+        self._update_any_state([state], resync=False)
+        return True
+
+    def _passive_should_update(self, changed: bool) -> bool:
+        """Mark an advertised change and return True if it may be read."""
+        assert self._passive is not None  # nosec
+        if changed:
+            self._passive.changes += 1
+            self._mark_unverified()
+        # Already connected, the state will be pushed
+        return self.is_connected or self._passive.should_verify(time.monotonic())
+
+    def _mark_unverified(self) -> None:
+        """Mark the state as changed but not read from the lock yet."""
+        lock_state = self._get_current_state()
+        if lock_state.unverified:
+            return
+        _LOGGER.debug("%s: Advertisement shows an unverified change", self.name)
+        changes = {"unverified": True}
+        self._callback_state(lock_state.evolve(changes), changes)
+
     async def start(self) -> Callable[[], None]:
         """Start watching for updates."""
         _LOGGER.debug("Waiting for advertisement callbacks for %s", self.name)
@@ -1043,14 +1470,24 @@ class PushLock:
             raise RuntimeError("Already running")
         self._running = True
         self._first_update_future = asyncio.get_running_loop().create_future()
+        # Passive locks only connect when asked to
+        serve_without_update = self._restored or self._passive is not None
+        self._awaiting_first_update = not serve_without_update
+        if serve_without_update:
+            # Serve the restored state until an advertisement shows a change
+            _LOGGER.debug("%s: Starting without an update", self.name)
+            self._first_update_future.set_result(None)
         if device := await get_device(self.address):
             self.set_ble_device(device)
-            self._schedule_future_update_with_debounce(ADV_UPDATE_COALESCE_SECONDS)
+            if not serve_without_update:
+                self._schedule_future_update_with_debounce(ADV_UPDATE_COALESCE_SECONDS)
 
         return self._cancel
 
     def _cancel(self) -> None:
         self._running = False
+        for stream in list(self._event_streams):
+            stream.close()
         self._cancel_future_update()
         self.background_task(self._execute_forced_disconnect("stopping"))
 
@@ -1078,6 +1515,7 @@ class PushLock:
             ) from ex
         finally:
             self._first_update_future = None
+            self._awaiting_first_update = False
 
     def _cancel_future_update(self) -> None:
         """Cancel an update."""
@@ -1119,7 +1557,7 @@ class PushLock:
             future_update_time,
         )
         self._cancel_future_update()
-        self._cancel_deferred_update = self.loop.call_later(
+        self._cancel_deferred_update = self._timer_wheel.call_later(
             future_update_time, self._deferred_update
         )
 
@@ -1143,12 +1581,14 @@ class PushLock:
 
     def _set_update_state(self, exception: Exception | None) -> None:
         """Set the update state."""
-        if not self._first_update_future:
+        self._awaiting_first_update = False
+        if not (future := self._first_update_future) or future.done():
+            # Restored and passive locks resolve it when they start
             return
         if exception:
-            self._first_update_future.set_exception(exception)
+            future.set_exception(exception)
         else:
-            self._first_update_future.set_result(None)
+            future.set_result(None)
 
     async def _execute_deferred_update(self) -> None:
         """Execute deferred update."""
@@ -1197,5 +1637,4 @@ class PushLock:
 
 def get_homekit_state_num(data: bytes) -> int:
     """Get the homekit state number from the manufacturer data."""
-    acid, gsn, cn, cv = struct.unpack("<HHBB", data[9:15])
-    return gsn
+    return _HOMEKIT_GSN.unpack_from(data, 11)[0]
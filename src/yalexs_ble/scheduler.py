@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import IntEnum
+
+from .util import DEFAULT_SOURCE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Adapters are not limited unless a capacity is given since the number
+# of connections an adapter or proxy can hold varies widely.
+DEFAULT_CONNECTION_SLOTS: int | None = None
+
+# A waiter gains one priority level for every this many seconds
+# it has waited so background work is never starved.
+PRIORITY_AGING_SECONDS = 10.0
+
+
+class ConnectionPriority(IntEnum):
+    """Priority of a connection request, lower goes first."""
+
+    USER = 0
+    UPDATE = 1
+    KEEP_ALIVE = 2
+
+
+class ConnectionSlot:
+    """A connection slot held on an adapter."""
+
+    __slots__ = (
+        "_adapter",
+        "acquired",
+        "persistent",
+        "preempt",
+        "priority",
+        "released",
+    )
+
+    def __init__(
+        self,
+        adapter: _Adapter,
+        priority: ConnectionPriority,
+        preempt: Callable[[], bool] | None,
+        persistent: bool,
+    ) -> None:
+        """Init the slot."""
+        self._adapter = adapter
+        self.priority = priority
+        self.preempt = preempt
+        self.persistent = persistent
+        self.acquired = time.monotonic()
+        self.released = False
+
+    @property
+    def source(self) -> str:
+        """Return the adapter the slot is on."""
+        return self._adapter.source
+
+    def release(self) -> None:
+        """Give the slot back, it is safe to call this more than once."""
+        if self.released:
+            return
+        self.released = True
+        adapter = self._adapter
+        adapter.holders.remove(self)
+        if not self.persistent:
+            adapter.limited -= 1
+        adapter.grant()
+
+
+@dataclass
+class _Waiter:
+    priority: ConnectionPriority
+    seq: int
+    preempt: Callable[[], bool] | None
+    future: asyncio.Future[ConnectionSlot]
+    enqueued: float
+
+
+class _Adapter:
+    """The slots and queue of a single adapter."""
+
+    def __init__(self, source: str, capacity: int | None, aging: float) -> None:
+        self.source = source
+        self.capacity = capacity
+        self.aging = aging
+        self.holders: list[ConnectionSlot] = []
+        # Holders that count against the capacity
+        self.limited = 0
+        self.waiters: list[_Waiter] = []
+
+    def has_room(self) -> bool:
+        return self.capacity is None or self.limited < self.capacity
+
+    def add_holder(
+        self,
+        priority: ConnectionPriority,
+        preempt: Callable[[], bool] | None,
+        persistent: bool = False,
+    ) -> ConnectionSlot:
+        slot = ConnectionSlot(self, priority, preempt, persistent)
+        self.holders.append(slot)
+        if not persistent:
+            self.limited += 1
+        return slot
+
+    def grant(self) -> None:
+        """Hand free slots to the most deserving waiters."""
+        while self.waiters and self.has_room():
+            now = time.monotonic()
+            aging = self.aging
+            waiter = min(
+                self.waiters,
+                key=lambda w: (w.priority - (now - w.enqueued) / aging, w.seq),
+            )
+            self.waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.set_result(
+                    self.add_holder(waiter.priority, waiter.preempt)
+                )
+
+    def preempt_idle_holder(self) -> None:
+        """Ask the least important idle holder to give up its slot."""
+        for slot in sorted(
+            self.holders, key=lambda slot: (-slot.priority, slot.acquired)
+        ):
+            # Persistent holders do not take up a slot
+            if slot.persistent:
+                continue
+            if slot.preempt is not None and slot.preempt():
+                return
+
+
+class ConnectionScheduler:
+    """Hand out connection slots on each adapter by priority."""
+
+    def __init__(
+        self,
+        capacity: int | None = DEFAULT_CONNECTION_SLOTS,
+        aging: float = PRIORITY_AGING_SECONDS,
+    ) -> None:
+        """
+        Init the scheduler.
+
+        capacity limits every adapter the backend names, devices that do
+        not say which adapter heard them are only limited by set_capacity.
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacity = capacity
+        self._aging = aging
+        self._capacities: dict[str, int | None] = {DEFAULT_SOURCE: None}
+        self._adapters: dict[str, _Adapter] = {}
+        self._seq = itertools.count()
+
+    def set_capacity(self, source: str, capacity: int) -> None:
+        """Set the number of connection slots of an adapter."""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacities[source] = capacity
+        adapter = self._adapter(source)
+        adapter.capacity = capacity
+        adapter.grant()
+
+    def active(self, source: str) -> int:
+        """Return the number of slots in use on an adapter."""
+        adapter = self._adapters.get(source)
+        return len(adapter.holders) if adapter else 0
+
+    def waiting(self, source: str) -> int:
+        """Return the number of requests waiting for a slot on an adapter."""
+        adapter = self._adapters.get(source)
+        return len(adapter.waiters) if adapter else 0
+
+    def _adapter(self, source: str) -> _Adapter:
+        if (adapter := self._adapters.get(source)) is None:
+            adapter = self._adapters[source] = _Adapter(
+                source, self._capacities.get(source, self._capacity), self._aging
+            )
+        return adapter
+
+    async def acquire(
+        self,
+        source: str,
+        priority: ConnectionPriority,
+        preempt: Callable[[], bool] | None = None,
+        persistent: bool = False,
+    ) -> ConnectionSlot:
+        """
+        Wait for a connection slot on an adapter.
+
+        preempt is called when a user request is waiting and should
+        return True if the holder will release its idle slot. Persistent
+        connections are never released so they do not wait for or take
+        up a slot.
+        """
+        adapter = self._adapter(source)
+        if persistent or (not adapter.waiters and adapter.has_room()):
+            return adapter.add_holder(priority, preempt, persistent)
+        waiter = _Waiter(
+            priority,
+            next(self._seq),
+            preempt,
+            asyncio.get_running_loop().create_future(),
+            time.monotonic(),
+        )
+        adapter.waiters.append(waiter)
+        _LOGGER.debug(
+            "%s: Waiting for a connection slot (%s active, %s waiting)",
+            source,
+            len(adapter.holders),
+            len(adapter.waiters),
+        )
+        if priority is ConnectionPriority.USER:
+            adapter.preempt_idle_holder()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            if waiter in adapter.waiters:
+                adapter.waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                waiter.future.result().release()
+            raise
+
+
+CONNECTION_SCHEDULER = ConnectionScheduler()
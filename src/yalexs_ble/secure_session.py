@@ -6,9 +6,12 @@ import logging
 from bleak import BleakClient
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-from . import util
+from . import codec
 from .const import SECURE_READ_CHARACTERISTIC, SECURE_WRITE_CHARACTERISTIC
-from .session import ResponseError, Session
+from .cooldown import AdaptiveCooldown
+from .metrics import CommandMetrics
+from .session import PrecompiledFrame, ResponseError, Session
+from .trace import FrameTrace
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,8 +27,20 @@ class SecureSession(Session):
         lock: asyncio.Lock,
         disconnected_futures: set[asyncio.Future[None]],
         key_index: int,
+        *,
+        cooldown: AdaptiveCooldown | None = None,
+        frame_trace: FrameTrace | None = None,
+        metrics: CommandMetrics | None = None,
     ) -> None:
-        super().__init__(client, name, lock, disconnected_futures)
+        super().__init__(
+            client,
+            name,
+            lock,
+            disconnected_futures,
+            cooldown=cooldown,
+            frame_trace=frame_trace,
+            metrics=metrics,
+        )
         self.key_index = key_index
         self.write_characteristic = client.services.get_characteristic(
             self._write_characteristic
@@ -43,22 +58,37 @@ class SecureSession(Session):
         ).decryptor()
 
     def build_command(self, opcode: int) -> bytearray:
-        cmd = bytearray(0x12)
-        cmd[0x00] = opcode
-        cmd[0x10] = 0x0F
-        cmd[0x11] = self.key_index
-        return cmd
+        return codec.encode_secure_command(opcode, self.key_index)
+
+    def build_disconnect_command(self) -> PrecompiledFrame:
+        """Build the disconnect, which is always sent with a zero key index."""
+        # Same frame as the key index 0 template for the opcode
+        return self._cached_frame(
+            (type(self), codec.SECURE_DISCONNECT, 0x00), codec.encode_disconnect
+        )
+
+    def _template_key(self, opcode: int, cmd_byte: int) -> tuple[type, int, int]:
+        """Secure frames carry the key index instead of a command byte."""
+        if cmd_byte:
+            raise ValueError("Secure commands have no command byte")
+        return (type(self), opcode, self.key_index)
+
+    def _build_template(self, opcode: int, cmd_byte: int) -> bytearray:
+        """Build the plaintext frame for a template."""
+        return self.build_command(opcode)
+
+    def _frame_key(self, frame: bytes | bytearray) -> int | None:
+        """Secure responses are not keyed so they are matched in order."""
+        return None
 
     def _write_checksum(self, command: bytearray) -> None:
-        checksum = util._security_checksum(command)
-        checksum_bytes = checksum.to_bytes(4, byteorder="little", signed=False)
-        util._copy(command, checksum_bytes, destLocation=0x0C)
+        codec.apply_security_checksum(command)
 
     def _validate_response(self, data: bytes) -> None:
         response_checksum = int.from_bytes(
             data[0x0C:0x10], byteorder="little", signed=False
         )
-        expected = util._security_checksum(data)
+        expected = codec.security_checksum(data)
         _LOGGER.debug(
             "%s: Response security checksum: %s, expected: %s",
             self.name,
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import time
-from collections.abc import Callable
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Any
 
 from async_interrupt import interrupt
 from bleak import BleakClient
@@ -15,12 +17,32 @@ from cryptography.hazmat.primitives.ciphers import (
     modes,
 )
 
-from . import util
-from .const import READ_CHARACTERISTIC, WRITE_CHARACTERISTIC
+from . import codec, util
+from .const import READ_CHARACTERISTIC, WRITE_CHARACTERISTIC, Commands
+from .cooldown import COOLDOWN_TIME, AdaptiveCooldown  # noqa: F401
+from .metrics import CommandMetrics
+from .trace import FrameKind, FrameTrace
 
 _LOGGER = logging.getLogger(__name__)
 
-COOLDOWN_TIME = 0.25
+# Responses to these opcodes echo the subtype of the request at 0x04
+# so they can be matched to the request that produced them.
+SUBTYPED_OPCODES = {
+    Commands.GETSTATUS.value,
+    Commands.READSETTING.value,
+    Commands.WRITESETTING.value,
+}
+
+
+# Plaintext frames with their checksum applied, keyed by
+# (session type, opcode, cmd_byte)
+_FRAME_TEMPLATES: dict[tuple[type, int, int], bytes] = {}
+
+
+class PrecompiledFrame(bytearray):
+    """A command copied from a template that already carries its checksum."""
+
+    __slots__ = ()
 
 
 class YaleXSBLEError(Exception):
@@ -58,8 +80,15 @@ class Session:
         lock: asyncio.Lock,
         disconnected_futures: set[asyncio.Future[None]],
         state_callback: Callable[[bytes], None] | None = None,
+        *,
+        max_in_flight: int = 1,
+        cooldown: AdaptiveCooldown | None = None,
+        frame_trace: FrameTrace | None = None,
+        metrics: CommandMetrics | None = None,
     ) -> None:
         """Init the session."""
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
         self.name = name
         self._lock = lock
         self.cipher_decrypt: CipherContext | None = None
@@ -72,13 +101,25 @@ class Session:
             self._read_characteristic
         )
         self._notifications_started = False
-        self._notify_future: asyncio.Future[bytes] | None = None
+        # Requests waiting for a response in the order they were written
+        self._pending: list[tuple[int | None, asyncio.Future[bytes]]] = []
+        self._max_in_flight = max_in_flight
+        self._in_flight = asyncio.Semaphore(max_in_flight)
         self._state_callback = state_callback
         self._disconnected_futures = disconnected_futures
         self._first_request = True
         self._last_callback_time = -86400.0
         self._enable_cooldown = False
+        self._cooldown = cooldown or AdaptiveCooldown()
+        self._frame_trace = frame_trace
+        self._metrics = metrics or CommandMetrics()
         self.loop = asyncio.get_running_loop()
+        # Output buffers for update_into which needs room for an extra block;
+        # the views expose just the single block that is produced.
+        self._encrypt_buffer = bytearray(0x20)
+        self._decrypt_buffer = bytearray(0x20)
+        self._encrypt_view = memoryview(self._encrypt_buffer)[0x00:0x10]
+        self._decrypt_view = memoryview(self._decrypt_buffer)[0x00:0x10]
 
     def set_key(self, key: bytes) -> None:
         self.cipher_encrypt = Cipher(
@@ -95,74 +136,139 @@ class Session:
         self._enable_cooldown = True
 
     def decrypt(self, data: bytes | bytearray) -> bytes:
-        if self.cipher_decrypt is not None:
-            cipherText = data[0x00:0x10]
-            plainText = self.cipher_decrypt.update(cipherText)
-            if type(data) is not bytearray:
-                data = bytearray(data)
-            util._copy(data, plainText)
-
-        return data
+        if self.cipher_decrypt is None:
+            return bytes(data)
+        frame = data if type(data) is bytearray else bytearray(data)
+        codec.crypt_block_into(
+            self.cipher_decrypt, frame, self._decrypt_buffer, self._decrypt_view
+        )
+        return bytes(frame)
 
     def build_operation_command(self, opcode: int, cmd_byte: int) -> bytearray:
         """Build a command to send to the lock."""
-        cmd = self.build_command(opcode)
-        cmd[0x04] = cmd_byte
-        return cmd
+        return codec.encode_command(opcode, cmd_byte)
+
+    def build_cached_command(
+        self, opcode: int, cmd_byte: int = 0x00
+    ) -> PrecompiledFrame:
+        """Build a constant command from a template with its checksum applied."""
+        return self._cached_frame(
+            self._template_key(opcode, cmd_byte),
+            self._build_template,
+            opcode,
+            cmd_byte,
+        )
+
+    def _cached_frame(
+        self,
+        key: tuple[type, int, int],
+        build: Callable[..., bytearray],
+        *args: int,
+    ) -> PrecompiledFrame:
+        """Copy the template for key, building it on first use."""
+        if (template := _FRAME_TEMPLATES.get(key)) is None:
+            command = build(*args)
+            self._write_checksum(command)
+            template = _FRAME_TEMPLATES[key] = bytes(command)
+        return PrecompiledFrame(template)
+
+    def _template_key(self, opcode: int, cmd_byte: int) -> tuple[type, int, int]:
+        """Return the key of everything that goes into a template."""
+        return (type(self), opcode, cmd_byte)
+
+    def _build_template(self, opcode: int, cmd_byte: int) -> bytearray:
+        """Build the plaintext frame for a template."""
+        return self.build_operation_command(opcode, cmd_byte)
 
     def build_command(self, opcode: int) -> bytearray:
-        cmd = bytearray(0x12)
-        cmd[0x00] = 0xEE
-        cmd[0x01] = opcode
-        cmd[0x10] = 0x02
-        return cmd
+        return codec.encode_command(opcode)
 
     def _write_checksum(self, command: bytearray) -> None:
-        checksum = util._simple_checksum(command)
-        command[0x03] = checksum
+        codec.apply_simple_checksum(command)
 
     def _validate_response(self, response: bytes | bytearray) -> None:
-        _LOGGER.debug(
-            "%s: Response simple checksum: %s",
-            self.name,
-            str(util._simple_checksum(response)),
-        )
-        if util._simple_checksum(response) != 0:
+        checksum = codec.simple_checksum(response)
+        _LOGGER.debug("%s: Response simple checksum: %s", self.name, checksum)
+        if checksum != 0:
             raise ResponseError(f"Simple checksum mismatch {response!r}")
 
-        if response[0x00] != 0xBB and response[0x00] != 0xAA:
+        if (
+            response[0x00] != codec.RESPONSE_FLAG
+            and response[0x00] != codec.OPERATION_FLAG
+        ):
             raise ResponseError(f"Incorrect flag in response: {response[0x00]}")
 
+    def _frame_key(self, frame: bytes | bytearray) -> int | None:
+        """Return the key used to match a response to its request."""
+        opcode = frame[0x01]
+        if opcode in SUBTYPED_OPCODES:
+            return opcode << 8 | frame[0x04]
+        return opcode
+
+    def _pop_pending(self, key: int | None) -> asyncio.Future[bytes] | None:
+        """Pop the oldest pending request that matches the response key."""
+        pending = self._pending
+        for idx, (pending_key, future) in enumerate(pending):
+            if pending_key == key:
+                del pending[idx]
+                return future
+        for idx, (pending_key, future) in enumerate(pending):
+            if pending_key is None:
+                del pending[idx]
+                return future
+        if self._max_in_flight == 1 and pending:
+            # Stop-and-wait: whatever arrives answers the outstanding request
+            return pending.pop(0)[1]
+        _LOGGER.debug(
+            "%s: Response with key %s matches no pending request", self.name, key
+        )
+        return None
+
     async def _write(self, command: bytearray, command_name: str) -> bytes:
         """Write under the lock."""
-        async with self._lock:
+        lock_wait = self._metrics.command(command_name).lock_wait
+        start = time.monotonic()
+        if self._max_in_flight == 1:
+            async with self._lock:
+                lock_wait.add(time.monotonic() - start)
+                return await self._locked_write(command, command_name)
+        async with self._in_flight:
+            lock_wait.add(time.monotonic() - start)
             return await self._locked_write(command, command_name)
 
     def _notify(self, char: int, data: bytes) -> None:
         self._last_callback_time = time.monotonic()
         _LOGGER.debug(
-            "%s: Receiving response via notify: %s (waiting=%s)",
+            "%s: Receiving response via notify (waiting=%s)",
             self.name,
-            data.hex(),
-            bool(self._notify_future),
+            len(self._pending),
         )
+        if trace := self._frame_trace:
+            trace.record(FrameKind.NOTIFY_RAW, data)
         decrypted_data = self.decrypt(data)
+        if trace:
+            trace.record(FrameKind.NOTIFY_DECRYPTED, decrypted_data)
         if self._state_callback:
             self._state_callback(decrypted_data)
-        _LOGGER.debug(
-            "%s: Decrypted response via notify: %s", self.name, decrypted_data.hex()
-        )
-        if self._notify_future is None:
+        if not self._pending:
             return
         try:
             self._validate_response(data)
         except ResponseError as ex:
             _LOGGER.debug("%s: Invalid response, waiting for next one", self.name)
-            self._notify_future.set_exception(ex)
-            self._notify_future = None
+            # The key of a corrupt frame cannot be trusted so fail the oldest
+            self._pending.pop(0)[1].set_exception(ex)
             return
-        self._notify_future.set_result(decrypted_data)
-        self._notify_future = None
+        if future := self._pop_pending(self._frame_key(decrypted_data)):
+            future.set_result(decrypted_data)
+        elif decrypted_data[0x00] == codec.RESPONSE_FLAG:
+            # A response nobody asked for means the oldest request was
+            # answered with something we can not match, fail it rather
+            # than let it wait out the timeout. Operation frames can be
+            # pushed by the lock on its own so they are left alone.
+            self._pending.pop(0)[1].set_exception(
+                ResponseError(f"Unexpected response {decrypted_data!r}")
+            )
 
     async def _locked_write(self, command: bytearray, command_name: str) -> bytes:
         # NOTE: The last two bytes are not encrypted
@@ -172,39 +278,76 @@ class Session:
         if not self.client.is_connected:
             raise BleakError("disconnected")
         assert self.cipher_encrypt is not None, "Cipher not set"  # nosec
-        plainText = command[0x00:0x10]
-        cipherText = self.cipher_encrypt.update(plainText)
-        util._copy(command, cipherText)
-        _LOGGER.debug(
-            "%s: Encrypted command %s: %s", self.name, command_name, command.hex()
+        write_characteristic = self.write_characteristic
+        assert write_characteristic is not None, "Characteristic not found"  # nosec
+        key = self._frame_key(command)
+        # When pipelining only the encrypt and write are serialized since
+        # the lock must see the frames in the same order as the CBC chain.
+        write_lock: contextlib.AbstractAsyncContextManager[Any] = (
+            contextlib.nullcontext() if self._max_in_flight == 1 else self._lock
         )
+        encrypted = False
+        stats = self._metrics.command(command_name)
+        gap = time.monotonic() - self._last_callback_time
 
-        for attempt in range(3):
-            future: asyncio.Future[bytes] = self.loop.create_future()
-            self._notify_future = future
-            _LOGGER.debug(
-                "%s: Writing command to %s: %s",
-                self.name,
-                self.write_characteristic,
-                command.hex(),
-            )
-            _LOGGER.debug("%s: Waiting for response", self.name)
-            async with util.asyncio_timeout(10):
-                try:
-                    await self.client.write_gatt_char(
-                        self.write_characteristic, command, True
-                    )
-                    result = await future
-                except ResponseError:
-                    if attempt == 2:
-                        raise
-                    _LOGGER.debug("%s: Invalid response, retrying", self.name)
-                    continue
-                else:
-                    break
-        _LOGGER.debug("%s: Got response: %s", self.name, result.hex())
+        try:
+            for attempt in range(3):
+                future: asyncio.Future[bytes] = self.loop.create_future()
+                pending = (key, future)
+                _LOGGER.debug("%s: Waiting for response", self.name)
+                async with util.asyncio_timeout(10):
+                    try:
+                        async with write_lock:
+                            if not encrypted:
+                                self._encrypt(command, command_name)
+                                encrypted = True
+                            _LOGGER.debug(
+                                "%s: Writing command %s to %s",
+                                self.name,
+                                command_name,
+                                self.write_characteristic,
+                            )
+                            self._pending.append(pending)
+                            write_start = time.monotonic()
+                            await self.client.write_gatt_char(
+                                write_characteristic, command, True
+                            )
+                        write_done = time.monotonic()
+                        stats.write.add(write_done - write_start)
+                        result = await future
+                        stats.notify.add(time.monotonic() - write_done)
+                    except ResponseError:
+                        if attempt == 2:
+                            raise
+                        _LOGGER.debug("%s: Invalid response, retrying", self.name)
+                        stats.retries += 1
+                        continue
+                    else:
+                        break
+                    finally:
+                        if pending in self._pending:
+                            self._pending.remove(pending)
+        except TimeoutError:
+            if self._enable_cooldown:
+                self._cooldown.response_timeout()
+            raise
+        if self._enable_cooldown:
+            self._cooldown.response_ok(gap)
+        _LOGGER.debug("%s: Got response to %s", self.name, command_name)
         return result
 
+    def _encrypt(self, command: bytearray, command_name: str) -> None:
+        """Encrypt the command in place."""
+        assert self.cipher_encrypt is not None, "Cipher not set"  # nosec
+        if trace := self._frame_trace:
+            trace.record(FrameKind.WRITE_PLAIN, command)
+        codec.crypt_block_into(
+            self.cipher_encrypt, command, self._encrypt_buffer, self._encrypt_view
+        )
+        if trace:
+            trace.record(FrameKind.WRITE_ENCRYPTED, command)
+        _LOGGER.debug("%s: Encrypted command %s", self.name, command_name)
+
     async def start_notify(self) -> None:
         """Start notify."""
         if not self._notifications_started:
@@ -243,22 +386,24 @@ class Session:
         except BleakError as err:
             _LOGGER.debug("%s: Bleak error stopping notify: %s", self.name, err)
 
-    async def execute(self, command: bytearray, command_name: str) -> bytes:
-        """Execute command."""
-        while (
-            self._enable_cooldown
-            and (cooldown_remain := time.monotonic() - self._last_callback_time)
-            < COOLDOWN_TIME
-        ):
+    async def _wait_for_cooldown(self, command_name: str) -> None:
+        """Wait for the lock to settle after the last notification."""
+        start = time.monotonic()
+        while self._enable_cooldown and (
+            cooldown_remain := time.monotonic() - self._last_callback_time
+        ) < (cooldown_time := self._cooldown.cooldown):
             _LOGGER.debug(
                 "%s: Waiting %s for lock to settle", self.name, cooldown_remain
             )
             # If we send commands to fast the lock may crash and stop
             # advertising. This is a workaround to avoid that since
             # it means a battery pull is required to recover.
-            await asyncio.sleep(COOLDOWN_TIME - cooldown_remain)
-        assert self.cipher_encrypt is not None, "Cipher not set"  # nosec
-        self._write_checksum(command)
+            await asyncio.sleep(cooldown_time - cooldown_remain)
+        self._metrics.command(command_name).cooldown.add(time.monotonic() - start)
+
+    @contextlib.asynccontextmanager
+    async def _command_context(self) -> AsyncIterator[None]:
+        """Abort on disconnect and translate bleak errors."""
         disconnected_future = asyncio.get_running_loop().create_future()
         disconnected_futures = self._disconnected_futures
         disconnected_futures.add(disconnected_future)
@@ -266,7 +411,7 @@ class Session:
             async with interrupt(
                 disconnected_future, DisconnectedError, f"{self.name}: Disconnected"
             ):
-                return await self._write(command, command_name)
+                yield
         except BleakError as err:
             if self._first_request and util.is_key_error(err):
                 raise AuthError(
@@ -278,3 +423,96 @@ class Session:
         finally:
             disconnected_futures.discard(disconnected_future)
             self._first_request = False
+
+    async def execute(self, command: bytearray, command_name: str) -> bytes:
+        """Execute command."""
+        await self._wait_for_cooldown(command_name)
+        assert self.cipher_encrypt is not None, "Cipher not set"  # nosec
+        if type(command) is not PrecompiledFrame:
+            self._write_checksum(command)
+        async with self._command_context():
+            return await self._write(command, command_name)
+
+    async def execute_many(
+        self,
+        commands: Sequence[tuple[bytearray, str]],
+        should_stop: Callable[[], bool] | None = None,
+    ) -> list[bytes]:
+        """
+        Execute several commands under a single acquisition of the lock.
+
+        should_stop is checked before each command is written and when it
+        returns True the responses received so far are returned. Pipelined
+        commands are written one cooldown apart without waiting for the
+        responses in between.
+        """
+        assert self.cipher_encrypt is not None, "Cipher not set"  # nosec
+        for command, _ in commands:
+            if type(command) is not PrecompiledFrame:
+                self._write_checksum(command)
+        results: list[bytes] = []
+        async with self._command_context():
+            if self._max_in_flight > 1:
+                results = await self._execute_pipelined(commands, should_stop)
+            else:
+                start = time.monotonic()
+                async with self._lock:
+                    for command, command_name in commands:
+                        # Like independent writes, each command waits for the
+                        # lock and for the commands queued ahead of it
+                        lock_wait = time.monotonic() - start
+                        await self._wait_for_cooldown(command_name)
+                        # Checked after the cooldown since a user operation
+                        # may have started waiting while we slept
+                        if should_stop is not None and should_stop():
+                            _LOGGER.debug(
+                                "%s: Stopping after %s of %s commands",
+                                self.name,
+                                len(results),
+                                len(commands),
+                            )
+                            break
+                        self._metrics.command(command_name).lock_wait.add(lock_wait)
+                        results.append(await self._locked_write(command, command_name))
+        return results
+
+    async def _execute_pipelined(
+        self,
+        commands: Sequence[tuple[bytearray, str]],
+        should_stop: Callable[[], bool] | None,
+    ) -> list[bytes]:
+        """Write commands one cooldown apart and collect the responses in order."""
+        writes: list[asyncio.Task[bytes]] = []
+        last_write = -86400.0
+        try:
+            for command, command_name in commands:
+                await self._wait_for_cooldown(command_name)
+                if (
+                    self._enable_cooldown
+                    and (
+                        spacing := self._cooldown.cooldown
+                        - (time.monotonic() - last_write)
+                    )
+                    > 0
+                ):
+                    # The lock may crash if frames arrive faster than a
+                    # response would, even when none has come back yet
+                    await asyncio.sleep(spacing)
+                for write in writes:
+                    if write.done() and write.exception():
+                        # Raises the failure of the earlier write
+                        write.result()
+                if should_stop is not None and should_stop():
+                    _LOGGER.debug(
+                        "%s: Stopping after writing %s of %s commands",
+                        self.name,
+                        len(writes),
+                        len(commands),
+                    )
+                    break
+                writes.append(asyncio.create_task(self._write(command, command_name)))
+                last_write = time.monotonic()
+            return list(await asyncio.gather(*writes))
+        finally:
+            for write in writes:
+                write.cancel()
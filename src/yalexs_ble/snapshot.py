@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Iterable
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    AUTH_FAILED,
+    AUTH_SUCCESSFUL,
+    AutoLockMode,
+    AutoLockState,
+    BatteryState,
+    DoorStatus,
+    LockInfo,
+    LockState,
+    LockStatus,
+)
+from .store import write_json_atomically
+
+if TYPE_CHECKING:
+    from .push import PushLock
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PushLockSnapshot:
+    """Everything a PushLock needs to serve state without connecting."""
+
+    lock_state: LockState | None
+    lock_info: LockInfo | None
+    last_hk_state: int = -1
+    last_adv_value: int = -1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the snapshot in a compact JSON serializable form."""
+        data: dict[str, Any] = {
+            "hk": self.last_hk_state,
+            "adv": self.last_adv_value,
+        }
+        if self.lock_info is not None:
+            data["info"] = list(astuple(self.lock_info))
+        if (state := self.lock_state) is not None:
+            data["state"] = [
+                state.lock.value,
+                state.door.value,
+                _battery_as_list(state.battery),
+                None if state.auth is None else state.auth.successful,
+                _auto_lock_as_list(state.auto_lock),
+                _auto_lock_as_list(state.auto_lock_prev),
+            ]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> PushLockSnapshot:
+        """Create a snapshot from the output of as_dict."""
+        lock_state: LockState | None = None
+        if (state := data.get("state")) is not None:
+            lock, door, battery, auth, auto_lock, auto_lock_prev = state
+            lock_state = LockState(
+                LockStatus(lock),
+                DoorStatus(door),
+                None if battery is None else BatteryState(*battery),
+                None if auth is None else (AUTH_SUCCESSFUL if auth else AUTH_FAILED),
+                _auto_lock_from_list(auto_lock),
+                _auto_lock_from_list(auto_lock_prev),
+            )
+        info = data.get("info")
+        return cls(
+            lock_state,
+            None if info is None else LockInfo(*info),
+            data.get("hk", -1),
+            data.get("adv", -1),
+        )
+
+
+def _battery_as_list(battery: BatteryState | None) -> list[Any] | None:
+    return None if battery is None else [battery.voltage, battery.percentage]
+
+
+def _auto_lock_as_list(auto_lock: AutoLockState | None) -> list[int] | None:
+    return None if auto_lock is None else [auto_lock.mode.value, auto_lock.duration]
+
+
+def _auto_lock_from_list(data: list[int] | None) -> AutoLockState | None:
+    return None if data is None else AutoLockState(AutoLockMode(data[0]), data[1])
+
+
+def _read(path: Path) -> dict[str, dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        _LOGGER.warning("Ignoring unreadable snapshot file %s", path)
+        return {}
+    if not isinstance(data, dict):
+        _LOGGER.warning("Ignoring unexpected snapshot file %s", path)
+        return {}
+    return data
+
+
+async def async_save_snapshots(
+    path: str | os.PathLike[str], locks: Iterable[PushLock]
+) -> None:
+    """Save snapshots of many locks to a single file."""
+    data = {lock.unique_id: lock.snapshot().as_dict() for lock in locks}
+    await asyncio.get_running_loop().run_in_executor(
+        None, write_json_atomically, Path(path), data
+    )
+
+
+async def async_restore_snapshots(
+    path: str | os.PathLike[str], locks: Iterable[PushLock]
+) -> int:
+    """Restore many locks from a file written by async_save_snapshots.
+
+    Returns the number of locks that were restored.
+    """
+    data = await asyncio.get_running_loop().run_in_executor(None, _read, Path(path))
+    restored = 0
+    for lock in locks:
+        if (snapshot := data.get(lock.unique_id)) is None:
+            continue
+        try:
+            lock_snapshot = PushLockSnapshot.from_dict(snapshot)
+        except (AttributeError, KeyError, TypeError, ValueError) as ex:
+            _LOGGER.warning(
+                "%s: Ignoring invalid snapshot %s: %s", lock.name, snapshot, ex
+            )
+            continue
+        lock.restore(lock_snapshot)
+        restored += 1
+    return restored
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Mapping
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from .const import LockInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def write_json_atomically(path: Path, data: Any) -> None:
+    """Write JSON to a temporary file and move it into place."""
+    tmp_path = path.with_suffix(f"{path.suffix}.tmp")
+    tmp_path.write_text(json.dumps(data, separators=(",", ":")))
+    tmp_path.replace(path)
+
+
+class LockInfoStore:
+    """Remember lock info by address or local name so it is not read every time."""
+
+    def __init__(self) -> None:
+        """Init the store."""
+        self._infos: dict[str, LockInfo] = {}
+
+    async def async_get(self, key: str) -> LockInfo | None:
+        """Get the lock info for a lock."""
+        return self._infos.get(key)
+
+    async def async_set(self, key: str, lock_info: LockInfo) -> None:
+        """Store the lock info for a lock."""
+        self._infos[key] = lock_info
+
+    def as_dict(self) -> dict[str, dict[str, str]]:
+        """Return the stored lock info so it can be persisted."""
+        return {key: asdict(lock_info) for key, lock_info in self._infos.items()}
+
+    def restore(self, data: Mapping[str, Mapping[str, str]]) -> None:
+        """Restore lock info previously returned by as_dict."""
+        for key, value in data.items():
+            try:
+                self._infos[key] = LockInfo(**value)
+            except (AttributeError, KeyError, TypeError, ValueError) as ex:
+                _LOGGER.warning("Ignoring invalid lock info for %s: %s", key, ex)
+
+
+class JSONLockInfoStore(LockInfoStore):
+    """A lock info store backed by a JSON file."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Init the store."""
+        super().__init__()
+        self._path = Path(path)
+        self._load_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_get(self, key: str) -> LockInfo | None:
+        """Get the lock info for a lock, loading the file on first use."""
+        if not self._loaded:
+            await self._async_load()
+        return await super().async_get(key)
+
+    async def async_set(self, key: str, lock_info: LockInfo) -> None:
+        """Store the lock info for a lock and write the file."""
+        if not self._loaded:
+            await self._async_load()
+        await super().async_set(key, lock_info)
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(
+                None, write_json_atomically, self._path, self.as_dict()
+            )
+
+    async def _async_load(self) -> None:
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await asyncio.get_running_loop().run_in_executor(None, self._read)
+            self.restore(data)
+            self._loaded = True
+
+    def _read(self) -> dict[str, dict[str, str]]:
+        try:
+            data = json.loads(self._path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError):
+            _LOGGER.warning("Ignoring unreadable lock info store %s", self._path)
+            return {}
+        if not isinstance(data, dict):
+            _LOGGER.warning("Ignoring unexpected lock info store %s", self._path)
+            return {}
+        return data
+
+
+LOCK_INFO_STORE = LockInfoStore()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+from collections.abc import Callable
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Timers fire at most this many seconds late, never early. It matches
+# the shortest delay PushLock schedules (RESYNC_DELAY and
+# FIRST_UPDATE_COALESCE_SECONDS) so no update waits more than twice
+# as long as it asked for.
+DEFAULT_TIMER_RESOLUTION = 0.01
+
+
+class WheelTimer:
+    """A timer scheduled on a TimerWheel."""
+
+    __slots__ = ("_deadline", "_tick", "_wheel", "args", "callback")
+
+    def __init__(
+        self,
+        wheel: TimerWheel,
+        deadline: float,
+        tick: int,
+        callback: Callable[..., Any],
+        args: tuple[Any, ...],
+    ) -> None:
+        """Init the timer."""
+        self._wheel = wheel
+        self._deadline = deadline
+        self._tick = tick
+        self.callback = callback
+        self.args = args
+
+    def when(self) -> float:
+        """Return the loop time the timer is due."""
+        return self._deadline
+
+    def cancelled(self) -> bool:
+        """Return True if the timer was cancelled or has fired."""
+        return self._tick < 0
+
+    def cancel(self) -> None:
+        """Cancel the timer, it is safe to call this more than once."""
+        self._wheel._remove(self)
+
+
+class TimerWheel:
+    """
+    Share one event loop timer between many coarse timers.
+
+    Timers are kept in buckets of resolution seconds so scheduling,
+    rescheduling and cancelling are dictionary operations and the event
+    loop only ever holds a single handle for the earliest bucket.
+    """
+
+    def __init__(self, resolution: float = DEFAULT_TIMER_RESOLUTION) -> None:
+        """Init the wheel."""
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self._resolution = resolution
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._buckets: dict[int, dict[WheelTimer, None]] = {}
+        self._ticks: list[int] = []
+        self._queued_ticks: set[int] = set()
+        self._handle: asyncio.TimerHandle | None = None
+        self._armed_tick = -1
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of timers waiting to fire."""
+        return self._pending
+
+    @property
+    def buckets(self) -> int:
+        """Return the number of occupied buckets."""
+        return len(self._buckets)
+
+    def call_later(
+        self, delay: float, callback: Callable[..., Any], *args: Any
+    ) -> WheelTimer:
+        """Call callback with args after delay seconds."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind(loop)
+        deadline = loop.time() + delay
+        timer = WheelTimer(self, deadline, -1, callback, args)
+        self._add(timer, deadline)
+        return timer
+
+    def reschedule(self, timer: WheelTimer, delay: float) -> None:
+        """Move a pending timer so it fires after delay seconds instead."""
+        if timer._wheel is not self or timer._tick < 0:
+            raise ValueError("Timer is not pending on this wheel")
+        self._remove(timer)
+        deadline = self._loop.time() + delay  # type: ignore[union-attr]
+        timer._deadline = deadline
+        self._add(timer, deadline)
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start over on a new event loop, timers of the old one can not fire."""
+        if self._handle is not None:
+            self._handle.cancel()
+        for bucket in self._buckets.values():
+            for timer in bucket:
+                timer._tick = -1
+        self._loop = loop
+        self._buckets.clear()
+        self._ticks.clear()
+        self._queued_ticks.clear()
+        self._handle = None
+        self._armed_tick = -1
+        self._pending = 0
+
+    def _add(self, timer: WheelTimer, deadline: float) -> None:
+        # Round up to the next bucket so a timer never fires early
+        tick = math.floor(deadline / self._resolution) + 1
+        timer._tick = tick
+        if (bucket := self._buckets.get(tick)) is None:
+            bucket = self._buckets[tick] = {}
+            if tick not in self._queued_ticks:
+                self._queued_ticks.add(tick)
+                heapq.heappush(self._ticks, tick)
+        bucket[timer] = None
+        self._pending += 1
+        if self._handle is None or tick < self._armed_tick:
+            self._arm(tick)
+
+    def _remove(self, timer: WheelTimer) -> None:
+        if (tick := timer._tick) < 0:
+            return
+        timer._tick = -1
+        bucket = self._buckets[tick]
+        del bucket[timer]
+        self._pending -= 1
+        if not bucket:
+            # The tick stays in the heap and is skipped when it comes up
+            del self._buckets[tick]
+
+    def _arm(self, tick: int) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+        self._armed_tick = tick
+        self._handle = self._loop.call_at(  # type: ignore[union-attr]
+            tick * self._resolution, self._run
+        )
+
+    def _run(self) -> None:
+        """Fire every bucket that is due and arm the next one."""
+        self._handle = None
+        self._armed_tick = -1
+        current = math.floor(self._loop.time() / self._resolution)  # type: ignore[union-attr]
+        ticks = self._ticks
+        while ticks and ticks[0] <= current:
+            tick = heapq.heappop(ticks)
+            self._queued_ticks.discard(tick)
+            if (bucket := self._buckets.pop(tick, None)) is None:
+                continue
+            for timer in bucket:
+                timer._tick = -1
+            self._pending -= len(bucket)
+            for timer in bucket:
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    _LOGGER.exception("Error running timer %s", timer.callback)
+        while ticks and ticks[0] not in self._buckets:
+            self._queued_ticks.discard(heapq.heappop(ticks))
+        # Callbacks may have armed a later bucket than one already queued
+        if ticks and ticks[0] != self._armed_tick:
+            self._arm(ticks[0])
+
+
+TIMER_WHEEL = TimerWheel()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+
+FRAME_TRACE_SIZE = 64
+
+# Frames are 18 bytes, leave a little room for anything longer
+TRACE_SLOT_SIZE = 20
+
+
+class FrameKind(IntEnum):
+    """What a traced frame is."""
+
+    NOTIFY_RAW = 0x00
+    NOTIFY_DECRYPTED = 0x01
+    WRITE_PLAIN = 0x02
+    WRITE_ENCRYPTED = 0x03
+
+
+@dataclass
+class TraceEntry:
+    """A frame recorded in the trace."""
+
+    timestamp: float
+    kind: FrameKind
+    data: bytes
+
+
+class FrameTrace:
+    """A fixed-size ring buffer of the most recent frames."""
+
+    def __init__(self, size: int = FRAME_TRACE_SIZE) -> None:
+        """Init the trace."""
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._size = size
+        self._buffer = bytearray(size * TRACE_SLOT_SIZE)
+        self._lengths = bytearray(size)
+        self._kinds = bytearray(size)
+        self._timestamps = [0.0] * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of frames in the trace."""
+        return self._count
+
+    def record(self, kind: FrameKind, data: bytes | bytearray) -> None:
+        """Record a frame."""
+        idx = self._next
+        offset = idx * TRACE_SLOT_SIZE
+        length = len(data)
+        if length > TRACE_SLOT_SIZE:
+            length = TRACE_SLOT_SIZE
+            data = data[:TRACE_SLOT_SIZE]
+        self._buffer[offset : offset + length] = data
+        self._lengths[idx] = length
+        self._kinds[idx] = kind
+        self._timestamps[idx] = time.monotonic()
+        self._next = (idx + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    def clear(self) -> None:
+        """Clear the trace."""
+        self._next = 0
+        self._count = 0
+
+    def dump(self) -> list[TraceEntry]:
+        """Return the frames in the trace, oldest first."""
+        entries: list[TraceEntry] = []
+        start = (self._next - self._count) % self._size
+        for pos in range(self._count):
+            idx = (start + pos) % self._size
+            offset = idx * TRACE_SLOT_SIZE
+            entries.append(
+                TraceEntry(
+                    self._timestamps[idx],
+                    FrameKind(self._kinds[idx]),
+                    bytes(self._buffer[offset : offset + self._lengths[idx]]),
+                )
+            )
+        return entries
+
+    def format(self) -> str:
+        """Format the trace with times relative to the newest frame."""
+        entries = self.dump()
+        if not entries:
+            return "<empty>"
+        newest = entries[-1].timestamp
+        return "\n".join(
+            f"{entry.timestamp - newest:+9.3f} {entry.kind.name:<16} {entry.data.hex()}"
+            for entry in entries
+        )
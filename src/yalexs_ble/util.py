@@ -7,15 +7,16 @@ from bleak import BleakError
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
+from .codec import security_checksum, simple_checksum
+
 UNIQUE_LOCAL_NAME_LEN = 7
 
+# Source used when the backend does not say which adapter heard a device
+DEFAULT_SOURCE = "default"
 
-def _simple_checksum(buf: bytes) -> int:
-    cs = 0
-    for i in range(0x12):
-        cs = (cs + buf[i]) & 0xFF
 
-    return (-cs) & 0xFF
+def _simple_checksum(buf: bytes) -> int:
+    return simple_checksum(buf)
 
 
 def _bytes_to_int(buffer: bytes) -> int:
@@ -31,17 +32,25 @@ def _int_to_bytes(value: int, length: int) -> bytes:
 
 
 def _security_checksum(buffer: bytes) -> int:
-    val1 = _bytes_to_int(buffer[0x00:0x04])
-    val2 = _bytes_to_int(buffer[0x04:0x08])
-    val3 = _bytes_to_int(buffer[0x08:0x12])
-
-    return (0 - (val1 + val2 + val3)) & 0xFFFFFFFF
+    return security_checksum(buffer)
 
 
 def _copy(dest: bytearray, src: bytes, destLocation: int = 0) -> None:
     dest[destLocation : (destLocation + len(src))] = src
 
 
+def ble_device_source(ble_device: BLEDevice) -> str:
+    """Get the adapter or proxy a device was seen by."""
+    details = ble_device.details
+    if isinstance(details, dict):
+        if source := details.get("source"):
+            return str(source)
+        if (path := details.get("path")) and path.startswith("/org/bluez/"):
+            # /org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF
+            return str(path.split("/")[3])
+    return DEFAULT_SOURCE
+
+
 def serial_to_local_name(serial: str) -> str:
     """Convert a serial to a local name."""
     return f"{serial[0:2]}{serial[-5:]}"
@@ -96,9 +105,11 @@ def unique_id_from_device_adv(
     return unique_id_from_local_name_address(advertisement.local_name, device.address)
 
 
-def unique_id_from_local_name_address(local_name: str, address: str) -> str:
+def unique_id_from_local_name_address(local_name: str | None, address: str) -> str:
     """Get the unique id from the advertisement."""
-    return local_name if local_name_is_unique(local_name) else address
+    if local_name and local_name_is_unique(local_name):
+        return local_name
+    return address
 
 
 def local_name_is_unique(local_name: str | None) -> bool:
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from yalexs_ble import codec
+from yalexs_ble.const import (
+    AutoLockMode,
+    BatteryState,
+    Commands,
+    DoorStatus,
+    LockStatus,
+    SettingType,
+    StatusType,
+)
+
+np = pytest.importorskip("numpy")
+
+from yalexs_ble.bulk import NOT_PRESENT, BulkFrameKind, decode_frames  # noqa: E402
+
+
+def _frame(flag: int, opcode: int, subtype: int, data: dict[int, int]) -> bytes:
+    frame = bytearray(codec.FRAME_LENGTH)
+    frame[0x00] = flag
+    frame[0x01] = opcode
+    frame[0x04] = subtype
+    for offset, value in data.items():
+        frame[offset] = value
+    return bytes(frame)
+
+
+FRAMES = [
+    _frame(0xBB, Commands.GETSTATUS, StatusType.LOCK_ONLY, {0x08: 0x05}),
+    _frame(0xBB, Commands.GETSTATUS, StatusType.DOOR_ONLY, {0x08: 0x03}),
+    _frame(0xBB, Commands.GETSTATUS, StatusType.DOOR_AND_LOCK, {0x08: 3, 0x09: 1}),
+    _frame(0xBB, Commands.GETSTATUS, StatusType.BATTERY, {0x08: 0x40, 0x09: 0x17}),
+    _frame(
+        0xBB,
+        Commands.READSETTING,
+        SettingType.AUTOLOCK,
+        {0x08: 0x2C, 0x09: 1, 0x0A: 0x5A},
+    ),
+    _frame(0xBB, Commands.WRITESETTING, SettingType.AUTOLOCK, {}),
+    _frame(0xAA, Commands.LOCK, 0x00, {}),
+    _frame(0xAA, Commands.UNLOCK, 0x00, {}),
+    _frame(0xBB, Commands.LOCK_ACTIVITY, 0x20, {0x05: 0x10, 0x06: 0x20, 0x09: 0x02}),
+    _frame(0xBB, Commands.LOCK_ACTIVITY, 0x0E, {0x05: 0x01, 0x0A: 0x07, 0x0C: 0x33}),
+    _frame(0xBB, Commands.LOCK_ACTIVITY, 0x00, {0x06: 0x05, 0x08: 0xFF}),
+    _frame(0xBB, 0x7F, 0x00, {0x08: 0x05}),
+]
+
+
+def test_decode_frames_matches_codec():
+    result = decode_frames(b"".join(FRAMES))
+    assert len(result) == len(FRAMES)
+    assert list(result.kind) == [
+        BulkFrameKind.LOCK_STATUS,
+        BulkFrameKind.DOOR_STATUS,
+        BulkFrameKind.LOCK_AND_DOOR,
+        BulkFrameKind.BATTERY,
+        BulkFrameKind.AUTO_LOCK,
+        BulkFrameKind.AUTO_LOCK,
+        BulkFrameKind.LOCKED,
+        BulkFrameKind.UNLOCKED,
+        BulkFrameKind.LOCK_ACTIVITY,
+        BulkFrameKind.LOCK_ACTIVITY,
+        BulkFrameKind.LOCK_ACTIVITY,
+        BulkFrameKind.UNKNOWN,
+    ]
+    for idx, frame in enumerate(FRAMES[:8]):
+        for value in codec.decode_state(frame) or []:
+            if isinstance(value, LockStatus):
+                assert result.lock[idx] == value.value
+            elif isinstance(value, DoorStatus):
+                assert result.door[idx] == value.value
+            elif isinstance(value, BatteryState):
+                assert result.battery_mv[idx] / 1000 == value.voltage
+            else:
+                assert result.auto_lock_mode[idx] == value.mode
+                assert result.auto_lock_duration[idx] == value.duration
+    assert result.auto_lock_mode[5] == AutoLockMode.OFF
+    for idx, frame in enumerate(FRAMES[8:11], start=8):
+        activity = codec.decode_lock_activity(frame)
+        assert activity is not None
+        assert datetime.fromtimestamp(int(result.timestamp[idx])) == activity.timestamp
+        if isinstance(activity.status, LockStatus):
+            assert result.lock[idx] == activity.status.value
+        else:
+            assert result.door[idx] == activity.status.value
+        assert result.slot[idx] == (
+            NOT_PRESENT if getattr(activity, "slot", None) is None else activity.slot
+        )
+    assert result.lock[11] == NOT_PRESENT
+    assert result.battery_mv[0] == NOT_PRESENT
+
+
+def test_decode_frames_accepts_arrays():
+    matrix = np.frombuffer(b"".join(FRAMES), dtype=np.uint8).reshape(-1, 18)
+    assert list(decode_frames(matrix).kind) == list(
+        decode_frames(b"".join(FRAMES)).kind
+    )
+    with pytest.raises(ValueError):
+        decode_frames(b"\x00" * 17)
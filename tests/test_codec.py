@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from yalexs_ble import codec
+from yalexs_ble.const import (
+    AutoLockMode,
+    AutoLockState,
+    BatteryState,
+    Commands,
+    DoorActivity,
+    DoorStatus,
+    LockActivity,
+    LockStatus,
+    SettingType,
+    StatusType,
+)
+from yalexs_ble.util import _bytes_to_int
+
+
+def _legacy_security_checksum(frame: bytes) -> int:
+    val1 = _bytes_to_int(frame[0x00:0x04])
+    val2 = _bytes_to_int(frame[0x04:0x08])
+    val3 = _bytes_to_int(frame[0x08:0x12])
+    return (0 - (val1 + val2 + val3)) & 0xFFFFFFFF
+
+
+def _response(opcode: int, subtype: int, data: bytes) -> bytearray:
+    frame = codec.encode_command(opcode, subtype)
+    frame[0x00] = codec.RESPONSE_FLAG
+    frame[0x08 : 0x08 + len(data)] = data
+    codec.apply_simple_checksum(frame)
+    return frame
+
+
+def test_simple_checksum_round_trip():
+    frame = codec.encode_status_query(StatusType.BATTERY)
+    assert not codec.is_valid_simple_checksum(frame)
+    codec.apply_simple_checksum(frame)
+    assert codec.is_valid_simple_checksum(frame)
+    assert codec.decode_header(frame) == codec.FrameHeader(
+        codec.COMMAND_FLAG, Commands.GETSTATUS, frame[0x03], StatusType.BATTERY
+    )
+
+
+def test_security_checksum_matches_legacy():
+    frame = codec.encode_key_exchange(3, bytes(range(0xF0, 0x100)))
+    frame[0x0C:0x12] = b"\xff\xfe\xfd\xfc\x0f\x03"
+    assert codec.security_checksum(frame) == _legacy_security_checksum(bytes(frame))
+    codec.apply_security_checksum(frame)
+    assert codec.is_valid_security_checksum(memoryview(frame))
+
+
+def test_encode_set_auto_lock():
+    frame = codec.encode_set_auto_lock(AutoLockMode.TIMER, 300)
+    assert frame[0x01] == Commands.WRITESETTING
+    assert frame[0x04] == SettingType.AUTOLOCK
+    assert frame[0x08:0x0B] == b"\x2c\x01" + bytes([AutoLockMode.TIMER])
+    off = codec.encode_set_auto_lock(AutoLockMode.OFF, 300)
+    assert off[0x08:0x0B] == b"\x00\x00" + bytes([AutoLockMode.INSTANT])
+
+
+def test_session_key_and_handshake():
+    handshake = bytes(range(16))
+    response = bytes(range(0x20, 0x32))
+    assert codec.encode_initialization(1, handshake)[0x04:0x0C] == handshake[8:16]
+    assert codec.derive_session_key(handshake, response) == (
+        handshake[0:8] + response[4:12]
+    )
+
+
+def test_decode_state():
+    battery = _response(Commands.GETSTATUS, StatusType.BATTERY, b"\x40\x17")
+    assert codec.decode_state(battery) == [BatteryState(5.952, 85)]
+    lock_and_door = _response(Commands.GETSTATUS, StatusType.DOOR_AND_LOCK, b"\x05\x01")
+    assert codec.decode_state(memoryview(lock_and_door)) == [
+        LockStatus.LOCKED,
+        DoorStatus.CLOSED,
+    ]
+    auto_lock = _response(Commands.READSETTING, SettingType.AUTOLOCK, b"\x00\x00\x00")
+    assert codec.decode_state(auto_lock) == [AutoLockState(AutoLockMode.OFF, 0)]
+    assert codec.decode_state(_response(Commands.LOCK_ACTIVITY, 0, b"")) is None
+
+
+def test_decode_lock_activity():
+    door = bytearray(0x12)
+    door[0x04] = 0x20
+    door[0x05:0x0A] = (1_700_000_000).to_bytes(4, "little") + b"\x01"
+    assert codec.decode_lock_activity(door) == DoorActivity(
+        datetime.fromtimestamp(1_700_000_000), DoorStatus.CLOSED
+    )
+    pin = bytearray(0x12)
+    pin[0x04] = 0x0E
+    pin[0x05:0x09] = (1_700_000_000).to_bytes(4, "little")
+    pin[0x0A] = 7
+    pin[0x0C] = 0x35
+    assert codec.decode_lock_activity(pin) == LockActivity(
+        datetime.fromtimestamp(1_700_000_000), LockStatus.LOCKED, 7
+    )
+    none = bytearray(0x12)
+    none[0x04] = 0x80
+    assert codec.decode_lock_activity(none) is None
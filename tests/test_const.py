@@ -0,0 +1,34 @@
+import dataclasses
+
+import pytest
+
+from yalexs_ble import codec
+from yalexs_ble.const import (
+    AUTH_SUCCESSFUL,
+    AutoLockMode,
+    BatteryState,
+    DoorStatus,
+    LockState,
+    LockStatus,
+    SettingType,
+)
+
+
+def test_lock_state_is_immutable_and_evolves():
+    state = LockState(LockStatus.LOCKED, DoorStatus.CLOSED, None, None, None, None)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        state.lock = LockStatus.UNLOCKED
+    assert not hasattr(state, "__dict__")
+    evolved = state.evolve(
+        {"lock": LockStatus.UNLOCKED, "battery": BatteryState(6.0, 100)}
+    )
+    assert evolved == dataclasses.replace(
+        state, lock=LockStatus.UNLOCKED, battery=BatteryState(6.0, 100)
+    )
+    assert state.evolve({"auth": AUTH_SUCCESSFUL}).auth is AUTH_SUCCESSFUL
+
+
+def test_auto_lock_states_are_shared():
+    frame = codec.encode_command(0x04, SettingType.AUTOLOCK)
+    frame[0x08:0x0B] = b"\x1e\x00" + bytes([AutoLockMode.TIMER])
+    assert codec.decode_auto_lock(frame) is codec.decode_auto_lock(bytes(frame))
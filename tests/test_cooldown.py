@@ -0,0 +1,61 @@
+from yalexs_ble.const import LockInfo
+from yalexs_ble.cooldown import (
+    COOLDOWN_CEILING,
+    COOLDOWN_FLOOR,
+    COOLDOWN_TIME,
+    HEALTHY_RESPONSES_TO_SHRINK,
+    AdaptiveCooldown,
+    CooldownHistory,
+)
+
+
+def test_cooldown_shrinks_while_healthy():
+    cooldown = AdaptiveCooldown()
+    cooldown.response_timeout()
+    backed_off = cooldown.cooldown
+    for _ in range(HEALTHY_RESPONSES_TO_SHRINK):
+        cooldown.response_ok(backed_off)
+    assert COOLDOWN_TIME < cooldown.cooldown < backed_off
+
+
+def test_cooldown_never_shrinks_below_the_default():
+    cooldown = AdaptiveCooldown()
+    for _ in range(HEALTHY_RESPONSES_TO_SHRINK * 10):
+        cooldown.response_ok(0)
+    assert cooldown.cooldown == COOLDOWN_TIME
+    assert AdaptiveCooldown(0.1).cooldown == COOLDOWN_TIME
+
+
+def test_cooldown_ignores_long_gaps():
+    cooldown = AdaptiveCooldown()
+    for _ in range(HEALTHY_RESPONSES_TO_SHRINK * 2):
+        cooldown.response_ok(10.0)
+    assert cooldown.cooldown == COOLDOWN_TIME
+    assert cooldown.responses == HEALTHY_RESPONSES_TO_SHRINK * 2
+
+
+def test_cooldown_respects_floor_and_backs_off():
+    cooldown = AdaptiveCooldown()
+    for _ in range(HEALTHY_RESPONSES_TO_SHRINK * 100):
+        cooldown.response_ok(0)
+    assert cooldown.cooldown == COOLDOWN_FLOOR
+    cooldown.response_timeout()
+    assert cooldown.cooldown == COOLDOWN_TIME * 2
+    for _ in range(10):
+        cooldown.response_timeout()
+    assert cooldown.cooldown == COOLDOWN_CEILING
+    assert cooldown.timeouts == 11
+
+
+def test_cooldown_history_persists_per_model_firmware():
+    history = CooldownHistory()
+    info = LockInfo("August", "ASL-03", "serial", "1.0.0")
+    cooldown = history.get(info)
+    assert history.get(info) is cooldown
+    assert history.get(LockInfo("August", "ASL-03", "serial", "2.0.0")) is not cooldown
+    cooldown.cooldown = 0.5
+
+    restored = CooldownHistory()
+    restored.restore({**history.as_dict(), "bad/1": 0.0})
+    assert restored.get(info).cooldown == 0.5
+    assert restored.get(LockInfo("", "bad", "", "1")).cooldown == COOLDOWN_FLOOR
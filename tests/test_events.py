@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from yalexs_ble.const import DoorStatus, FieldChange, LockState, LockStatus, StateField
+from yalexs_ble.events import OverflowPolicy, StateEvent, StateEventStream
+
+
+def _event(lock: LockStatus, previous: LockStatus) -> StateEvent:
+    return StateEvent(
+        LockState(lock, DoorStatus.UNKNOWN, None, None, None, None),
+        {StateField.LOCK: FieldChange(previous, lock)},
+    )
+
+
+def test_drop_oldest():
+    closed: list[StateEventStream] = []
+    stream = StateEventStream(2, OverflowPolicy.DROP_OLDEST, closed.append)
+    stream.put(_event(LockStatus.LOCKED, LockStatus.UNKNOWN))
+    stream.put(_event(LockStatus.UNLOCKING, LockStatus.LOCKED))
+    stream.put(_event(LockStatus.UNLOCKED, LockStatus.UNLOCKING))
+    assert len(stream) == 2
+    assert stream.dropped == 1
+    assert stream.coalesced == 0
+    stream.close()
+    assert closed == [stream]
+
+
+def test_coalesce_keeps_first_previous_and_latest_current():
+    stream = StateEventStream(1, OverflowPolicy.COALESCE, lambda _: None)
+    stream.put(_event(LockStatus.UNLOCKING, LockStatus.LOCKED))
+    stream.put(_event(LockStatus.UNLOCKED, LockStatus.UNLOCKING))
+    door_event = StateEvent(
+        LockState(LockStatus.UNLOCKED, DoorStatus.OPENED, None, None, None, None),
+        {StateField.DOOR: FieldChange(DoorStatus.CLOSED, DoorStatus.OPENED)},
+    )
+    stream.put(door_event)
+    assert len(stream) == 1
+    assert stream.coalesced == 2
+    assert stream.dropped == 0
+    (event,) = stream._queue
+    assert event.lock_state is door_event.lock_state
+    assert event.changes == {
+        StateField.LOCK: FieldChange(LockStatus.LOCKED, LockStatus.UNLOCKED),
+        StateField.DOOR: FieldChange(DoorStatus.CLOSED, DoorStatus.OPENED),
+    }
+
+
+def test_coalesce_drops_fields_that_return_to_their_previous_value():
+    stream = StateEventStream(1, OverflowPolicy.COALESCE, lambda _: None)
+    stream.put(_event(LockStatus.UNLOCKING, LockStatus.LOCKED))
+    stream.put(_event(LockStatus.LOCKED, LockStatus.UNLOCKING))
+    assert len(stream) == 0
+    assert stream.coalesced == 1
+
+    stream.put(_event(LockStatus.UNLOCKING, LockStatus.LOCKED))
+    door_event = StateEvent(
+        LockState(LockStatus.UNLOCKING, DoorStatus.OPENED, None, None, None, None),
+        {StateField.DOOR: FieldChange(DoorStatus.CLOSED, DoorStatus.OPENED)},
+    )
+    stream.put(door_event)
+    stream.put(_event(LockStatus.LOCKED, LockStatus.UNLOCKING))
+    (event,) = stream._queue
+    assert event.changes == {
+        StateField.DOOR: FieldChange(DoorStatus.CLOSED, DoorStatus.OPENED)
+    }
+
+
+@pytest.mark.asyncio
+async def test_iteration_waits_and_ends_on_close():
+    stream = StateEventStream(4, OverflowPolicy.DROP_OLDEST, lambda _: None)
+    received: list[StateEvent] = []
+
+    async def _consume() -> None:
+        async for event in stream:
+            received.append(event)
+
+    task = asyncio.create_task(_consume())
+    await asyncio.sleep(0)
+    first = _event(LockStatus.LOCKED, LockStatus.UNKNOWN)
+    stream.put(first)
+    await asyncio.sleep(0)
+    assert received == [first]
+    with stream:
+        stream.put(_event(LockStatus.UNLOCKED, LockStatus.LOCKED))
+    await asyncio.wait_for(task, 1)
+    assert len(received) == 2
+    stream.put(first)
+    assert len(stream) == 0
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        StateEventStream(0, OverflowPolicy.DROP_OLDEST, lambda _: None)
@@ -0,0 +1,28 @@
+from yalexs_ble.const import BatteryState, StatusField
+from yalexs_ble.freshness import FreshnessPlanner
+
+
+def test_per_connection_fields_are_stale_after_reconnect():
+    planner = FreshnessPlanner()
+    planner.refreshed(StatusField.LOCK, 100.0)
+    assert planner.stale([StatusField.LOCK], 101.0) == []
+    planner.new_connection()
+    assert planner.stale([StatusField.LOCK], 101.0) == [StatusField.LOCK]
+
+
+def test_battery_stays_fresh_across_connections_until_ttl():
+    planner = FreshnessPlanner({StatusField.BATTERY: 60.0})
+    planner.refreshed_state(BatteryState, 100.0)
+    planner.new_connection()
+    assert planner.is_fresh(StatusField.BATTERY, 159.0)
+    assert not planner.is_fresh(StatusField.BATTERY, 160.0)
+
+
+def test_auto_lock_is_fresh_until_invalidated():
+    planner = FreshnessPlanner()
+    assert not planner.is_fresh(StatusField.AUTO_LOCK, 0.0)
+    planner.refreshed(StatusField.AUTO_LOCK, 0.0)
+    planner.new_connection()
+    assert planner.is_fresh(StatusField.AUTO_LOCK, 10**9)
+    planner.invalidate(StatusField.AUTO_LOCK)
+    assert not planner.is_fresh(StatusField.AUTO_LOCK, 10**9)
@@ -0,0 +1,56 @@
+import pytest
+
+from yalexs_ble.const import DoorStatus, LockStatus
+from yalexs_ble.homekit import (
+    HomeKitBroadcast,
+    HomeKitBroadcastDecryptor,
+    HomeKitCharacteristic,
+)
+
+KEY = bytes(range(32))
+CHARACTERISTICS = {
+    0x12: HomeKitCharacteristic.LOCK_CURRENT_STATE,
+    0x30: HomeKitCharacteristic.CONTACT_SENSOR_STATE,
+}
+# Advertising identifier a1b2c3d4e5f6, made with the reference
+# ChaCha20-Poly1305 AEAD and the tag truncated to four bytes.
+LOCKED_GSN_0105 = bytes.fromhex("1136a1b2c3d4e5f6564d8f0c0c065f09eef7d3073d5e1033")
+OPENED_GSN_0001 = bytes.fromhex("1136a1b2c3d4e5f69e57c35fb42aaf1829b6ae5c179adfa3")
+
+
+def test_decrypt_lock_current_state():
+    decryptor = HomeKitBroadcastDecryptor(KEY.hex(), CHARACTERISTICS)
+    broadcast = decryptor.decrypt(LOCKED_GSN_0105, 0x0100)
+    assert broadcast == HomeKitBroadcast(0x0105, 0x12, 1)
+    assert decryptor.state(broadcast) is LockStatus.LOCKED
+
+
+def test_decrypt_wraps_the_gsn():
+    decryptor = HomeKitBroadcastDecryptor(KEY, CHARACTERISTICS)
+    broadcast = decryptor.decrypt(OPENED_GSN_0001, 0xFFFE)
+    assert broadcast == HomeKitBroadcast(0x0001, 0x30, 1)
+    assert decryptor.state(broadcast) is DoorStatus.OPENED
+
+
+def test_decrypt_rejects_outside_window_wrong_key_and_tampering():
+    decryptor = HomeKitBroadcastDecryptor(KEY, CHARACTERISTICS, gsn_window=4)
+    assert decryptor.decrypt(LOCKED_GSN_0105, 0x0100) is None
+    assert decryptor.decrypt(LOCKED_GSN_0105, -1) is None
+    wrong_key = HomeKitBroadcastDecryptor(bytes(32), CHARACTERISTICS)
+    assert wrong_key.decrypt(LOCKED_GSN_0105, 0x0105) is None
+    tampered = bytearray(LOCKED_GSN_0105)
+    tampered[10] ^= 0x01
+    assert (
+        HomeKitBroadcastDecryptor(KEY, CHARACTERISTICS).decrypt(bytes(tampered), 0x0105)
+        is None
+    )
+
+
+def test_unknown_iid_has_no_state():
+    decryptor = HomeKitBroadcastDecryptor(KEY, {})
+    assert decryptor.state(HomeKitBroadcast(1, 0x12, 1)) is None
+
+
+def test_key_must_be_32_bytes():
+    with pytest.raises(ValueError):
+        HomeKitBroadcastDecryptor(bytes(16), CHARACTERISTICS)
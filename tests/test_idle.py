@@ -0,0 +1,54 @@
+from yalexs_ble.idle import (
+    IDLE_MARGIN_SECONDS,
+    MAX_IDLE_DISCONNECT_DELAY,
+    IdleDisconnectPolicy,
+)
+
+
+def _record_gaps(policy: IdleDisconnectPolicy, gaps: list[float]) -> None:
+    now = 1000.0
+    policy.record_activity(now, True)
+    for gap in gaps:
+        now += gap
+        policy.record_activity(now, True)
+
+
+def test_base_delay_until_enough_samples():
+    policy = IdleDisconnectPolicy(5.1)
+    _record_gaps(policy, [8.0, 8.0])
+    assert policy.delay() == 5.1
+
+
+def test_busy_lock_holds_connection_past_the_next_request():
+    policy = IdleDisconnectPolicy(5.1)
+    _record_gaps(policy, [8.0] * 8)
+    assert policy.delay() == 8.0 + IDLE_MARGIN_SECONDS
+    assert policy.hits == 8
+    decision = policy.decisions[-1]
+    assert decision.samples == 8
+    assert not decision.contended
+
+
+def test_quiet_lock_uses_base_delay():
+    policy = IdleDisconnectPolicy(5.1)
+    _record_gaps(policy, [600.0] * 8)
+    assert policy.delay() == 5.1
+
+
+def test_delay_is_capped_and_contention_uses_base_delay():
+    policy = IdleDisconnectPolicy(5.1)
+    _record_gaps(policy, [24.8] * 8)
+    assert policy.delay() == MAX_IDLE_DISCONNECT_DELAY
+    assert policy.delay(contended=True) == 5.1
+    assert policy.decisions[-1].contended
+
+
+def test_misses_are_counted_after_idle_disconnect():
+    policy = IdleDisconnectPolicy(5.1)
+    policy.record_activity(100.0, True)
+    policy.record_idle_disconnect(105.1)
+    policy.record_activity(110.0, False)
+    policy.record_idle_disconnect(115.1)
+    policy.record_activity(500.0, False)
+    assert policy.misses == 1
+    assert policy.as_dict()["misses"] == 1
@@ -3,8 +3,22 @@ import contextlib
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bleak import BleakError
 from bleak_retry_connector import BLEDevice
 
+from yalexs_ble.const import (
+    FIRMWARE_REVISION_CHARACTERISTIC,
+    MANUFACTURER_NAME_CHARACTERISTIC,
+    MODEL_NUMBER_CHARACTERISTIC,
+    SERIAL_NUMBER_CHARACTERISTIC,
+    Commands,
+    DoorStatus,
+    LockInfo,
+    LockStatus,
+    StatusType,
+)
+from yalexs_ble.cooldown import CooldownHistory
+from yalexs_ble.decoder import DEFAULT_FRAME_DECODERS
 from yalexs_ble.lock import Lock
 
 
@@ -44,3 +58,128 @@ async def test_connection_canceled_on_disconnect():
         await task
 
     assert task.cancelled() is True
+
+
+def _frame(flag: int, opcode: int, subtype: int, value: int = 0) -> bytes:
+    frame = bytearray(0x12)
+    frame[0x00] = flag
+    frame[0x01] = opcode
+    frame[0x04] = subtype
+    frame[0x08] = value
+    return bytes(frame)
+
+
+def test_frame_decoder_registry_dispatch():
+    states = []
+    lock = Lock(
+        lambda: BLEDevice("aa:bb:cc:dd:ee:ff", "lock", delegate=""),
+        "0800200c9a66",
+        1,
+        "mylock",
+        states.append,
+        frame_decoders=DEFAULT_FRAME_DECODERS.copy(),
+    )
+    lock._internal_state_callback(
+        _frame(0xBB, Commands.GETSTATUS, StatusType.LOCK_ONLY, 0x05)
+    )
+    lock._internal_state_callback(_frame(0xBB, Commands.LOCK_ACTIVITY, 0x20))
+    lock._internal_state_callback(_frame(0xBB, Commands.READSETTING, 0x30))
+    assert states == [[LockStatus.LOCKED]]
+
+    unregister = lock._frame_decoders.register(
+        0xBB, Commands.READSETTING, 0x30, lambda _lock, state: [DoorStatus.CLOSED]
+    )
+    lock._internal_state_callback(_frame(0xBB, Commands.READSETTING, 0x30))
+    assert states[-1] == [DoorStatus.CLOSED]
+    unregister()
+    assert lock._parse_state(_frame(0xBB, Commands.READSETTING, 0x30)) is None
+    assert DEFAULT_FRAME_DECODERS.get(_frame(0xBB, Commands.READSETTING, 0x30)) is None
+
+
+def _info_lock(read_gatt_char: AsyncMock) -> Lock:
+    lock = Lock(
+        lambda: BLEDevice("aa:bb:cc:dd:ee:ff", "lock", delegate=""),
+        "0800200c9a66",
+        1,
+        "mylock",
+        lambda _: None,
+    )
+    lock.client = MagicMock(is_connected=True, read_gatt_char=read_gatt_char)
+    lock.client.services.get_characteristic = lambda uuid: uuid
+    lock.session = MagicMock()
+    lock.secure_session = MagicMock()
+    return lock
+
+
+_INFO_VALUES = {
+    MANUFACTURER_NAME_CHARACTERISTIC: b"August\0",
+    MODEL_NUMBER_CHARACTERISTIC: b"ASL-03",
+    SERIAL_NUMBER_CHARACTERISTIC: b"L123456",
+    FIRMWARE_REVISION_CHARACTERISTIC: b"2.0.0",
+}
+
+
+@pytest.mark.asyncio
+async def test_lock_info_reads_concurrently_with_sequential_fallback():
+    in_flight = 0
+    max_in_flight = 0
+    fail = True
+
+    async def _read(char):
+        nonlocal in_flight, max_in_flight, fail
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        if fail and in_flight:
+            fail = False
+            raise BleakError("Operation already in progress")
+        return _INFO_VALUES[char]
+
+    read_gatt_char = AsyncMock(side_effect=_read)
+    lock = _info_lock(read_gatt_char)
+    expected = LockInfo("August", "ASL-03", "L123456", "2.0.0")
+    assert await lock.lock_info() == expected
+    assert max_in_flight == 4
+    assert read_gatt_char.await_count == 8
+
+    read_gatt_char.reset_mock()
+    max_in_flight = 0
+    assert await lock.lock_info() == expected
+    assert max_in_flight == 1
+    assert read_gatt_char.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_lock_info_reuses_cached_info_until_firmware_changes():
+    read_gatt_char = AsyncMock(side_effect=lambda char: _INFO_VALUES[char])
+    lock = _info_lock(read_gatt_char)
+    cached = LockInfo("August", "ASL-03", "L123456", "2.0.0")
+    assert await lock.lock_info(cached) is cached
+    assert read_gatt_char.await_count == 1
+
+    read_gatt_char.reset_mock()
+    outdated = LockInfo("August", "ASL-03", "L123456", "1.0.0")
+    assert await lock.lock_info(outdated) == cached
+    assert read_gatt_char.await_count == 5
+
+
+def test_cooldown_is_private_until_lock_info_is_known():
+    history = CooldownHistory()
+    info = LockInfo("August", "ASL-03", "serial", "1.0.0")
+
+    def _lock(info: LockInfo | None) -> Lock:
+        return Lock(
+            lambda: BLEDevice("aa:bb:cc:dd:ee:ff", "lock", {}),
+            "0800200c9a66",
+            1,
+            "mylock",
+            lambda _: None,
+            info,
+            cooldown_history=history,
+        )
+
+    first, second = _lock(None), _lock(None)
+    assert first._session_cooldown() is not second._session_cooldown()
+    assert history.as_dict() == {}
+    assert _lock(info)._session_cooldown() is history.get(info)
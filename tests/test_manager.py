@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+import pytest
+from bleak.backends.scanner import AdvertisementData
+from bleak_retry_connector import BLEDevice
+
+from yalexs_ble.const import APPLE_MFR_ID, YALE_MFR_ID
+from yalexs_ble.manager import LockManager
+from yalexs_ble.push import PushLock
+
+
+def _adv(local_name: str, manufacturer_data: dict[int, bytes]) -> AdvertisementData:
+    return AdvertisementData(local_name, manufacturer_data, {}, [], None, -60, ())
+
+
+@pytest.mark.asyncio
+async def test_lock_manager_routes_to_owner():
+    manager = LockManager()
+    by_name = PushLock("M1FBA11")
+    by_address = PushLock("Aug", "AA:BB:CC:DD:EE:FF")
+    unregister = manager.register(by_name)
+    manager.register(by_address)
+    with pytest.raises(ValueError):
+        manager.register(PushLock("M1FBA11"))
+
+    named_device = BLEDevice("11:22:33:44:55:66", "M1FBA11", {})
+    other_device = BLEDevice("AA:BB:CC:DD:EE:FF", "Aug", {})
+    with patch.object(PushLock, "_process_advertisement") as process:
+        manager.update_advertisement(named_device, _adv("M1FBA11", {}))
+        assert process.call_count == 0
+        manager.update_advertisement(
+            named_device, _adv("M1FBA11", {YALE_MFR_ID: b"\x01"})
+        )
+        manager.update_advertisement(other_device, _adv("Aug", {APPLE_MFR_ID: b"\x06"}))
+        manager.update_advertisement(
+            BLEDevice("00:00:00:00:00:00", "x", {}),
+            _adv("M9XXXXX", {YALE_MFR_ID: b"\x01"}),
+        )
+    assert process.call_count == 2
+    assert manager.get("M1FBA11", "11:22:33:44:55:66") is by_name
+    assert manager.get("Aug", "AA:BB:CC:DD:EE:FF") is by_address
+    unregister()
+    assert manager.get("M1FBA11", "11:22:33:44:55:66") is None
+
+
+def test_lock_manager_indexes_learned_address():
+    manager = LockManager()
+    push_lock = PushLock("M1FBA11")
+    unregister = manager.register(push_lock)
+    assert manager.get(None, "11:22:33:44:55:66") is None
+
+    # The lock learns its address from an advertisement with its name
+    push_lock.set_ble_device(BLEDevice("11:22:33:44:55:66", "M1FBA11", {}))
+    assert manager.get(None, "11:22:33:44:55:66") is push_lock
+    assert manager.get(None, "11:22:33:44:55:66") is push_lock
+    assert manager.get(None, "00:00:00:00:00:00") is None
+    unregister()
+    assert manager.get(None, "11:22:33:44:55:66") is None
+    assert manager.get("M1FBA11", "11:22:33:44:55:66") is None
@@ -0,0 +1,29 @@
+from yalexs_ble.metrics import LATENCY_BUCKETS, CommandMetrics, LatencyHistogram
+
+
+def test_latency_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram()
+    for _ in range(98):
+        histogram.add(0.02)
+    histogram.add(0.3)
+    histogram.add(60.0)
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 100
+    assert snapshot.counts[LATENCY_BUCKETS.index(0.025)] == 98
+    assert snapshot.counts[-1] == 1
+    assert snapshot.quantile(0.5) == 0.025
+    assert snapshot.quantile(0.99) == 0.5
+    assert snapshot.quantile(1.0) == 60.0
+    assert snapshot.maximum == 60.0
+    assert LatencyHistogram().snapshot().quantile(0.99) == 0.0
+
+
+def test_command_metrics_snapshot():
+    metrics = CommandMetrics()
+    assert metrics.command("battery") is metrics.command("battery")
+    metrics.command("battery").notify.add(0.1)
+    metrics.command("battery").retries += 1
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"battery"}
+    assert snapshot["battery"].notify.count == 1
+    assert snapshot["battery"].retries == 1
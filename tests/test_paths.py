@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bleak import BleakError
+from bleak_retry_connector import BLEDevice
+
+from yalexs_ble.paths import PATH_STALE_SECONDS, PathTable
+from yalexs_ble.push import PushLock
+from yalexs_ble.scheduler import ConnectionScheduler
+
+
+def _device(source: str) -> BLEDevice:
+    return BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {"source": source})
+
+
+def test_paths_ordered_by_rssi_and_load():
+    table = PathTable()
+    near, far = _device("near"), _device("far")
+    table.update(far, -80)
+    table.update(near, -60)
+    assert table.ordered(lambda source: 0) == [near, far]
+    # Three connections on the near proxy outweigh its 20 dB advantage
+    assert table.ordered(lambda source: 3 if source == "near" else 0) == [far, near]
+    table.failed(near)
+    assert table.ordered(lambda source: 0) == [far, near]
+
+
+def test_stale_paths_are_dropped():
+    table = PathTable()
+    with patch("yalexs_ble.paths.time.monotonic", return_value=0.0):
+        table.update(_device("old"), -40)
+    with patch("yalexs_ble.paths.time.monotonic", return_value=PATH_STALE_SECONDS + 1):
+        table.update(_device("new"), -90)
+        assert [device.details["source"] for device in table.ordered(len)] == ["new"]
+    assert len(table) == 1
+
+
+@pytest.mark.asyncio
+async def test_connect_falls_back_to_next_path():
+    scheduler = ConnectionScheduler()
+    push_lock = PushLock(
+        "M1FBA11",
+        key="0800200c9a66",
+        key_index=1,
+        connection_scheduler=scheduler,
+    )
+    push_lock._paths.update(_device("near"), -60)
+    push_lock._paths.update(_device("far"), -80)
+    connected_via: list[str] = []
+
+    def _lock_instance(ble_device: BLEDevice) -> MagicMock:
+        source = ble_device.details["source"]
+
+        async def _connect(max_attempts: int) -> None:
+            connected_via.append(source)
+            if source == "near":
+                raise BleakError("timeout")
+
+        return MagicMock(connect=_connect, disconnect=AsyncMock())
+
+    with patch.object(push_lock, "_get_lock_instance", _lock_instance):
+        await push_lock._ensure_connected()
+    assert connected_via == ["near", "far"]
+    assert scheduler.active("near") == 0
+    assert scheduler.active("far") == 1
+    push_lock._cancel_disconnect_timer()
+    push_lock._release_connection_slot()
+
+
+@pytest.mark.asyncio
+async def test_connect_retries_stay_on_the_chosen_path():
+    push_lock = PushLock("M1FBA11", key="0800200c9a66", key_index=1)
+    lock = push_lock._get_lock_instance(_device("near"))
+    # A newer advertisement arrives through another adapter
+    push_lock.set_ble_device(_device("far"))
+    assert lock.ble_device_callback().details["source"] == "near"
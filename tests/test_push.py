@@ -1,12 +1,36 @@
 import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-
+from bleak.backends.scanner import AdvertisementData
+from bleak_retry_connector import BleakError, BLEDevice
+
+from yalexs_ble.const import (
+    APPLE_MFR_ID,
+    YALE_MFR_ID,
+    AutoLockMode,
+    AutoLockState,
+    BatteryState,
+    DoorStatus,
+    FieldChange,
+    LockInfo,
+    LockStatus,
+    StateField,
+    StatusField,
+    StatusQueryResult,
+)
+from yalexs_ble.events import OverflowPolicy
+from yalexs_ble.homekit import HomeKitCharacteristic
 from yalexs_ble.push import (
+    MAX_CONNECT_ATTEMPTS,
     NO_BATTERY_SUPPORT_MODELS,
+    PushLock,
+    get_homekit_state_num,
     operation_lock,
     retry_bluetooth_connection_error,
 )
+from yalexs_ble.scheduler import ConnectionPriority, ConnectionScheduler
 
 
 @pytest.mark.asyncio
@@ -139,3 +163,343 @@ def test_needs_battery_workaround():
     assert "CERES" in NO_BATTERY_SUPPORT_MODELS
     assert "Yale Linus L2" in NO_BATTERY_SUPPORT_MODELS
     assert "ASL-03" not in NO_BATTERY_SUPPORT_MODELS
+
+
+HAP_DATA = bytes.fromhex("0631003b8dc3b2a81a0c0a0b00020b0135")
+
+
+def test_get_homekit_state_num():
+    assert get_homekit_state_num(HAP_DATA) == 0x000B
+
+
+@pytest.mark.asyncio
+async def test_unchanged_advertisement_skips_decoding():
+    push_lock = PushLock("M1FBA11")
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+
+    def _adv(rssi: int, yale: bytes = b"\x01") -> AdvertisementData:
+        return AdvertisementData(
+            "M1FBA11",
+            {APPLE_MFR_ID: HAP_DATA, YALE_MFR_ID: yale},
+            {},
+            [],
+            None,
+            rssi,
+            (),
+        )
+
+    with patch(
+        "yalexs_ble.push.get_homekit_state_num", wraps=get_homekit_state_num
+    ) as decode:
+        push_lock.update_advertisement(device, _adv(-70))
+        push_lock.update_advertisement(device, _adv(-50))
+        assert decode.call_count == 1
+        assert push_lock.connection_info.rssi == -50
+        push_lock.update_advertisement(device, _adv(-50, b"\x00"))
+        assert decode.call_count == 2
+        push_lock.reset_advertisement_state()
+        push_lock.update_advertisement(device, _adv(-50, b"\x00"))
+        assert decode.call_count == 3
+    push_lock._cancel_future_update()
+
+
+def test_field_callbacks_receive_only_changed_fields():
+    push_lock = PushLock("M1FBA11")
+    lock_changes: list[dict[StateField, FieldChange]] = []
+    battery_changes: list[dict[StateField, FieldChange]] = []
+    unregister = push_lock.register_field_callback(
+        [StateField.LOCK, StateField.DOOR], lock_changes.append
+    )
+    push_lock.register_field_callback([StateField.BATTERY], battery_changes.append)
+
+    push_lock._update_any_state([LockStatus.LOCKED, DoorStatus.CLOSED])
+    assert lock_changes == [
+        {
+            StateField.LOCK: FieldChange(LockStatus.UNKNOWN, LockStatus.LOCKED),
+            StateField.DOOR: FieldChange(DoorStatus.UNKNOWN, DoorStatus.CLOSED),
+        }
+    ]
+    push_lock._update_any_state([LockStatus.LOCKED, BatteryState(6.0, 100)])
+    assert len(lock_changes) == 1
+    assert battery_changes == [
+        {StateField.BATTERY: FieldChange(None, BatteryState(6.0, 100))}
+    ]
+    unregister()
+    push_lock._update_any_state([DoorStatus.OPENED])
+    assert len(lock_changes) == 1
+
+
+@pytest.mark.asyncio
+async def test_events_stream_receives_changes():
+    push_lock = PushLock("M1FBA11")
+    with push_lock.events(maxsize=1, policy=OverflowPolicy.COALESCE) as events:
+        push_lock._update_any_state([LockStatus.LOCKED])
+        push_lock._update_any_state([LockStatus.LOCKED, DoorStatus.CLOSED])
+        assert events.coalesced == 1
+        event = await anext(events)
+        assert event.changes == {
+            StateField.LOCK: FieldChange(LockStatus.UNKNOWN, LockStatus.LOCKED),
+            StateField.DOOR: FieldChange(DoorStatus.UNKNOWN, DoorStatus.CLOSED),
+        }
+    assert push_lock._event_streams == []
+
+
+def test_stale_status_fields_skip_fresh_fields():
+    push_lock = PushLock("M1FBA11")
+    assert set(push_lock._stale_status_fields(False, 100.0)) == {
+        StatusField.AUTO_LOCK,
+        StatusField.BATTERY,
+        StatusField.LOCK,
+    }
+    push_lock._update_any_state(
+        [LockStatus.LOCKED, BatteryState(6.0, 100), AutoLockState(AutoLockMode.OFF, 0)]
+    )
+    push_lock._freshness.new_connection()
+    assert push_lock._stale_status_fields(False, time.monotonic()) == [StatusField.LOCK]
+
+
+def _yale_adv(value: int) -> AdvertisementData:
+    return AdvertisementData(
+        "M1FBA11", {YALE_MFR_ID: bytes([value])}, {}, [], None, -60, ()
+    )
+
+
+@pytest.mark.asyncio
+async def test_passive_mode_marks_changes_without_connecting():
+    push_lock = PushLock("M1FBA11", passive=True)
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    changes: list[dict[StateField, FieldChange]] = []
+    push_lock.register_field_callback([StateField.UNVERIFIED], changes.append)
+
+    push_lock.update_advertisement(device, _yale_adv(0))
+    assert changes == []
+    push_lock.update_advertisement(device, _yale_adv(1))
+    push_lock.update_advertisement(device, _yale_adv(0))
+    assert changes == [{StateField.UNVERIFIED: FieldChange(False, True)}]
+    assert push_lock.lock_state.unverified
+    assert push_lock._passive.changes == 2
+    assert push_lock._cancel_deferred_update is None
+
+
+@pytest.mark.asyncio
+async def test_passive_mode_verifies_at_most_once_per_interval():
+    push_lock = PushLock("M1FBA11", passive=True, passive_verify_interval=60.0)
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    push_lock.update_advertisement(device, _yale_adv(0))
+    assert push_lock._cancel_deferred_update is not None
+    push_lock._cancel_future_update()
+    push_lock.update_advertisement(device, _yale_adv(1))
+    assert push_lock._cancel_deferred_update is None
+
+
+def test_passive_mode_can_not_be_always_connected():
+    with pytest.raises(ValueError):
+        PushLock("M1FBA11", passive=True, always_connected=True)
+
+
+@pytest.mark.asyncio
+async def test_encrypted_homekit_broadcast_updates_state_without_connecting():
+    push_lock = PushLock("M1FBA11")
+    push_lock.set_homekit_broadcast_key(
+        bytes(range(32)), {0x12: HomeKitCharacteristic.LOCK_CURRENT_STATE}
+    )
+    push_lock._last_hk_state = 0x0100
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    push_lock.update_advertisement(
+        device,
+        AdvertisementData(
+            "M1FBA11",
+            {
+                APPLE_MFR_ID: bytes.fromhex(
+                    "1136a1b2c3d4e5f6564d8f0c0c065f09eef7d3073d5e1033"
+                )
+            },
+            {},
+            [],
+            None,
+            -60,
+            (),
+        ),
+    )
+    assert push_lock.lock_status is LockStatus.LOCKED
+    assert push_lock._last_hk_state == 0x0105
+    assert push_lock._cancel_deferred_update is None
+
+
+@pytest.mark.asyncio
+async def test_update_yields_to_pending_user_operation():
+    push_lock = PushLock("M1FBA11")
+    assert not push_lock._has_pending_user_operation()
+    with push_lock._user_operation():
+        assert push_lock._has_pending_user_operation()
+        push_lock._requeue_preempted_update([StatusField.BATTERY])
+    assert not push_lock._has_pending_user_operation()
+    assert push_lock._cancel_deferred_update is not None
+    push_lock._cancel_future_update()
+
+
+@pytest.mark.asyncio
+async def test_preempted_update_resumes_after_lock_operation():
+    push_lock = PushLock(
+        "M1FBA11", ble_device=BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    )
+    push_lock._running = True
+    push_lock._lock_info = LockInfo("August", "ASL-03", "SN", "1.0")
+    lock_requested = asyncio.Event()
+    calls: list[object] = []
+
+    async def _query_status(fields, should_stop):
+        calls.append(list(fields))
+        if len(calls) > 1:
+            return StatusQueryResult(
+                battery=BatteryState(6.0, 100), door=DoorStatus.CLOSED
+            )
+        # The lock operation shows up after the first field was read
+        await lock_requested.wait()
+        assert should_stop()
+        return StatusQueryResult(
+            auto_lock=AutoLockState(AutoLockMode.OFF, 0), remaining=tuple(fields[1:])
+        )
+
+    async def _force_lock():
+        calls.append("force_lock")
+
+    lock = MagicMock(query_status=_query_status, force_lock=_force_lock)
+    with (
+        patch.object(push_lock, "_ensure_connected", AsyncMock(return_value=lock)),
+        patch("yalexs_ble.push.LOCK_STALE_STATE_DEBOUNCE_DELAY", 0),
+        # Keep the resync after the lock operation out of the way
+        patch("yalexs_ble.push.RESYNC_DELAY", 60),
+    ):
+        update_task = asyncio.create_task(push_lock._update())
+        await asyncio.sleep(0)
+        lock_task = asyncio.create_task(push_lock.lock())
+        await asyncio.sleep(0)
+        lock_requested.set()
+        await update_task
+        await lock_task
+        assert calls == [
+            [
+                StatusField.AUTO_LOCK,
+                StatusField.LOCK,
+                StatusField.BATTERY,
+                StatusField.DOOR,
+            ],
+            "force_lock",
+        ]
+        assert push_lock._cancel_deferred_update is not None
+        await asyncio.sleep(0.1)
+        assert push_lock._update_task is not None
+        await push_lock._update_task
+    assert calls[2] == [StatusField.BATTERY, StatusField.DOOR]
+    assert push_lock.lock_status is LockStatus.LOCKED
+    push_lock._cancel_disconnect_timer()
+
+
+def test_max_in_flight_is_passed_to_the_lock():
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    push_lock = PushLock(
+        "M1FBA11", ble_device=device, key="0" * 32, key_index=1, max_in_flight=3
+    )
+    assert push_lock._get_lock_instance(device)._max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_keep_alive_is_rescheduled_in_place():
+    push_lock = PushLock("M1FBA11", always_connected=True)
+    push_lock._running = True
+    push_lock._schedule_next_keep_alive(10)
+    timer = push_lock._keep_alive_timer
+    assert timer is not None
+    deadline = timer.when()
+    push_lock._schedule_next_keep_alive(20)
+    assert push_lock._keep_alive_timer is timer
+    assert timer.when() > deadline
+    push_lock._running = False
+    push_lock._schedule_next_keep_alive(10)
+    assert push_lock._keep_alive_timer is None
+    assert timer.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_impossible_battery_voltage_stays_stale():
+    push_lock = PushLock(
+        "M1FBA11", ble_device=BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    )
+    push_lock._update_any_state([BatteryState(2.0, 0)])
+    assert StatusField.BATTERY in push_lock._stale_status_fields(
+        False, time.monotonic()
+    )
+
+    push_lock._lock_info = LockInfo("August", "ASL-03", "SN", "1.0")
+    lock = MagicMock(
+        query_status=AsyncMock(
+            return_value=StatusQueryResult(
+                lock=LockStatus.LOCKED,
+                door=DoorStatus.CLOSED,
+                battery=BatteryState(2.0, 0),
+                auto_lock=AutoLockState(AutoLockMode.OFF, 0),
+            )
+        )
+    )
+    with (
+        patch.object(push_lock, "_ensure_connected", AsyncMock(return_value=lock)),
+        patch.object(push_lock, "_execute_forced_disconnect") as forced_disconnect,
+    ):
+        await push_lock._update()
+    forced_disconnect.assert_awaited_once_with("impossible battery voltage: 2.0")
+    assert push_lock._stale_status_fields(False, time.monotonic()) == [
+        StatusField.BATTERY
+    ]
+
+
+async def _connect_attempts(push_lock: PushLock) -> int:
+    """Return the attempts a connect is given."""
+    with (
+        patch.object(
+            push_lock, "_connect_via", AsyncMock(side_effect=BleakError("failed"))
+        ) as connect_via,
+        pytest.raises(BleakError),
+    ):
+        await push_lock._ensure_connected()
+    return connect_via.call_args.args[2]
+
+
+@pytest.mark.asyncio
+async def test_only_a_pending_first_update_connects_once():
+    device = BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {})
+    push_lock = PushLock(
+        "M1FBA11", "AA:BB:CC:DD:EE:FF", passive=True, key="0" * 32, key_index=1
+    )
+    with patch("yalexs_ble.push.get_device", return_value=device):
+        await push_lock.start()
+    assert await _connect_attempts(push_lock) == MAX_CONNECT_ATTEMPTS
+
+    push_lock = PushLock("M1FBA11", "AA:BB:CC:DD:EE:FF", key="0" * 32, key_index=1)
+    with patch("yalexs_ble.push.get_device", return_value=device):
+        await push_lock.start()
+    push_lock._cancel_future_update()
+    assert await _connect_attempts(push_lock) == 1
+    push_lock._set_update_state(None)
+    assert await _connect_attempts(push_lock) == MAX_CONNECT_ATTEMPTS
+    await push_lock.wait_for_first_update(0.1)
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_connection_slot_times_out():
+    scheduler = ConnectionScheduler(capacity=1)
+    held = await scheduler.acquire("hci0", ConnectionPriority.UPDATE)
+    push_lock = PushLock(
+        "M1FBA11",
+        ble_device=BLEDevice("AA:BB:CC:DD:EE:FF", "M1FBA11", {"source": "hci0"}),
+        key="0" * 32,
+        key_index=1,
+        connection_scheduler=scheduler,
+    )
+    with (
+        patch("yalexs_ble.push.BLEAK_TIMEOUT", 0.01),
+        pytest.raises(TimeoutError),
+    ):
+        await push_lock._ensure_connected(ConnectionPriority.USER)
+    assert scheduler.waiting("hci0") == 0
+    held.release()
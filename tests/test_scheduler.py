@@ -0,0 +1,151 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from bleak_retry_connector import BLEDevice
+
+from yalexs_ble.scheduler import ConnectionPriority, ConnectionScheduler
+from yalexs_ble.util import DEFAULT_SOURCE, ble_device_source
+
+
+def test_ble_device_source():
+    assert ble_device_source(BLEDevice("AA", "lock", {"source": "proxy1"})) == (
+        "proxy1"
+    )
+    assert (
+        ble_device_source(
+            BLEDevice("AA", "lock", {"path": "/org/bluez/hci1/dev_AA_BB"})
+        )
+        == "hci1"
+    )
+    assert ble_device_source(BLEDevice("AA", "lock", None)) == DEFAULT_SOURCE
+
+
+@pytest.mark.asyncio
+async def test_user_requests_go_first():
+    scheduler = ConnectionScheduler(capacity=1)
+    held = await scheduler.acquire("hci0", ConnectionPriority.UPDATE)
+    order: list[str] = []
+
+    async def _acquire(name: str, priority: ConnectionPriority) -> None:
+        slot = await scheduler.acquire("hci0", priority)
+        order.append(name)
+        slot.release()
+
+    tasks = [
+        asyncio.create_task(_acquire("keep_alive", ConnectionPriority.KEEP_ALIVE)),
+        asyncio.create_task(_acquire("update", ConnectionPriority.UPDATE)),
+        asyncio.create_task(_acquire("unlock", ConnectionPriority.USER)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.waiting("hci0") == 3
+    assert scheduler.active("hci1") == 0
+    held.release()
+    held.release()
+    await asyncio.gather(*tasks)
+    assert order == ["unlock", "update", "keep_alive"]
+    assert scheduler.active("hci0") == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_age():
+    scheduler = ConnectionScheduler(capacity=1, aging=10.0)
+    held = await scheduler.acquire("hci0", ConnectionPriority.UPDATE)
+    with patch("yalexs_ble.scheduler.time.monotonic", return_value=100.0):
+        old = asyncio.create_task(
+            scheduler.acquire("hci0", ConnectionPriority.KEEP_ALIVE)
+        )
+        await asyncio.sleep(0)
+    with patch("yalexs_ble.scheduler.time.monotonic", return_value=125.0):
+        new = asyncio.create_task(scheduler.acquire("hci0", ConnectionPriority.USER))
+        await asyncio.sleep(0)
+        held.release()
+    await asyncio.sleep(0)
+    assert old.done()
+    assert not new.done()
+    old.result().release()
+    (await new).release()
+
+
+@pytest.mark.asyncio
+async def test_user_request_preempts_idle_holder():
+    scheduler = ConnectionScheduler(capacity=1)
+    busy = True
+    released = []
+
+    def _preempt() -> bool:
+        if busy:
+            return False
+        released.append(True)
+        asyncio.get_running_loop().call_soon(held.release)
+        return True
+
+    held = await scheduler.acquire("hci0", ConnectionPriority.UPDATE, _preempt)
+    waiter = asyncio.create_task(scheduler.acquire("hci0", ConnectionPriority.USER))
+    await asyncio.sleep(0)
+    assert not released
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.waiting("hci0") == 0
+
+    busy = False
+    slot = await scheduler.acquire("hci0", ConnectionPriority.USER)
+    assert released == [True]
+    assert scheduler.active("hci0") == 1
+    slot.release()
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        ConnectionScheduler(capacity=0)
+
+
+@pytest.mark.asyncio
+async def test_adapters_are_unlimited_by_default():
+    scheduler = ConnectionScheduler()
+    slots = [
+        await scheduler.acquire("hci0", ConnectionPriority.UPDATE) for _ in range(5)
+    ]
+    assert scheduler.active("hci0") == 5
+    for slot in slots:
+        slot.release()
+
+    scheduler.set_capacity("hci0", 1)
+    held = await scheduler.acquire("hci0", ConnectionPriority.UPDATE)
+    waiter = asyncio.create_task(scheduler.acquire("hci0", ConnectionPriority.USER))
+    await asyncio.sleep(0)
+    assert scheduler.waiting("hci0") == 1
+    held.release()
+    (await waiter).release()
+
+
+@pytest.mark.asyncio
+async def test_unknown_source_is_only_limited_when_asked():
+    scheduler = ConnectionScheduler(capacity=1)
+    first = await scheduler.acquire(DEFAULT_SOURCE, ConnectionPriority.UPDATE)
+    second = await scheduler.acquire(DEFAULT_SOURCE, ConnectionPriority.UPDATE)
+    assert scheduler.active(DEFAULT_SOURCE) == 2
+    first.release()
+    second.release()
+
+
+@pytest.mark.asyncio
+async def test_persistent_holders_do_not_use_slots():
+    scheduler = ConnectionScheduler(capacity=1)
+    persistent = [
+        await scheduler.acquire(
+            "hci0", ConnectionPriority.UPDATE, lambda: True, persistent=True
+        )
+        for _ in range(3)
+    ]
+    slot = await scheduler.acquire("hci0", ConnectionPriority.USER)
+    assert scheduler.active("hci0") == 4
+    waiter = asyncio.create_task(scheduler.acquire("hci0", ConnectionPriority.USER))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    slot.release()
+    (await waiter).release()
+    for holder in persistent:
+        holder.release()
+    assert scheduler.active("hci0") == 0
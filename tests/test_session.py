@@ -0,0 +1,365 @@
+import asyncio
+import itertools
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bleak_retry_connector import BleakError
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from yalexs_ble import codec, util
+from yalexs_ble.const import Commands, StatusType
+from yalexs_ble.cooldown import AdaptiveCooldown
+from yalexs_ble.secure_session import SecureSession
+from yalexs_ble.session import PrecompiledFrame, Session
+
+
+def _make_session(
+    max_in_flight: int = 1, cooldown: AdaptiveCooldown | None = None
+) -> tuple[Session, MagicMock]:
+    client = MagicMock(is_connected=True, write_gatt_char=AsyncMock())
+    session = Session(
+        client,
+        "lock",
+        asyncio.Lock(),
+        set(),
+        None,
+        max_in_flight=max_in_flight,
+        cooldown=cooldown,
+    )
+    session.cipher_encrypt = Cipher(
+        algorithms.AES(bytes(16)),
+        modes.CBC(bytes(0x10)),  # nosec
+    ).encryptor()
+    return session, client
+
+
+def _response(opcode: int, subtype: int, value: int) -> bytearray:
+    frame = bytearray(0x12)
+    frame[0x00] = 0xBB
+    frame[0x01] = opcode
+    frame[0x04] = subtype
+    frame[0x08] = value
+    frame[0x03] = util._simple_checksum(frame)
+    return frame
+
+
+@pytest.mark.asyncio
+async def test_pipelined_responses_matched_out_of_order():
+    session, client = _make_session(max_in_flight=2)
+    writes: list[bytearray] = []
+    client.write_gatt_char.side_effect = lambda _char, cmd, _resp: writes.append(cmd)
+
+    battery = asyncio.create_task(
+        session.execute(
+            session.build_operation_command(Commands.GETSTATUS, StatusType.BATTERY),
+            "battery",
+        )
+    )
+    lock_status = asyncio.create_task(
+        session.execute(
+            session.build_operation_command(Commands.GETSTATUS, StatusType.LOCK_ONLY),
+            "lock_status",
+        )
+    )
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert len(writes) == 2
+
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.LOCK_ONLY, 5))
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.BATTERY, 9))
+
+    assert (await battery)[0x08] == 9
+    assert (await lock_status)[0x08] == 5
+    assert not session._pending
+
+
+@pytest.mark.asyncio
+async def test_pipelined_unmatched_response_fails_oldest_request():
+    session, client = _make_session(max_in_flight=2)
+    writes: list[bytearray] = []
+    client.write_gatt_char.side_effect = lambda _char, cmd, _resp: writes.append(cmd)
+
+    battery = asyncio.create_task(
+        session.execute(
+            session.build_operation_command(Commands.GETSTATUS, StatusType.BATTERY),
+            "battery",
+        )
+    )
+    for _ in range(5):
+        await asyncio.sleep(0)
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.DOOR_ONLY, 1))
+    # The failed request is written again instead of waiting for the timeout
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert len(writes) == 2
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.BATTERY, 9))
+
+    assert (await asyncio.wait_for(battery, 1))[0x08] == 9
+    assert not session._pending
+
+
+def _status_commands(
+    session: Session, *status_types: StatusType
+) -> list[tuple[bytearray, str]]:
+    return [
+        (
+            session.build_operation_command(Commands.GETSTATUS, status_type),
+            status_type.name,
+        )
+        for status_type in status_types
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pipelined_execute_many_spaces_writes_by_cooldown():
+    session, client = _make_session(
+        max_in_flight=3, cooldown=AdaptiveCooldown(0.05, floor=0.05)
+    )
+    session.enable_cooldown()
+    written: list[float] = []
+    status_types = [StatusType.BATTERY, StatusType.LOCK_ONLY, StatusType.DOOR_ONLY]
+
+    def _write(_char, _cmd, _resp):
+        written.append(time.monotonic())
+        if len(written) == len(status_types):
+            for value, status_type in enumerate(status_types):
+                session._notify(0, _response(Commands.GETSTATUS, status_type, value))
+
+    client.write_gatt_char.side_effect = _write
+    results = await session.execute_many(_status_commands(session, *status_types))
+    assert [result[0x08] for result in results] == [0, 1, 2]
+    assert all(
+        later - earlier >= 0.045 for earlier, later in itertools.pairwise(written)
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipelined_execute_many_stops_between_writes():
+    session, client = _make_session(
+        max_in_flight=2, cooldown=AdaptiveCooldown(0.01, floor=0.01)
+    )
+    session.enable_cooldown()
+
+    def _write(_char, _cmd, _resp):
+        asyncio.get_running_loop().call_soon(
+            session._notify, 0, _response(Commands.GETSTATUS, StatusType.BATTERY, 9)
+        )
+
+    client.write_gatt_char.side_effect = _write
+    results = await session.execute_many(
+        _status_commands(session, StatusType.BATTERY, StatusType.LOCK_ONLY),
+        lambda: client.write_gatt_char.call_count > 0,
+    )
+    assert [result[0x08] for result in results] == [9]
+    assert client.write_gatt_char.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_pipelined_execute_many_cancels_writes_on_failure():
+    session, client = _make_session(
+        max_in_flight=3, cooldown=AdaptiveCooldown(0.01, floor=0.01)
+    )
+    session.enable_cooldown()
+    client.write_gatt_char.side_effect = [None, BleakError("write failed")]
+    with pytest.raises(BleakError):
+        await session.execute_many(
+            _status_commands(
+                session,
+                StatusType.BATTERY,
+                StatusType.LOCK_ONLY,
+                StatusType.DOOR_ONLY,
+            )
+        )
+    await asyncio.sleep(0)
+    assert client.write_gatt_char.call_count == 2
+    assert not session._pending
+
+
+@pytest.mark.asyncio
+async def test_stop_and_wait_by_default():
+    session, client = _make_session()
+    writes: list[bytearray] = []
+    client.write_gatt_char.side_effect = lambda _char, cmd, _resp: writes.append(cmd)
+
+    tasks = [
+        asyncio.create_task(
+            session.execute(
+                session.build_operation_command(Commands.GETSTATUS, status_type),
+                status_type.name,
+            )
+        )
+        for status_type in (StatusType.BATTERY, StatusType.LOCK_ONLY)
+    ]
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert len(writes) == 1
+
+    # An unmatched response still answers the only outstanding request
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.DOOR_ONLY, 1))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert len(writes) == 2
+    session._notify(0, _response(Commands.GETSTATUS, StatusType.LOCK_ONLY, 5))
+
+    assert (await tasks[0])[0x04] == StatusType.DOOR_ONLY
+    assert (await tasks[1])[0x08] == 5
+
+
+def test_max_in_flight_must_be_positive():
+    with pytest.raises(ValueError):
+        _make_session(max_in_flight=0)
+
+
+@pytest.mark.asyncio
+async def test_execute_many_single_lock_acquisition():
+    session, client = _make_session()
+    responses = iter(
+        [
+            _response(Commands.GETSTATUS, StatusType.BATTERY, 9),
+            _response(Commands.GETSTATUS, StatusType.LOCK_ONLY, 5),
+        ]
+    )
+
+    def _write(_char, _cmd, _resp):
+        assert session._lock.locked()
+        asyncio.get_running_loop().call_soon(session._notify, 0, next(responses))
+
+    client.write_gatt_char.side_effect = _write
+    results = await session.execute_many(
+        [
+            (
+                session.build_operation_command(Commands.GETSTATUS, status_type),
+                status_type.name,
+            )
+            for status_type in (StatusType.BATTERY, StatusType.LOCK_ONLY)
+        ]
+    )
+    assert [result[0x08] for result in results] == [9, 5]
+    assert not session._lock.locked()
+    metrics = session._metrics.snapshot()
+    assert metrics["BATTERY"].lock_wait.count == 1
+    assert metrics["LOCK_ONLY"].lock_wait.count == 1
+    assert metrics["LOCK_ONLY"].lock_wait.total >= metrics["BATTERY"].lock_wait.total
+    assert metrics["LOCK_ONLY"].cooldown.count == 1
+    assert metrics["LOCK_ONLY"].notify.count == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_many_stops_between_commands():
+    session, client = _make_session()
+    stop = False
+
+    def _write(_char, _cmd, _resp):
+        nonlocal stop
+        # A user operation shows up while the first query is in flight
+        stop = True
+        asyncio.get_running_loop().call_soon(
+            session._notify, 0, _response(Commands.GETSTATUS, StatusType.BATTERY, 9)
+        )
+
+    client.write_gatt_char.side_effect = _write
+    results = await session.execute_many(
+        [
+            (
+                session.build_operation_command(Commands.GETSTATUS, status_type),
+                status_type.name,
+            )
+            for status_type in (StatusType.BATTERY, StatusType.LOCK_ONLY)
+        ],
+        lambda: stop,
+    )
+    assert [result[0x08] for result in results] == [9]
+    assert client.write_gatt_char.call_count == 1
+    assert not session._lock.locked()
+
+
+@pytest.mark.asyncio
+async def test_execute_many_stops_after_cooldown():
+    session, client = _make_session()
+    stop = False
+
+    async def _wait_for_cooldown(_command_name):
+        nonlocal stop
+        # A user operation shows up while waiting for the lock to settle
+        stop = True
+
+    session._wait_for_cooldown = _wait_for_cooldown  # type: ignore[method-assign]
+    results = await session.execute_many(
+        [
+            (
+                session.build_operation_command(Commands.GETSTATUS, StatusType.BATTERY),
+                StatusType.BATTERY.name,
+            )
+        ],
+        lambda: stop,
+    )
+    assert results == []
+    assert client.write_gatt_char.call_count == 0
+    assert "BATTERY" not in session._metrics.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_build_cached_command_matches_built_command():
+    session, _ = _make_session()
+    command = session.build_operation_command(Commands.GETSTATUS, StatusType.BATTERY)
+    session._write_checksum(command)
+    cached = session.build_cached_command(Commands.GETSTATUS, StatusType.BATTERY)
+    assert cached == command
+    assert type(cached) is PrecompiledFrame
+    # Each call returns a fresh copy since the frame is encrypted in place
+    assert cached is not session.build_cached_command(
+        Commands.GETSTATUS, StatusType.BATTERY
+    )
+
+
+@pytest.mark.asyncio
+async def test_encrypt_decrypt_in_place():
+    key = bytes(range(16))
+    session, _ = _make_session()
+    session.set_key(key)
+    reference = Cipher(
+        algorithms.AES(key),
+        modes.CBC(bytes(0x10)),  # nosec
+    ).encryptor()
+    frames = [bytearray(range(i, i + 0x12)) for i in range(3)]
+    for frame in frames:
+        command = bytearray(frame)
+        session._encrypt(command, "test")
+        expected = reference.update(bytes(frame[0x00:0x10]))
+        assert command[0x00:0x10] == expected
+        assert command[0x10:] == frame[0x10:]
+
+    peer = Cipher(
+        algorithms.AES(key),
+        modes.CBC(bytes(0x10)),  # nosec
+    ).encryptor()
+    for frame, data_type in zip(frames, (bytes, bytearray, bytes), strict=True):
+        encrypted = data_type(peer.update(bytes(frame[0x00:0x10])) + frame[0x10:])
+        decrypted = session.decrypt(encrypted)
+        assert decrypted == frame
+        assert type(decrypted) is bytes
+
+
+@pytest.mark.asyncio
+async def test_secure_cached_command_keeps_key_index():
+    client = MagicMock(is_connected=True, write_gatt_char=AsyncMock())
+    for key_index in (3, 0):
+        session = SecureSession(client, "lock", asyncio.Lock(), set(), key_index)
+        command = session.build_command(0x02)
+        session._write_checksum(command)
+        cached = session.build_cached_command(0x02)
+        assert cached == command
+        assert cached[0x11] == key_index
+
+
+@pytest.mark.asyncio
+async def test_secure_disconnect_is_sent_with_zero_key_index():
+    client = MagicMock(is_connected=True, write_gatt_char=AsyncMock())
+    for key_index in (3, 0):
+        session = SecureSession(client, "lock", asyncio.Lock(), set(), key_index)
+        command = codec.encode_disconnect()
+        session._write_checksum(command)
+        disconnect = session.build_disconnect_command()
+        assert disconnect == command
+        assert disconnect[0x11] == 0x00
@@ -0,0 +1,112 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from bleak.backends.scanner import AdvertisementData
+from bleak_retry_connector import BLEDevice
+
+from yalexs_ble.const import (
+    YALE_MFR_ID,
+    AuthState,
+    AutoLockMode,
+    AutoLockState,
+    BatteryState,
+    DoorStatus,
+    LockInfo,
+    LockState,
+    LockStatus,
+)
+from yalexs_ble.push import PushLock
+from yalexs_ble.snapshot import (
+    PushLockSnapshot,
+    async_restore_snapshots,
+    async_save_snapshots,
+)
+
+SNAPSHOT = PushLockSnapshot(
+    LockState(
+        LockStatus.LOCKED,
+        DoorStatus.CLOSED,
+        BatteryState(6.1, 100),
+        AuthState(True),
+        AutoLockState(AutoLockMode.TIMER, 300),
+        None,
+    ),
+    LockInfo("August", "ASL-03", "M1FBA11", "2.0.0"),
+    12,
+    1,
+)
+
+
+def test_snapshot_round_trip():
+    assert PushLockSnapshot.from_dict(SNAPSHOT.as_dict()) == SNAPSHOT
+    empty = PushLockSnapshot(None, None)
+    assert PushLockSnapshot.from_dict(empty.as_dict()) == empty
+
+
+@pytest.mark.asyncio
+async def test_restored_lock_serves_state_without_connecting():
+    push_lock = PushLock(
+        "M1FBA11", "aa:bb:cc:dd:ee:ff", key="0800200c9a66", key_index=1
+    )
+    push_lock.restore(SNAPSHOT)
+    device = BLEDevice("aa:bb:cc:dd:ee:ff", "M1FBA11", {})
+    with patch("yalexs_ble.push.get_device", return_value=device):
+        await push_lock.start()
+    await push_lock.wait_for_first_update(0.1)
+    assert push_lock.lock_status is LockStatus.LOCKED
+    assert push_lock.lock_info == SNAPSHOT.lock_info
+    assert push_lock._cancel_deferred_update is None
+
+    def _adv(value: int) -> AdvertisementData:
+        return AdvertisementData(
+            "M1FBA11", {YALE_MFR_ID: bytes([value])}, {}, [], None, -60, ()
+        )
+
+    push_lock.update_advertisement(device, _adv(1))
+    assert push_lock._cancel_deferred_update is None
+    push_lock.update_advertisement(device, _adv(0))
+    assert push_lock._cancel_deferred_update is not None
+    push_lock._cancel_future_update()
+
+
+@pytest.mark.asyncio
+async def test_restored_lock_accepts_the_first_real_update():
+    push_lock = PushLock(
+        "M1FBA11", "aa:bb:cc:dd:ee:ff", key="0800200c9a66", key_index=1
+    )
+    push_lock.restore(SNAPSHOT)
+    with patch("yalexs_ble.push.get_device", return_value=None):
+        await push_lock.start()
+    push_lock._set_update_state(None)
+    push_lock._set_update_state(RuntimeError("second update failed"))
+    await push_lock.wait_for_first_update(0.1)
+
+
+@pytest.mark.asyncio
+async def test_save_and_restore_snapshots(tmp_path):
+    path = tmp_path / "snapshots.json"
+    push_lock = PushLock("M1FBA11")
+    push_lock.restore(SNAPSHOT)
+    await async_save_snapshots(path, [push_lock])
+    fresh = PushLock("M1FBA11")
+    other = PushLock(address="aa:bb:cc:dd:ee:ff")
+    assert await async_restore_snapshots(path, [fresh, other]) == 1
+    assert fresh.snapshot() == SNAPSHOT
+    assert other.lock_state is None
+
+
+@pytest.mark.asyncio
+async def test_restore_skips_corrupt_files_and_entries(tmp_path):
+    path = tmp_path / "snapshots.json"
+    path.write_text('{"M1FBA11": {"state": [')
+    push_lock = PushLock("M1FBA11")
+    assert await async_restore_snapshots(path, [push_lock]) == 0
+
+    bad_state = SNAPSHOT.as_dict()
+    bad_state["state"][0] = 0x7F
+    path.write_text(json.dumps({"M1FBA11": bad_state, "M2FBA11": SNAPSHOT.as_dict()}))
+    other = PushLock("M2FBA11")
+    assert await async_restore_snapshots(path, [push_lock, other]) == 1
+    assert push_lock.lock_state is None
+    assert other.snapshot() == SNAPSHOT
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from yalexs_ble.const import LockInfo
+from yalexs_ble.store import JSONLockInfoStore, LockInfoStore
+
+INFO = LockInfo("August", "ASL-03", "L123456", "2.0.0")
+
+
+@pytest.mark.asyncio
+async def test_lock_info_store_round_trip():
+    store = LockInfoStore()
+    assert await store.async_get("M1FBA11") is None
+    await store.async_set("M1FBA11", INFO)
+    restored = LockInfoStore()
+    restored.restore(store.as_dict())
+    assert await restored.async_get("M1FBA11") == INFO
+
+
+@pytest.mark.asyncio
+async def test_json_lock_info_store(tmp_path):
+    path = tmp_path / "lock_info.json"
+    store = JSONLockInfoStore(path)
+    assert await store.async_get("M1FBA11") is None
+    await store.async_set("M1FBA11", INFO)
+    assert json.loads(path.read_text())["M1FBA11"]["firmware"] == "2.0.0"
+    assert await JSONLockInfoStore(path).async_get("M1FBA11") == INFO
+
+    path.write_text("not json")
+    assert await JSONLockInfoStore(path).async_get("M1FBA11") is None
+
+
+@pytest.mark.asyncio
+async def test_json_lock_info_store_skips_invalid_entries(tmp_path):
+    path = tmp_path / "lock_info.json"
+    path.write_text(
+        json.dumps(
+            {
+                "M1FBA11": {"manufacturer": "August"},
+                "M2FBA11": "garbage",
+                "M3FBA11": {
+                    "manufacturer": "August",
+                    "model": "ASL-03",
+                    "serial": "L123456",
+                    "firmware": "2.0.0",
+                },
+            }
+        )
+    )
+    store = JSONLockInfoStore(path)
+    assert await store.async_get("M1FBA11") is None
+    assert await store.async_get("M2FBA11") is None
+    assert await store.async_get("M3FBA11") == INFO
+
+    path.write_text("[]")
+    assert await JSONLockInfoStore(path).async_get("M3FBA11") is None
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from yalexs_ble.timer import TimerWheel
+
+
+@pytest.mark.asyncio
+async def test_timers_fire_in_order_and_not_early():
+    wheel = TimerWheel(0.01)
+    loop = asyncio.get_running_loop()
+    fired: list[tuple[str, float]] = []
+    start = loop.time()
+    wheel.call_later(0.03, lambda: fired.append(("late", loop.time())))
+    timer = wheel.call_later(
+        0.01, lambda name: fired.append((name, loop.time())), "early"
+    )
+    assert wheel.pending == 2
+    assert timer.when() == pytest.approx(start + 0.01, abs=0.005)
+    await asyncio.sleep(0.06)
+    assert [name for name, _ in fired] == ["early", "late"]
+    assert fired[0][1] >= timer.when()
+    assert wheel.pending == 0
+    assert wheel.buckets == 0
+    assert timer.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_reschedule():
+    wheel = TimerWheel(0.01)
+    fired: list[str] = []
+    cancelled = wheel.call_later(0.01, fired.append, "cancelled")
+    moved = wheel.call_later(0.01, fired.append, "moved")
+    cancelled.cancel()
+    cancelled.cancel()
+    wheel.reschedule(moved, 0.05)
+    assert wheel.pending == 1
+    await asyncio.sleep(0.03)
+    assert fired == []
+    await asyncio.sleep(0.05)
+    assert fired == ["moved"]
+    with pytest.raises(ValueError):
+        wheel.reschedule(moved, 0.01)
+
+
+@pytest.mark.asyncio
+async def test_callback_errors_do_not_stop_the_wheel():
+    wheel = TimerWheel(0.01)
+    fired: list[str] = []
+
+    def _fail() -> None:
+        raise RuntimeError("boom")
+
+    def _chain() -> None:
+        fired.append("first")
+        wheel.call_later(0, fired.append, "second")
+
+    wheel.call_later(0, _fail)
+    wheel.call_later(0, _chain)
+    await asyncio.sleep(0.05)
+    assert fired == ["first", "second"]
+
+
+def test_resolution_must_be_positive():
+    with pytest.raises(ValueError):
+        TimerWheel(0)
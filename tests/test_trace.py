@@ -0,0 +1,25 @@
+from yalexs_ble.trace import TRACE_SLOT_SIZE, FrameKind, FrameTrace
+
+
+def test_frame_trace_wraps_oldest_first():
+    trace = FrameTrace(3)
+    assert trace.format() == "<empty>"
+    for i in range(5):
+        trace.record(FrameKind.NOTIFY_RAW, bytes([i]) * 18)
+    entries = trace.dump()
+    assert len(trace) == 3
+    assert [entry.data[0] for entry in entries] == [2, 3, 4]
+    assert all(entry.kind is FrameKind.NOTIFY_RAW for entry in entries)
+    assert entries[0].timestamp <= entries[-1].timestamp
+    assert len(trace.format().splitlines()) == 3
+
+
+def test_frame_trace_truncates_long_frames():
+    trace = FrameTrace()
+    trace.record(FrameKind.WRITE_PLAIN, bytes(range(32)))
+    trace.record(FrameKind.WRITE_ENCRYPTED, b"\x01\x02")
+    first, second = trace.dump()
+    assert first.data == bytes(range(TRACE_SLOT_SIZE))
+    assert second.data == b"\x01\x02"
+    trace.clear()
+    assert trace.dump() == []